@@ -0,0 +1,202 @@
+"""Latency and query count of the attendance endpoints every lecturer hits daily.
+
+Seeds a fresh SQLite database with one Subject per class size, then times
+save_attendance_data, update_attendance_data and get_attendance_student
+through the Django test client. Results are written as JSON, so runs of two
+releases can be compared:
+
+    python benchmarks/attendance_benchmark.py
+    python benchmarks/attendance_benchmark.py --sizes 30,500 --baseline benchmarks/results/<previous>.json
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DEFAULT_SIZES = (30, 100, 500, 1000, 5000)
+ENDPOINTS = ("save_attendance_data", "update_attendance_data", "get_attendance_student")
+
+
+def seed_class(size):
+    # One Course, Subject and Staff with "size" Students, created in bulk
+    from django.contrib.auth import get_user_model
+    from student_management_app.models import Courses, SessionYearModel, Subjects, Students
+
+    User = get_user_model()
+    session_year = SessionYearModel.objects.create(session_start_year="2025-01-01", session_end_year="2025-12-31")
+    course = Courses.objects.create(course_name="Benchmark %d" % size)
+    staff_user = User.objects.create_user(username="benchstaff%d" % size, password="benchmark", user_type=2)
+    subject = Subjects.objects.create(subject_name="Benchmark %d" % size, course_id=course, staff_id=staff_user)
+
+    usernames = ["bench%d_%d" % (size, index) for index in range(size)]
+    User.objects.bulk_create([User(username=username, password="!", user_type=3) for username in usernames], batch_size=500)
+    user_ids = list(User.objects.filter(username__in=usernames).order_by('id').values_list('id', flat=True))
+    Students.objects.bulk_create([
+        Students(admin_id=user_id, course_id=course, session_year_id=session_year, address="", profile_pic="", gender="")
+        for user_id in user_ids
+    ], batch_size=500)
+    return staff_user, subject, session_year, user_ids
+
+
+def measure(client, url, data, repeat):
+    # Returns (timings in ms, queries of one request), checking every response
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+
+    timings = []
+    queries = 0
+    for run in range(repeat):
+        run_data = data(run)
+        with CaptureQueriesContext(connection) as captured:
+            start = time.perf_counter()
+            response = client.post(url, run_data)
+            timings.append((time.perf_counter() - start) * 1000)
+        if response.status_code != 200 or response.content == b"Error":
+            raise RuntimeError("%s failed: %s" % (url, response.content[:200]))
+        queries = len(captured)
+    return timings, queries
+
+
+def result(endpoint, size, timings, queries):
+    return {
+        "endpoint": endpoint,
+        "class_size": size,
+        "runs": len(timings),
+        "median_ms": round(statistics.median(timings), 3),
+        "min_ms": round(min(timings), 3),
+        "max_ms": round(max(timings), 3),
+        "queries": queries,
+    }
+
+
+def run_benchmark(sizes=DEFAULT_SIZES, repeat=5, progress=None):
+    # Runs against the current database, returns one result per endpoint and class size
+    from django.test import Client
+    from django.urls import reverse
+    from student_management_app.models import Attendance
+
+    results = []
+    for size in sizes:
+        staff_user, subject, session_year, user_ids = seed_class(size)
+        client = Client()
+        client.force_login(staff_user)
+
+        def register(status):
+            return json.dumps([{"id": user_id, "status": status} for user_id in user_ids])
+
+        # A new register per run, on consecutive days
+        first_day = datetime.date(2025, 2, 1)
+        timings, queries = measure(client, reverse('save_attendance_data'), lambda run: {
+            "student_ids": register(1),
+            "subject_id": subject.id,
+            "attendance_date": (first_day + datetime.timedelta(days=run)).isoformat(),
+            "session_year_id": session_year.id,
+        }, repeat)
+        results.append(result("save_attendance_data", size, timings, queries))
+
+        # Every Status of the register flips on each run
+        attendance = Attendance.objects.get(subject_id=subject, attendance_date=first_day)
+        timings, queries = measure(client, reverse('update_attendance_data'), lambda run: {
+            "student_ids": register(run % 2),
+            "attendance_date": attendance.id,
+        }, repeat)
+        results.append(result("update_attendance_data", size, timings, queries))
+
+        timings, queries = measure(client, reverse('get_attendance_student'), lambda run: {"attendance_date": attendance.id}, repeat)
+        results.append(result("get_attendance_student", size, timings, queries))
+
+        if progress:
+            progress(results[-3:])
+    return results
+
+
+def compare(results, baseline):
+    # Lines "endpoint size: median ms (change) queries (change)" against a previous run
+    previous = {(row["endpoint"], row["class_size"]): row for row in baseline["results"]}
+    lines = []
+    for row in results:
+        old = previous.get((row["endpoint"], row["class_size"]))
+        if old is None:
+            continue
+        change = (row["median_ms"] - old["median_ms"]) / old["median_ms"] * 100 if old["median_ms"] else 0
+        lines.append("%-24s %6d: %10.2f ms (%+6.1f%%) %6d queries (%+d)" % (
+            row["endpoint"], row["class_size"], row["median_ms"], change, row["queries"], row["queries"] - old["queries"]
+        ))
+    return lines
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=BASE_DIR, stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def setup_django(database, storage_mode):
+    sys.path.insert(0, BASE_DIR)
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "student_management_system.settings")
+    os.environ.setdefault("DJANGO_SECRET_KEY", "benchmark")
+
+    import django
+    from django.conf import settings
+
+    settings.DATABASES["default"]["NAME"] = database
+    if storage_mode:
+        settings.ATTENDANCE_STORAGE_MODE = storage_mode
+    django.setup()
+
+    from django.core.management import call_command
+    call_command("migrate", verbosity=0)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks the attendance endpoints against a seeded SQLite database")
+    parser.add_argument("--sizes", default=",".join(str(size) for size in DEFAULT_SIZES), help="Comma separated class sizes")
+    parser.add_argument("--repeat", type=int, default=5, help="Requests timed per endpoint and class size")
+    parser.add_argument("--storage-mode", help="ATTENDANCE_STORAGE_MODE of the new registers (default: the settings value)")
+    parser.add_argument("--output", help="JSON file written (default: benchmarks/results/<date>-<commit>.json)")
+    parser.add_argument("--baseline", help="Previous JSON result to compare with")
+    options = parser.parse_args(argv)
+    sizes = [int(size) for size in options.sizes.split(",")]
+
+    with tempfile.TemporaryDirectory() as directory:
+        setup_django(os.path.join(directory, "benchmark.sqlite3"), options.storage_mode)
+        from django.conf import settings
+
+        def progress(rows):
+            for row in rows:
+                print("%-24s %6d: %10.2f ms %6d queries" % (row["endpoint"], row["class_size"], row["median_ms"], row["queries"]))
+
+        results = run_benchmark(sizes, options.repeat, progress)
+
+    report = {
+        "created_at": datetime.datetime.now().isoformat(timespec="seconds"),
+        "git_commit": git_commit(),
+        "python": platform.python_version(),
+        "storage_mode": settings.ATTENDANCE_STORAGE_MODE,
+        "repeat": options.repeat,
+        "results": results,
+    }
+    output = options.output or os.path.join(
+        BASE_DIR, "benchmarks", "results", "%s-%s.json" % (datetime.date.today().isoformat(), report["git_commit"] or "local")
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as result_file:
+        json.dump(report, result_file, indent=2)
+    print("Results written to %s" % output)
+
+    if options.baseline:
+        with open(options.baseline) as baseline_file:
+            print("\n".join(compare(results, json.load(baseline_file))))
+
+
+if __name__ == "__main__":
+    main()
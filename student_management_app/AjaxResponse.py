@@ -0,0 +1,45 @@
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import HttpResponse, JsonResponse
+
+
+# Responses of the AJAX list endpoints (get_students, get_attendance_dates,
+# get_attendance_student and their HOD twins), built from values_list rows.
+# The "version" request parameter selects the format:
+#
+#   1 (default) - the original format: a JSON string holding the JSON list of
+#                 objects (encoded twice), kept for old clients;
+#   2           - the list of objects encoded once, or with "layout=columns"
+#                 one array per field: {"ids": [...], "names": [...]}.
+
+VERSION_PARAM = "version"
+LAYOUT_PARAM = "layout"
+LEGACY_VERSION = "1"
+COLUMNS = "columns"
+
+STUDENT_FIELDS = (("id", "ids"), ("name", "names"))
+REGISTER_FIELDS = (("id", "ids"), ("name", "names"), ("status", "statuses"))
+ATTENDANCE_DATE_FIELDS = (("id", "ids"), ("attendance_date", "attendance_dates"), ("session_year_id", "session_year_ids"))
+
+
+def request_param(request, name, default=None):
+    return request.POST.get(name, request.GET.get(name, default))
+
+
+def rows_response(request, fields, rows):
+    # fields: ((object key, column name), ...) in the order of the row tuples
+    version = request_param(request, VERSION_PARAM, LEGACY_VERSION)
+    if version == LEGACY_VERSION:
+        keys = [key for key, column in fields]
+        return JsonResponse(json.dumps([dict(zip(keys, row)) for row in rows], cls=DjangoJSONEncoder), content_type="application/json", safe=False)
+    if version != "2":
+        return JsonResponse({"error": "Unknown version %s" % version}, status=400)
+
+    if request_param(request, LAYOUT_PARAM) == COLUMNS:
+        values = list(zip(*rows)) or [()] * len(fields)
+        data = {column: list(column_values) for (key, column), column_values in zip(fields, values)}
+    else:
+        keys = [key for key, column in fields]
+        data = [dict(zip(keys, row)) for row in rows]
+    return HttpResponse(json.dumps(data, cls=DjangoJSONEncoder), content_type="application/json")
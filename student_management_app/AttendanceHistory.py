@@ -0,0 +1,53 @@
+from student_management_app import AttendanceStorage
+from student_management_app.models import AttendanceChangeLog
+
+
+# Every save or update of a register appends one AttendanceChangeLog row, in the
+# transaction of the write, whatever the number of Students that changed.
+# The changes are a comma separated list of "<op><student id>":
+#
+#   p / a - Student added to the register as Present / Absent
+#   + / - - Student switched to Present / Absent
+#
+# A register at any point in time is its current Statuses with the later
+# changes undone. Writes made before the change log existed, and bulk
+# imports, are not in it.
+
+ADDED = {True: "p", False: "a"}
+SWITCHED = {True: "+", False: "-"}
+
+
+def encode_changes(added=(), changed=()):
+    entries = ["%s%d" % (ADDED[status], student_id) for student_id, status in sorted(added)]
+    entries += ["%s%d" % (SWITCHED[status], student_id) for student_id, status in sorted(changed)]
+    return ",".join(entries)
+
+
+def decode_changes(changes):
+    # Returns [(op, student_id)]
+    return [(entry[0], int(entry[1:])) for entry in changes.split(",") if entry]
+
+
+def record_change(attendance, editor_id=None, added=(), changed=()):
+    return AttendanceChangeLog.objects.create(attendance_id=attendance, editor_id_id=editor_id, changes=encode_changes(added, changed))
+
+
+def register_history(attendance):
+    # [(created_at, editor_id, [(op, student_id)])] of the register, oldest first
+    logs = AttendanceChangeLog.objects.filter(attendance_id=attendance).order_by('created_at', 'id').values_list('created_at', 'editor_id', 'changes')
+    return [(created_at, editor_id, decode_changes(changes)) for created_at, editor_id, changes in logs]
+
+
+def register_at(attendance, when):
+    # {student_id: status} of the register as it was at "when", None if it did not exist yet
+    if attendance.created_at > when:
+        return None
+    statuses = AttendanceStorage.read_register(attendance)
+    later = AttendanceChangeLog.objects.filter(attendance_id=attendance, created_at__gt=when).order_by('-created_at', '-id')
+    for changes in later.values_list('changes', flat=True):
+        for op, student_id in decode_changes(changes):
+            if op in (ADDED[True], ADDED[False]):
+                statuses.pop(student_id, None)
+            else:
+                statuses[student_id] = op != SWITCHED[True]
+    return statuses
@@ -0,0 +1,102 @@
+import json
+
+from django.conf import settings
+from django.core import checks
+from django.utils import timezone
+
+from student_management_app import AttendanceService, DashboardCache
+from student_management_app.models import Subjects, SessionYearModel, AttendanceJob
+
+
+# With ATTENDANCE_QUEUE set, the Take Attendance page does not write the register
+# itself: the payload is checked, stored as an AttendanceJob and the request
+# returns at once. "python manage.py process_attendance_queue --loop" saves the
+# pending jobs a batch at a time, in one transaction per batch, so many lecturers
+# submitting at the same time no longer wait on each other's write locks.
+# The page polls attendance_job_status until its job is done.
+#
+# The payload is one register in the format of AttendanceService.save_attendance_batch.
+#
+# The worker bumps the Dashboard versions in its own process, so the queue needs a
+# cache shared with the server processes (not LocMemCache): otherwise the Dashboards
+# would keep showing the numbers from before the write. check_shared_cache stops the
+# server from starting with such a setup and the worker refuses to run.
+
+QUEUE_BATCH_SIZE = 50
+QUEUE_MAX_ATTEMPTS = 5
+
+
+def queue_enabled():
+    return getattr(settings, "ATTENDANCE_QUEUE", False)
+
+
+def check_shared_cache(app_configs, **kwargs):
+    if queue_enabled() and not DashboardCache.cache_is_shared():
+        return [checks.Error(
+            "ATTENDANCE_QUEUE needs a cache shared by the server and the worker processes.",
+            hint="Configure CACHES with a shared backend (Memcached, Redis, database...) instead of LocMemCache.",
+            id="student_management_app.E001",
+        )]
+    return []
+
+
+def enqueue(staff_user_id, subject_id, session_year_id, attendance_date, statuses):
+    # Checks the register with reads only (no write lock is held), returns the AttendanceJob
+    subject_id = Subjects.objects.get(id=subject_id).id
+    session_year_id = SessionYearModel.objects.get(id=session_year_id).id
+    AttendanceService.resolve_students([stud['id'] for stud in statuses])
+
+    payload = {"subject_id": subject_id, "attendance_date": attendance_date, "session_year_id": session_year_id, "student_ids": statuses}
+    return AttendanceJob.objects.create(staff_id_id=staff_user_id, payload=json.dumps(payload))
+
+
+def process_jobs(batch_size=QUEUE_BATCH_SIZE):
+    # Saves the oldest pending jobs, returns how many were processed
+    jobs = list(AttendanceJob.objects.filter(status="pending").order_by('id')[:batch_size])
+    if not jobs:
+        return 0
+    AttendanceJob.objects.filter(id__in=[job.id for job in jobs]).update(status="processing")
+
+    try:
+        # The jobs of each Staff are saved together, so the change log keeps the editor
+        results = {}
+        for staff_id in set(job.staff_id_id for job in jobs):
+            chunk = [(job.id, job.payload) for job in jobs if job.staff_id_id == staff_id]
+            for result in AttendanceService.save_attendance_chunk(chunk, None, editor_id=staff_id):
+                results[result["line"]] = result
+        now = timezone.now()
+        for job in jobs:
+            result = results[job.id]
+            job.updated_at = now
+            if result["status"] == "OK":
+                job.status, job.attendance_id = "done", result["attendance_id"]
+            elif result.get("retry"):
+                retry_job(job, result["error"])
+            else:
+                job.status, job.error = "error", result["error"]
+        AttendanceJob.objects.bulk_update(jobs, ['status', 'attendance_id', 'error', 'attempts', 'updated_at'])
+    except Exception as error:
+        # The batch did not finish (e.g. the database was locked): it goes back to the queue,
+        # saving again is an upsert. The error is raised for the worker to report it
+        for job in jobs:
+            retry_job(job, str(error))
+        AttendanceJob.objects.bulk_update(jobs, ['status', 'error', 'attempts', 'updated_at'])
+        raise
+    return len(jobs)
+
+
+def retry_job(job, error):
+    # Puts a job back in the queue after a transient error, until QUEUE_MAX_ATTEMPTS
+    job.attempts += 1
+    job.error = error
+    job.status = "error" if job.attempts >= QUEUE_MAX_ATTEMPTS else "pending"
+    job.updated_at = timezone.now()
+
+
+def release_jobs():
+    # Jobs left "processing" by a worker that was stopped are retried (saving is an upsert)
+    return AttendanceJob.objects.filter(status="processing").update(status="pending")
+
+
+def job_status(job):
+    return {"id": job.id, "status": job.status, "attendance_id": job.attendance_id, "error": job.error}
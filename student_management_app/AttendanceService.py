@@ -0,0 +1,293 @@
+import datetime
+import json
+
+from django.db import OperationalError, transaction
+from django.utils import timezone
+
+from student_management_app import AttendanceHistory, AttendanceStorage, DashboardCounters
+from student_management_app.models import Subjects, SessionYearModel, Students, Attendance, AttendanceReport
+
+
+# Writes of Attendance registers. Every register is written in one transaction
+# with a fixed number of queries, whatever the number of Students in it.
+
+
+def resolve_students(user_ids, students=None):
+    # Returns {admin_id: student_id} of the given Student users in one query
+    # (or checks them against an already resolved students map)
+    if students is None:
+        students = dict(Students.objects.filter(admin__in=user_ids).values_list('admin_id', 'id'))
+    missing = set(int(user_id) for user_id in user_ids) - set(students)
+    if missing:
+        raise Students.DoesNotExist("Unknown Students: %s" % sorted(missing))
+    return students
+
+
+def save_attendance(subject_id, session_year_id, attendance_date, statuses, students=None, editor_id=None):
+    # statuses: [{"id": <Student user id>, "status": 1/0}, ...] as posted by the Take Attendance page
+    # Saving a register that already exists only writes the Students that are new or changed,
+    # so a double-click or a retry does not duplicate anything
+    students = resolve_students([stud['id'] for stud in statuses], students)
+
+    with transaction.atomic():
+        # First Attendance Data is Saved on Attendance Model
+        attendance, created = Attendance.objects.get_or_create(
+            subject_id_id=subject_id, session_year_id_id=session_year_id, attendance_date=attendance_date,
+            defaults={"storage_mode": AttendanceStorage.default_storage_mode()},
+        )
+        saved = {} if created else AttendanceStorage.read_register(attendance)
+
+        added = {}
+        changed = {}
+        for stud in statuses:
+            student_id = students[int(stud['id'])]
+            status = DashboardCounters.as_status(stud['status'])
+            if student_id not in saved:
+                added[student_id] = status
+            elif saved[student_id] != status:
+                changed[student_id] = status
+            else:
+                changed.pop(student_id, None)
+
+        if attendance.storage_mode == AttendanceStorage.ROWS:
+            # Attendance of every new Student saved on AttendanceReport Model at once
+            AttendanceReport.objects.bulk_create([
+                AttendanceReport(student_id_id=student_id, attendance_id=attendance, status=status)
+                for student_id, status in added.items()
+            ])
+            apply_changes(attendance, changed)
+        elif created or added or changed:
+            AttendanceStorage.write_register(attendance, {**saved, **added, **changed})
+
+        # Keep the Dashboard Counters and the change log in sync
+        if created or added or changed:
+            DashboardCounters.record_attendance(attendance, added=added.items(), changed=changed.items(), new_attendance=created)
+            AttendanceHistory.record_change(attendance, editor_id, added=added.items(), changed=changed.items())
+    return attendance
+
+
+def update_attendance(attendance, statuses, editor_id=None):
+    # Applies only the statuses that differ from the saved ones, returns how many changed
+    with transaction.atomic():
+        if attendance.storage_mode == AttendanceStorage.ROWS:
+            reports = AttendanceReport.objects.filter(attendance_id=attendance).values_list('student_id__admin_id', 'student_id', 'status')
+            students = {admin_id: student_id for admin_id, student_id, status in reports}
+            saved = {student_id: status for admin_id, student_id, status in reports}
+        else:
+            saved = AttendanceStorage.read_register(attendance)
+            students = dict(Students.objects.filter(id__in=saved).values_list('admin_id', 'id'))
+
+        changed = {}
+        for stud in statuses:
+            if int(stud['id']) not in students:
+                raise AttendanceReport.DoesNotExist("No AttendanceReport of Student %s" % stud['id'])
+            student_id = students[int(stud['id'])]
+            new_status = DashboardCounters.as_status(stud['status'])
+            if saved[student_id] != new_status:
+                changed[student_id] = new_status
+            else:
+                changed.pop(student_id, None)
+        if not changed:
+            return 0
+
+        if attendance.storage_mode == AttendanceStorage.ROWS:
+            apply_changes(attendance, changed)
+        else:
+            AttendanceStorage.write_register(attendance, {**saved, **changed})
+
+        # Keep the Dashboard Counters and the change log in sync
+        DashboardCounters.record_attendance(attendance, changed=changed.items())
+        AttendanceHistory.record_change(attendance, editor_id, changed=changed.items())
+    return len(changed)
+
+
+def apply_changes(attendance, changed):
+    # changed: {student_id: new status}, written with one UPDATE per status value
+    for status in (True, False):
+        student_ids = [student_id for student_id, new_status in changed.items() if new_status == status]
+        if student_ids:
+            AttendanceReport.objects.filter(attendance_id=attendance, student_id__in=student_ids).update(status=status, updated_at=timezone.now())
+
+
+# Batches of registers, one JSON object per line (NDJSON):
+#   {"subject_id": 1, "attendance_date": "2025-03-10", "session_year_id": 1,
+#    "student_ids": [{"id": <Student user id>, "status": 1}, ...]}
+# Registers are saved a chunk at a time, each chunk in one transaction and
+# each register in its own savepoint, so a bad register does not undo the others.
+
+BATCH_CHUNK_SIZE = 50
+
+
+def save_attendance_batch(lines, staff_user_id=None, chunk_size=BATCH_CHUNK_SIZE):
+    # Returns one result per register: {"line": n, "status": "OK", "attendance_id": id}
+    # or {"line": n, "status": "Error", "error": "..."}
+    results = []
+    chunk = []
+    for line_number, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        chunk.append((line_number, line))
+        if len(chunk) == chunk_size:
+            results += save_attendance_chunk(chunk, staff_user_id)
+            chunk = []
+    if chunk:
+        results += save_attendance_chunk(chunk, staff_user_id)
+    return results
+
+
+def parse_register(line):
+    # (subject_id, attendance_date, session_year_id, statuses) of one NDJSON line, with the ids
+    # as ints, so a malformed register is reported on its own line before the chunk is loaded
+    register = json.loads(line)
+    statuses = []
+    for stud in register['student_ids']:
+        if not isinstance(stud, dict):
+            raise TypeError("Student entries must be objects with id and status, got %r" % (stud,))
+        statuses.append({"id": int(stud['id']), "status": stud['status']})
+    return int(register['subject_id']), register['attendance_date'], int(register['session_year_id']), statuses
+
+
+def save_attendance_chunk(chunk, staff_user_id, editor_id=None):
+    # editor_id (default: staff_user_id) is recorded in the change log of the registers
+    results = {}
+    registers = []
+    for line_number, line in chunk:
+        try:
+            registers.append((line_number,) + parse_register(line))
+        except (ValueError, KeyError, TypeError) as error:
+            results[line_number] = {"line": line_number, "status": "Error", "error": "Invalid register: %s" % error}
+
+    # Subjects, Session Years and Students of the whole chunk are loaded once
+    subjects = Subjects.objects.filter(id__in=[register[1] for register in registers])
+    if staff_user_id is not None:
+        subjects = subjects.filter(staff_id=staff_user_id)
+    subject_ids = set(subjects.values_list('id', flat=True))
+    session_year_ids = set(SessionYearModel.objects.filter(id__in=[register[3] for register in registers]).values_list('id', flat=True))
+    user_ids = [stud['id'] for register in registers for stud in register[4]]
+    students = dict(Students.objects.filter(admin__in=user_ids).values_list('admin_id', 'id'))
+
+    with transaction.atomic():
+        for line_number, subject_id, attendance_date, session_year_id, statuses in registers:
+            try:
+                if subject_id not in subject_ids:
+                    raise Subjects.DoesNotExist("Unknown Subject: %s" % subject_id)
+                if session_year_id not in session_year_ids:
+                    raise SessionYearModel.DoesNotExist("Unknown Session Year: %s" % session_year_id)
+                attendance = save_attendance(subject_id, session_year_id, attendance_date, statuses, students, editor_id or staff_user_id)
+                results[line_number] = {"line": line_number, "status": "OK", "attendance_id": attendance.id}
+            except Exception as error:
+                results[line_number] = {"line": line_number, "status": "Error", "error": str(error)}
+                # e.g. "database is locked": the same register may be saved if sent again
+                if isinstance(error, OperationalError):
+                    results[line_number]["retry"] = True
+    return [results[line_number] for line_number in sorted(results)]
+
+
+# Bulk import of Attendance history (see "python manage.py import_attendance").
+# Rows are read one at a time and written a chunk at a time with bulk_create,
+# so memory is bounded by the chunk size and the Student / Subject maps.
+# Rows already imported are skipped, so an interrupted import can be run again.
+
+STATUS_VALUES = {
+    "1": True, "p": True, "present": True, "true": True, "yes": True,
+    "0": False, "a": False, "absent": False, "false": False, "no": False,
+}
+
+
+class ImportStats:
+    def __init__(self):
+        self.rows = 0
+        self.registers = 0
+        self.reports = 0
+        self.skipped = 0
+        self.errors = []
+
+
+def import_attendance(rows, chunk_size=5000, date_format="%Y-%m-%d", progress=None):
+    # rows: dicts with "student" (username), "subject" (id or name), "session_year" (id),
+    # "attendance_date" and "status"; returns an ImportStats
+    students = dict(Students.objects.values_list('admin__username', 'id'))
+    subjects = {}
+    for subject_id, subject_name in Subjects.objects.values_list('id', 'subject_name'):
+        subjects[str(subject_id)] = subject_id
+        subjects.setdefault(subject_name, subject_id)
+    session_years = set(SessionYearModel.objects.values_list('id', flat=True))
+
+    stats = ImportStats()
+    chunk = {}
+    for line_number, row in enumerate(rows, 2):
+        stats.rows += 1
+        try:
+            register = (
+                subjects[row['subject'].strip()],
+                int(row['session_year']),
+                datetime.datetime.strptime(row['attendance_date'].strip(), date_format).date(),
+            )
+            if register[1] not in session_years:
+                raise KeyError(row['session_year'])
+            chunk[(register, students[row['student'].strip()])] = STATUS_VALUES[row['status'].strip().lower()]
+        except (KeyError, ValueError, AttributeError) as error:
+            stats.errors.append((line_number, "Invalid value %s" % error))
+            continue
+
+        if len(chunk) >= chunk_size:
+            import_attendance_chunk(chunk, stats)
+            chunk = {}
+            if progress:
+                progress(stats)
+    if chunk:
+        import_attendance_chunk(chunk, stats)
+        if progress:
+            progress(stats)
+    return stats
+
+
+def import_attendance_chunk(chunk, stats):
+    # chunk: {((subject_id, session_year_id, date), student_id): status}
+    registers = set(register for register, student_id in chunk)
+
+    with transaction.atomic():
+        attendance_ids = existing_registers(registers)
+        Attendance.objects.bulk_create([
+            Attendance(subject_id_id=subject_id, session_year_id_id=session_year_id, attendance_date=attendance_date)
+            for subject_id, session_year_id, attendance_date in registers - set(attendance_ids)
+        ])
+        stats.registers += len(registers) - len(attendance_ids)
+        # bulk_create does not return the ids on every database
+        attendance_ids = existing_registers(registers)
+
+        saved = set(AttendanceReport.objects.filter(attendance_id__in=attendance_ids.values()).values_list('attendance_id', 'student_id'))
+        # Imported registers are stored as rows, the ones already in compact storage are merged one by one
+        compact = {attendance.id: attendance for attendance in Attendance.objects.filter(id__in=attendance_ids.values()).exclude(storage_mode=AttendanceStorage.ROWS)}
+        compact_statuses = {}
+        reports = []
+        for (register, student_id), status in chunk.items():
+            attendance_id = attendance_ids[register]
+            if attendance_id in compact:
+                compact_statuses.setdefault(attendance_id, {})[student_id] = status
+            elif (attendance_id, student_id) in saved:
+                stats.skipped += 1
+            else:
+                reports.append(AttendanceReport(attendance_id_id=attendance_id, student_id_id=student_id, status=status))
+        AttendanceReport.objects.bulk_create(reports)
+        stats.reports += len(reports)
+
+        for attendance_id, statuses in compact_statuses.items():
+            saved_statuses = AttendanceStorage.read_register(compact[attendance_id])
+            added = {student_id: status for student_id, status in statuses.items() if student_id not in saved_statuses}
+            stats.skipped += len(statuses) - len(added)
+            if added:
+                AttendanceStorage.write_register(compact[attendance_id], {**saved_statuses, **added})
+                stats.reports += len(added)
+
+
+def existing_registers(registers):
+    # Returns {(subject_id, session_year_id, date): attendance_id} of the registers already saved
+    rows = Attendance.objects.filter(
+        subject_id__in=set(register[0] for register in registers),
+        session_year_id__in=set(register[1] for register in registers),
+        attendance_date__in=set(register[2] for register in registers),
+    ).values_list('subject_id', 'session_year_id', 'attendance_date', 'id')
+    return {(subject_id, session_year_id, attendance_date): attendance_id
+            for subject_id, session_year_id, attendance_date, attendance_id in rows
+            if (subject_id, session_year_id, attendance_date) in registers}
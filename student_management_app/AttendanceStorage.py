@@ -0,0 +1,224 @@
+import hashlib
+
+from django.conf import settings
+
+from student_management_app.models import Students, Attendance, AttendanceReport, AttendanceRoster, MonthlyAttendanceRollup
+
+
+# The Statuses of an Attendance register are stored in one of three ways:
+#
+#   "rows"       - one AttendanceReport row per Student (the original layout);
+#   "packed"     - in the Attendance row itself: the ordered Student ids of the
+#                  register (an AttendanceRoster, shared by the registers with
+#                  the same Students) and one bit per Student in status_bits;
+#   "exceptions" - the AttendanceRoster and only the ids of the Absent Students
+#                  in absent_student_ids, every other Student is Present.
+#
+# New registers use settings.ATTENDANCE_STORAGE_MODE. Everything that reads or
+# writes Statuses goes through this module, which handles both layouts.
+# Per-Student queries of compact registers are served by the day masks of the
+# Monthly Rollups instead of decoding every register.
+
+ROWS = "rows"
+PACKED = "packed"
+EXCEPTIONS = "exceptions"
+STORAGE_MODES = (ROWS, PACKED, EXCEPTIONS)
+
+
+def default_storage_mode():
+    return getattr(settings, "ATTENDANCE_STORAGE_MODE", ROWS)
+
+
+def get_roster(student_ids):
+    # Shared AttendanceRoster of these Students (ordered by id)
+    student_ids = join_student_ids(student_ids)
+    checksum = hashlib.sha256(student_ids.encode()).hexdigest()
+    roster, created = AttendanceRoster.objects.get_or_create(checksum=checksum, defaults={"student_ids": student_ids})
+    return roster
+
+
+def roster_student_ids(roster_text):
+    return [int(student_id) for student_id in roster_text.split(",")] if roster_text else []
+
+
+def join_student_ids(student_ids):
+    return ",".join(str(student_id) for student_id in sorted(student_ids))
+
+
+def pack_statuses(statuses):
+    # [True, False, ...] -> bytes, bit i % 8 of byte i // 8 is the i-th Status
+    packed = bytearray((len(statuses) + 7) // 8)
+    for index, status in enumerate(statuses):
+        if status:
+            packed[index // 8] |= 1 << (index % 8)
+    return bytes(packed)
+
+
+def unpack_statuses(packed, count):
+    packed = bytes(packed or b"")
+    return [bool(packed[index // 8] & (1 << (index % 8))) for index in range(count)]
+
+
+def decode_register(storage_mode, roster_text, status_bits, absent_student_ids):
+    student_ids = roster_student_ids(roster_text)
+    if storage_mode == EXCEPTIONS:
+        absent = set(roster_student_ids(absent_student_ids))
+        return {student_id: student_id not in absent for student_id in student_ids}
+    return dict(zip(student_ids, unpack_statuses(status_bits, len(student_ids))))
+
+
+def read_register(attendance):
+    # Returns {student_id: status} of the register
+    if attendance.storage_mode == ROWS:
+        return dict(AttendanceReport.objects.filter(attendance_id=attendance).values_list('student_id', 'status'))
+    roster_text = AttendanceRoster.objects.filter(id=attendance.roster_id).values_list('student_ids', flat=True).first()
+    return decode_register(attendance.storage_mode, roster_text, attendance.status_bits, attendance.absent_student_ids)
+
+
+def register_rows(attendance):
+    # [(<Student user id>, name, status)] of the register, ordered by Student, read from
+    # flat tuples: one joined query for rows registers, two for compact ones
+    if attendance.storage_mode == ROWS:
+        rows = AttendanceReport.objects.filter(attendance_id=attendance).order_by('student_id').values_list(
+            'student_id__admin_id', 'student_id__admin__first_name', 'student_id__admin__last_name', 'status'
+        )
+    else:
+        statuses = read_register(attendance)
+        students = Students.objects.filter(id__in=statuses).order_by('id').values_list('id', 'admin_id', 'admin__first_name', 'admin__last_name')
+        rows = ((admin_id, first_name, last_name, statuses[student_id]) for student_id, admin_id, first_name, last_name in students)
+    return [(admin_id, first_name + " " + last_name, status) for admin_id, first_name, last_name, status in rows]
+
+
+def write_register(attendance, statuses):
+    # Replaces every Status of a packed or exceptions register with statuses ({student_id: status})
+    student_ids = sorted(statuses)
+    attendance.roster = get_roster(student_ids)
+    if attendance.storage_mode == EXCEPTIONS:
+        attendance.status_bits = None
+        attendance.absent_student_ids = join_student_ids(student_id for student_id in student_ids if not statuses[student_id])
+    else:
+        attendance.status_bits = pack_statuses([statuses[student_id] for student_id in student_ids])
+        attendance.absent_student_ids = None
+    attendance.save(update_fields=['storage_mode', 'roster', 'status_bits', 'absent_student_ids', 'updated_at'])
+
+
+def read_registers(attendances):
+    # Yields (subject_id, session_year_id, attendance_date, student_id, status) of every
+    # Status of the given Attendance queryset, whatever the storage of each register
+    rows = AttendanceReport.objects.filter(attendance_id__in=attendances.filter(storage_mode=ROWS)).values_list(
+        'attendance_id__subject_id', 'attendance_id__session_year_id', 'attendance_id__attendance_date', 'student_id', 'status'
+    )
+    yield from rows.iterator()
+
+    compact = attendances.exclude(storage_mode=ROWS).values_list(
+        'subject_id', 'session_year_id', 'attendance_date', 'storage_mode', 'roster__student_ids', 'status_bits', 'absent_student_ids'
+    )
+    for subject_id, session_year_id, attendance_date, *register in compact.iterator():
+        for student_id, status in decode_register(*register).items():
+            yield subject_id, session_year_id, attendance_date, student_id, status
+
+
+def convert_register(attendance, storage_mode):
+    # Moves the Statuses of a register to the other storage (counters are not affected)
+    if attendance.storage_mode == storage_mode:
+        return
+    statuses = read_register(attendance)
+    if storage_mode == ROWS:
+        AttendanceReport.objects.bulk_create([
+            AttendanceReport(attendance_id=attendance, student_id_id=student_id, status=status)
+            for student_id, status in statuses.items()
+        ])
+        attendance.roster = None
+        attendance.status_bits = None
+        attendance.absent_student_ids = None
+        attendance.storage_mode = storage_mode
+        attendance.save(update_fields=['storage_mode', 'roster', 'status_bits', 'absent_student_ids', 'updated_at'])
+    else:
+        AttendanceReport.objects.filter(attendance_id=attendance).delete()
+        attendance.storage_mode = storage_mode
+        write_register(attendance, statuses)
+
+
+def student_attendance_rows(student_id, subject_id, start_date, end_date):
+    # (attendance_date, session_year_id, status) of a Student's AttendanceReport rows, by date:
+    # one join of AttendanceReport and Attendance, both sides filtered through an index
+    return AttendanceReport.objects.filter(
+        student_id=student_id,
+        attendance_id__subject_id=subject_id,
+        attendance_id__attendance_date__range=(start_date, end_date),
+        attendance_id__storage_mode=ROWS,
+    ).order_by('attendance_id__attendance_date').values_list('attendance_id__attendance_date', 'attendance_id__session_year_id', 'status')
+
+
+def student_attendance(student_id, subject_id, start_date, end_date):
+    # Returns [{"attendance_date": date, "status": bool}] of a Student in a Subject, by date.
+    # Registers are told apart by Session Year, there may be one per Session Year on a date
+    statuses = {
+        (attendance_date, session_year_id): status
+        for attendance_date, session_year_id, status in student_attendance_rows(student_id, subject_id, start_date, end_date)
+    }
+
+    # Compact registers: the days the Student has a Status in the Rollup day masks
+    # of the same Session Year and month
+    compact_dates = set(Attendance.objects.filter(
+        subject_id=subject_id, attendance_date__range=(start_date, end_date)
+    ).exclude(storage_mode=ROWS).values_list('attendance_date', 'session_year_id'))
+    if compact_dates:
+        rollups = MonthlyAttendanceRollup.objects.filter(
+            student_id=student_id, subject_id=subject_id, month__range=(start_date.replace(day=1), end_date),
+            session_year_id__in=set(session_year_id for attendance_date, session_year_id in compact_dates),
+        ).values_list('session_year_id', 'month', 'present_days', 'absent_days')
+        days = {(session_year_id, month): (present_days, absent_days) for session_year_id, month, present_days, absent_days in rollups}
+        for attendance_date, session_year_id in compact_dates:
+            present_days, absent_days = days.get((session_year_id, attendance_date.replace(day=1)), (0, 0))
+            day = 1 << (attendance_date.day - 1)
+            if present_days & day:
+                statuses[(attendance_date, session_year_id)] = True
+            elif absent_days & day:
+                statuses[(attendance_date, session_year_id)] = False
+
+    return [{"attendance_date": attendance_date, "status": statuses[(attendance_date, session_year_id)]} for attendance_date, session_year_id in sorted(statuses)]
+
+
+def range_days(month, start_date, end_date):
+    # Day mask of the days of the month within start_date..end_date
+    first = start_date.day if month == start_date.replace(day=1) else 1
+    last = end_date.day if month == end_date.replace(day=1) else 31
+    return ((1 << last) - 1) & ~((1 << (first - 1)) - 1)
+
+
+def count_days(days):
+    return bin(days).count("1")
+
+
+def student_monthly_summary(student_id, subject_id, start_date, end_date):
+    # Returns [{"month": date, "present": n, "absent": n}] of a Student in a Subject, by month.
+    # Only the days within the range are counted, also in a partial first or last month
+    rollups = MonthlyAttendanceRollup.objects.filter(
+        student_id=student_id, subject_id=subject_id, month__range=(start_date.replace(day=1), end_date)
+    ).values_list('month', 'present_days', 'absent_days')
+    totals = {}
+    for month, present_days, absent_days in rollups:
+        days = range_days(month, start_date, end_date)
+        present, absent = totals.get(month, (0, 0))
+        totals[month] = (present + count_days(present_days & days), absent + count_days(absent_days & days))
+    return [{"month": month, "present": present, "absent": absent} for month, (present, absent) in sorted(totals.items()) if present or absent]
+
+
+def student_calendar(student_id, start_month, end_month):
+    # Returns ({subject_id: subject_name}, [(date, subject_id, session_year_id, status)] by date) of
+    # a Student across every Subject, read from the Rollup day masks in one query whatever the range.
+    # Each Session Year has its own Rollups, so two registers on the same day stay apart
+    rollups = MonthlyAttendanceRollup.objects.filter(student_id=student_id, month__range=(start_month, end_month)).order_by('month', 'subject_id').values_list(
+        'month', 'subject_id', 'subject_id__subject_name', 'session_year_id', 'present_days', 'absent_days'
+    )
+    subjects = {}
+    days = []
+    for month, subject_id, subject_name, session_year_id, present_days, absent_days in rollups:
+        subjects[subject_id] = subject_name
+        for day in range(31):
+            bit = 1 << day
+            if (present_days | absent_days) & bit:
+                days.append((month.replace(day=day + 1), subject_id, session_year_id, bool(present_days & bit)))
+    days.sort(key=lambda entry: entry[:3])
+    return subjects, days
@@ -0,0 +1,85 @@
+import time
+
+from django.conf import settings
+from django.core.cache import cache, caches, DEFAULT_CACHE_ALIAS
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import connection, transaction
+
+
+# Dashboard contexts are cached together with the versions of the data they were
+# built from. Every write bumps the version of the entity it touches, so a cached
+# context is only served while nothing it depends on has changed.
+#
+# The version is bumped right away AND again once the transaction commits: a
+# context built while the write was still uncommitted is stored under the first
+# bump and is discarded by the second one.
+#
+# The versions are only seen by the processes sharing the cache: with LocMemCache,
+# writes made by a management command never reach the server processes.
+
+ENTITIES = ("attendance", "students", "sessions", "subjects", "courses", "staffs", "users", "leave", "result")
+VERSION_KEY = "dashboard:version:%s"
+CONTEXT_KEY = "dashboard:context:%s"
+
+
+def cache_timeout():
+    return getattr(settings, "DASHBOARD_CACHE_TIMEOUT", 300)
+
+
+def cache_is_shared():
+    # False when every process has its own cache (LocMemCache)
+    return not isinstance(caches[DEFAULT_CACHE_ALIAS], LocMemCache)
+
+
+def stale_dashboards_warning():
+    # Warning shown by the management commands that write Dashboard data, None if the cache is shared
+    if cache_is_shared():
+        return None
+    return (
+        "The cache backend is LocMemCache, which each process keeps for itself: running server "
+        "processes may keep serving Dashboards built before this command for up to %s seconds. "
+        "Restart them, or configure a cache shared by every process (see CACHES in settings.py)." % cache_timeout()
+    )
+
+
+def initial_version():
+    # If a version key is evicted it restarts from the clock, never from an old value
+    return time.time_ns() // 1000
+
+
+def bump(*entities):
+    for entity in entities:
+        incr_version(entity)
+        transaction.on_commit(lambda entity=entity: incr_version(entity))
+
+
+def incr_version(entity):
+    key = VERSION_KEY % entity
+    try:
+        cache.incr(key)
+    except ValueError:
+        # Key missing (first use or evicted)
+        cache.add(key, initial_version(), None)
+
+
+def cached_context(name, build):
+    # Versions and the cached context are fetched with one cache read
+    version_keys = [VERSION_KEY % entity for entity in ENTITIES]
+    context_key = CONTEXT_KEY % name
+    values = cache.get_many(version_keys + [context_key])
+
+    versions = tuple(values.get(key) for key in version_keys)
+    if None in versions:
+        for key in version_keys:
+            cache.add(key, initial_version(), None)
+        versions = tuple(cache.get_many(version_keys).get(key) for key in version_keys)
+
+    entry = values.get(context_key)
+    if entry is not None and entry[0] == versions:
+        return entry[1]
+
+    context = build()
+    # A context built inside a transaction may include writes that are later rolled back
+    if not connection.in_atomic_block:
+        cache.set(context_key, (versions, context), cache_timeout())
+    return context
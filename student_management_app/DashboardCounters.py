@@ -0,0 +1,262 @@
+from django.db import transaction
+from django.db.models import Count, F, IntegerField, Q, Sum, Value
+from django.db.models.functions import ExtractDay, TruncMonth
+from django.utils import timezone
+
+from student_management_app import AttendanceStorage, DashboardCache, SessionYearScope
+from student_management_app.models import Subjects, Attendance, AttendanceReport, LeaveReportStudent, LeaveReportStaff, StudentAttendanceCounter, SubjectAttendanceCounter, StudentLeaveCounter, StaffLeaveCounter, MonthlyAttendanceRollup
+
+
+# Dashboards read these Counter tables instead of scanning the whole
+# AttendanceReport / LeaveReport history. Every code path that writes
+# attendance or changes a leave status must report the change here.
+
+
+def as_status(value):
+    # Same conversion the BooleanField does when the value is saved ("0", 1, True...)
+    return AttendanceReport._meta.get_field('status').to_python(value)
+
+
+# Every day of a month set in a Rollup day mask
+ALL_DAYS = (1 << 31) - 1
+
+
+def attendance_day(attendance):
+    # Date of the Attendance (attendance_date may still be the posted string)
+    return Attendance._meta.get_field('attendance_date').to_python(attendance.attendance_date)
+
+
+def attendance_month(attendance):
+    # First day of the month of the Attendance
+    return attendance_day(attendance).replace(day=1)
+
+
+def day_mask(field, delta, day):
+    # Sets (delta > 0) or clears (delta < 0) the bit of the day in a Rollup day mask
+    bit = 1 << (day - 1)
+    if delta > 0:
+        return F(field).bitor(bit)
+    if delta < 0:
+        return F(field).bitand(ALL_DAYS ^ bit)
+    return F(field)
+
+
+def record_attendance(attendance, added=(), changed=(), new_attendance=False):
+    # added:   (student_id, status) of newly created AttendanceReport rows
+    # changed: (student_id, status) of existing rows whose status was flipped to "status"
+    deltas = {}
+    for student_id, status in added:
+        deltas[student_id] = (1, 0) if as_status(status) else (0, 1)
+    for student_id, status in changed:
+        deltas[student_id] = (1, -1) if as_status(status) else (-1, 1)
+
+    session_year_id = attendance.session_year_id_id
+    now = timezone.now()
+
+    # Students sharing the same delta are updated with a single UPDATE
+    students_by_delta = {}
+    for student_id, delta in deltas.items():
+        students_by_delta.setdefault(delta, []).append(student_id)
+
+    if deltas:
+        StudentAttendanceCounter.objects.bulk_create(
+            [StudentAttendanceCounter(student_id_id=student_id, session_year_id_id=session_year_id) for student_id in deltas],
+            ignore_conflicts=True,
+        )
+    for (present, absent), student_ids in students_by_delta.items():
+        StudentAttendanceCounter.objects.filter(student_id__in=student_ids, session_year_id=session_year_id).update(
+            present_count=F('present_count') + present,
+            absent_count=F('absent_count') + absent,
+            updated_at=now,
+        )
+
+    # Monthly Rollups of the Subject, same pattern as the Student Counters
+    day = attendance_day(attendance).day
+    rollup_key = {"subject_id_id": attendance.subject_id_id, "session_year_id_id": session_year_id, "month": attendance_month(attendance)}
+    if deltas:
+        MonthlyAttendanceRollup.objects.bulk_create(
+            [MonthlyAttendanceRollup(student_id_id=student_id, **rollup_key) for student_id in deltas],
+            ignore_conflicts=True,
+        )
+    for (present, absent), student_ids in students_by_delta.items():
+        MonthlyAttendanceRollup.objects.filter(student_id__in=student_ids, **rollup_key).update(
+            present_count=F('present_count') + present,
+            absent_count=F('absent_count') + absent,
+            present_days=day_mask('present_days', present, day),
+            absent_days=day_mask('absent_days', absent, day),
+            updated_at=now,
+        )
+
+    if deltas or new_attendance:
+        SubjectAttendanceCounter.objects.get_or_create(subject_id_id=attendance.subject_id_id, session_year_id_id=session_year_id)
+        SubjectAttendanceCounter.objects.filter(subject_id=attendance.subject_id_id, session_year_id=session_year_id).update(
+            attendance_count=F('attendance_count') + (1 if new_attendance else 0),
+            present_count=F('present_count') + sum(delta[0] for delta in deltas.values()),
+            absent_count=F('absent_count') + sum(delta[1] for delta in deltas.values()),
+            updated_at=now,
+        )
+
+    # Bumped after the writes, so a Dashboard built in between is not kept
+    DashboardCache.bump("attendance")
+
+
+def record_leave_status(leave, old_status):
+    # Only Approved (1) leaves are counted
+    delta = int(leave.leave_status == 1) - int(old_status == 1)
+    if delta == 0:
+        return
+
+    if isinstance(leave, LeaveReportStudent):
+        counter_model, owner = StudentLeaveCounter, {"student_id_id": leave.student_id_id}
+    else:
+        counter_model, owner = StaffLeaveCounter, {"staff_id_id": leave.staff_id_id}
+    owner["session_year_id_id"] = SessionYearScope.session_year_for_date(leave.leave_date)
+
+    # Inserted unless it exists, also for a NULL Session Year (see the constraints of the models)
+    counter_model.objects.bulk_create([counter_model(**owner)], ignore_conflicts=True)
+    counter_model.objects.filter(**owner).update(approved_count=F('approved_count') + delta, updated_at=timezone.now())
+    DashboardCache.bump("leave")
+
+
+def rebuild_counters(batch_size=1000):
+    # Recomputes every Counter from the raw Attendance and Leave tables
+    with transaction.atomic():
+        StudentAttendanceCounter.objects.all().delete()
+        SubjectAttendanceCounter.objects.all().delete()
+
+        # Registers stored as AttendanceReport rows are counted in SQL
+        student_counters = {}
+        student_rows = AttendanceReport.objects.order_by().values_list('student_id', 'attendance_id__session_year_id').annotate(
+            present=Count('id', filter=Q(status=True)),
+            absent=Count('id', filter=Q(status=False)),
+        )
+        for student_id, session_year_id, present, absent in student_rows.iterator():
+            student_counters[(student_id, session_year_id)] = StudentAttendanceCounter(
+                student_id_id=student_id, session_year_id_id=session_year_id, present_count=present, absent_count=absent
+            )
+
+        subject_counters = {}
+        attendance_rows = Attendance.objects.order_by().values_list('subject_id', 'session_year_id').annotate(total=Count('id'))
+        for subject_id, session_year_id, total in attendance_rows:
+            subject_counters[(subject_id, session_year_id)] = SubjectAttendanceCounter(
+                subject_id_id=subject_id, session_year_id_id=session_year_id, attendance_count=total
+            )
+        report_rows = AttendanceReport.objects.order_by().values_list('attendance_id__subject_id', 'attendance_id__session_year_id').annotate(
+            present=Count('id', filter=Q(status=True)),
+            absent=Count('id', filter=Q(status=False)),
+        )
+        for subject_id, session_year_id, present, absent in report_rows:
+            counter = subject_counters[(subject_id, session_year_id)]
+            counter.present_count = present
+            counter.absent_count = absent
+
+        # Registers in compact storage are decoded here
+        compact = Attendance.objects.exclude(storage_mode=AttendanceStorage.ROWS)
+        for subject_id, session_year_id, attendance_date, student_id, status in AttendanceStorage.read_registers(compact):
+            counter = student_counters.setdefault(
+                (student_id, session_year_id), StudentAttendanceCounter(student_id_id=student_id, session_year_id_id=session_year_id)
+            )
+            for counter in (counter, subject_counters[(subject_id, session_year_id)]):
+                if status:
+                    counter.present_count += 1
+                else:
+                    counter.absent_count += 1
+
+        StudentAttendanceCounter.objects.bulk_create(student_counters.values(), batch_size=batch_size)
+        SubjectAttendanceCounter.objects.bulk_create(subject_counters.values(), batch_size=batch_size)
+
+        rebuild_leave_counters(batch_size)
+        DashboardCache.bump("attendance")
+
+
+def rebuild_leave_counters(batch_size=1000):
+    # Recomputes the Leave Counters, also run when a Session Year is added, moved or
+    # deleted since the leaves are counted in the Session Year their leave_date falls in
+    with transaction.atomic():
+        StudentLeaveCounter.objects.all().delete()
+        StaffLeaveCounter.objects.all().delete()
+
+        # leave_date is a text field, so the dates are mapped here rather than in SQL
+        session_years = SessionYearScope.session_years_by_date()
+        StudentLeaveCounter.objects.bulk_create(
+            leave_counters(StudentLeaveCounter, 'student_id_id', LeaveReportStudent.objects.filter(leave_status=1).values_list('student_id', 'leave_date'), session_years),
+            batch_size=batch_size,
+        )
+        StaffLeaveCounter.objects.bulk_create(
+            leave_counters(StaffLeaveCounter, 'staff_id_id', LeaveReportStaff.objects.filter(leave_status=1).values_list('staff_id', 'leave_date'), session_years),
+            batch_size=batch_size,
+        )
+        DashboardCache.bump("leave")
+
+
+def leave_counters(counter_model, owner_field, leaves, session_years):
+    totals = {}
+    for owner_id, leave_date in leaves.order_by().iterator():
+        key = (owner_id, SessionYearScope.find_session_year(leave_date, session_years))
+        totals[key] = totals.get(key, 0) + 1
+    return [
+        counter_model(**{owner_field: owner_id, "session_year_id_id": session_year_id, "approved_count": total})
+        for (owner_id, session_year_id), total in totals.items()
+    ]
+
+
+def rebuild_rollups(chunk_size=50, progress=None):
+    # Recomputes the Monthly Rollups a chunk of Subjects at a time, so neither the
+    # transaction nor the memory used grows with the size of the Attendance history.
+    # Chunks are Subjects (not Students) so each compact register is decoded once
+    subject_ids = list(Subjects.objects.order_by('id').values_list('id', flat=True))
+    for start in range(0, len(subject_ids), chunk_size):
+        chunk = subject_ids[start:start + chunk_size]
+        with transaction.atomic():
+            MonthlyAttendanceRollup.objects.filter(subject_id__in=chunk).delete()
+
+            # Registers stored as AttendanceReport rows are grouped in SQL. A Student has at
+            # most one Status per day and Subject, so the sum of the day bits is their mask
+            day_bit = Value(1).bitleftshift(ExtractDay('attendance_id__attendance_date') - 1)
+            rows = AttendanceReport.objects.filter(attendance_id__subject_id__in=chunk).order_by().values_list(
+                'student_id', 'attendance_id__subject_id', 'attendance_id__session_year_id', TruncMonth('attendance_id__attendance_date'),
+            ).annotate(
+                present=Count('id', filter=Q(status=True)),
+                absent=Count('id', filter=Q(status=False)),
+                present_days=Sum(day_bit, filter=Q(status=True), output_field=IntegerField()),
+                absent_days=Sum(day_bit, filter=Q(status=False), output_field=IntegerField()),
+            )
+            rollups = {}
+            for student_id, subject_id, session_year_id, month, present, absent, present_days, absent_days in rows.iterator():
+                rollups[(student_id, subject_id, session_year_id, month)] = MonthlyAttendanceRollup(
+                    student_id_id=student_id, subject_id_id=subject_id, session_year_id_id=session_year_id, month=month,
+                    present_count=present, absent_count=absent, present_days=present_days or 0, absent_days=absent_days or 0,
+                )
+
+            # Registers in compact storage are decoded here
+            compact = Attendance.objects.filter(subject_id__in=chunk).exclude(storage_mode=AttendanceStorage.ROWS)
+            for subject_id, session_year_id, attendance_date, student_id, status in AttendanceStorage.read_registers(compact):
+                month = attendance_date.replace(day=1)
+                rollup = rollups.get((student_id, subject_id, session_year_id, month))
+                if rollup is None:
+                    rollup = rollups[(student_id, subject_id, session_year_id, month)] = MonthlyAttendanceRollup(
+                        student_id_id=student_id, subject_id_id=subject_id, session_year_id_id=session_year_id, month=month
+                    )
+                bit = 1 << (attendance_date.day - 1)
+                if status:
+                    rollup.present_count += 1
+                    rollup.present_days |= bit
+                else:
+                    rollup.absent_count += 1
+                    rollup.absent_days |= bit
+            MonthlyAttendanceRollup.objects.bulk_create(rollups.values(), batch_size=500)
+        if progress:
+            progress(min(start + chunk_size, len(subject_ids)), len(subject_ids))
+    DashboardCache.bump("attendance")
+
+
+def rollups_complete():
+    # True when the Rollups hold as many Statuses as the registers, whatever their storage.
+    # Compact registers are only read through the Rollup day masks, so they must not be
+    # written while the Rollups are missing (e.g. never rebuilt after an import)
+    total = MonthlyAttendanceRollup.objects.aggregate(total=Sum(F('present_count') + F('absent_count')))['total'] or 0
+    statuses = AttendanceReport.objects.count()
+    rosters = Attendance.objects.exclude(storage_mode=AttendanceStorage.ROWS).order_by().values_list('roster__student_ids').annotate(total=Count('id'))
+    for roster_text, registers in rosters.iterator():
+        statuses += len(AttendanceStorage.roster_student_ids(roster_text)) * registers
+    return total == statuses
@@ -0,0 +1,108 @@
+import datetime
+import json
+import logging
+import threading
+
+from django.conf import settings
+from django.db import connection
+from django.utils import timezone
+
+from student_management_app import DashboardCache, DashboardStats, SessionYearScope
+from student_management_app.models import DashboardSnapshot
+
+
+logger = logging.getLogger(__name__)
+
+
+# With DASHBOARD_SNAPSHOT_TTL set, the HOD Dashboard is served from a snapshot
+# stored in DashboardSnapshot. A snapshot older than the TTL is still served,
+# and is recomputed in the background (a thread of the web process, or the
+# "refresh_dashboard_snapshots --loop" command), so a request never waits for
+# the Dashboard to be built, except the very first one.
+#
+# Snapshots are named "<builder>:<session year key>".
+
+BUILDERS = {
+    "admin_home": DashboardStats.admin_home_summary,
+    "admin_home_charts": DashboardStats.admin_home_charts,
+}
+
+# Snapshots being recomputed by a thread of this process
+refreshing = set()
+refreshing_lock = threading.Lock()
+
+
+def snapshot_ttl():
+    return getattr(settings, "DASHBOARD_SNAPSHOT_TTL", None)
+
+
+def dashboard_context(builder, session_year):
+    name = "%s:%s" % (builder, SessionYearScope.session_year_key(session_year))
+    if snapshot_ttl() is None:
+        return DashboardCache.cached_context(name, lambda: build(name))
+    return get_snapshot(name)
+
+
+def build(name):
+    builder, session_year_key = name.split(":")
+    session_year_id = None if session_year_key == SessionYearScope.ALL else int(session_year_key)
+    return BUILDERS[builder](session_year_id)
+
+
+def is_stale(computed_at):
+    return timezone.now() - computed_at > datetime.timedelta(seconds=snapshot_ttl())
+
+
+def get_snapshot(name):
+    snapshot = DashboardSnapshot.objects.filter(name=name).values_list('data', 'computed_at').first()
+    if snapshot is None:
+        return refresh(name)
+
+    data, computed_at = snapshot
+    if is_stale(computed_at):
+        schedule_refresh(name)
+    return json.loads(data)
+
+
+def refresh(name):
+    # The snapshot is as old as the moment its build started
+    computed_at = timezone.now()
+    data = build(name)
+    DashboardSnapshot.objects.update_or_create(name=name, defaults={"data": json.dumps(data), "computed_at": computed_at})
+    return data
+
+
+def schedule_refresh(name):
+    # Starts one refresh thread per snapshot, returns it (None if not started)
+    if not getattr(settings, "DASHBOARD_SNAPSHOT_THREAD", True):
+        return None
+    with refreshing_lock:
+        if name in refreshing:
+            return None
+        refreshing.add(name)
+
+    thread = threading.Thread(target=refresh_in_background, args=(name,), daemon=True)
+    thread.start()
+    return thread
+
+
+def refresh_in_background(name):
+    try:
+        refresh(name)
+    except Exception:
+        logger.exception("Could not refresh the Dashboard snapshot %s", name)
+    finally:
+        # The thread has its own database connection
+        connection.close()
+        with refreshing_lock:
+            refreshing.discard(name)
+
+
+def refresh_stale(force=False):
+    # Recomputes the stale snapshots (every snapshot with force), returns their names
+    names = []
+    for name, computed_at in DashboardSnapshot.objects.values_list('name', 'computed_at'):
+        if force or snapshot_ttl() is None or is_stale(computed_at):
+            refresh(name)
+            names.append(name)
+    return names
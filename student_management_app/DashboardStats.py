@@ -0,0 +1,260 @@
+from django.db.models import Count, ExpressionWrapper, F, FloatField, Q, Sum
+from django.db.models.functions import Coalesce, NullIf
+
+from student_management_app.models import Staffs, Courses, Subjects, Students, StudentAttendanceCounter, SubjectAttendanceCounter, StudentLeaveCounter, StaffLeaveCounter, MonthlyAttendanceRollup
+
+
+# Every function here builds its lists from a fixed number of grouped queries,
+# so the number of queries does not grow with the number of rows in the tables.
+# Attendance and Leave totals are read from the Counter tables (see DashboardCounters)
+# instead of scanning the whole AttendanceReport / LeaveReport history.
+#
+# session_year_id limits every Student, Attendance and Leave figure to one
+# Session Year (see SessionYearScope); None covers the whole history.
+
+
+def count_by(queryset, field):
+    # Returns {field_value: row_count} using a single GROUP BY query
+    rows = queryset.order_by().values_list(field).annotate(total=Count('id'))
+    return dict(rows)
+
+
+def in_session_year(queryset, session_year_id):
+    if session_year_id is None:
+        return queryset
+    return queryset.filter(session_year_id=session_year_id)
+
+
+def leaves_by(queryset, field, session_year_id):
+    # Returns {field_value: approved_leaves} from a Leave Counter table
+    rows = in_session_year(queryset, session_year_id).order_by().values_list(field).annotate(total=Sum('approved_count'))
+    return dict(rows)
+
+
+def admin_home_summary(session_year_id=None):
+    return {
+        "all_student_count": in_session_year(Students.objects.all(), session_year_id).count(),
+        "subject_count": Subjects.objects.all().count(),
+        "course_count": Courses.objects.all().count(),
+        "staff_count": Staffs.objects.all().count(),
+    }
+
+
+def admin_home_charts(session_year_id=None):
+    # Total Subjects and students in Each Course
+    subjects_per_course = count_by(Subjects.objects.all(), 'course_id')
+    students_per_course = count_by(in_session_year(Students.objects.all(), session_year_id), 'course_id')
+
+    course_name_list = []
+    subject_count_list = []
+    student_count_list_in_course = []
+    for course_id, course_name in Courses.objects.values_list('id', 'course_name'):
+        course_name_list.append(course_name)
+        subject_count_list.append(subjects_per_course.get(course_id, 0))
+        student_count_list_in_course.append(students_per_course.get(course_id, 0))
+
+    # The Subject, Staff and Student charts grow with the institution and are
+    # loaded a page at a time (see the *_chart functions below)
+    return {
+        "course_name_list": course_name_list,
+        "subject_count_list": subject_count_list,
+        "student_count_list_in_course": student_count_list_in_course,
+    }
+
+
+# Charts with one bar per Subject, Staff or Student only get the rows that are
+# plotted: they are sorted and cut with ORDER BY / LIMIT in the database.
+
+CHART_ORDERS = ("lowest", "highest", "name")
+CHART_PAGE_SIZE = 20
+MAX_CHART_PAGE_SIZE = 100
+
+
+def chart_page(queryset, page, limit):
+    # Rows of one page; one more row is fetched to know if there is a next page
+    offset = (page - 1) * limit
+    rows = list(queryset[offset:offset + limit + 1])
+    return rows[:limit], len(rows) > limit
+
+
+def chart_ordering(order, value, name):
+    # Ties (and rows without a value) are sorted by name, then id
+    if order == "name":
+        return [name, 'id']
+    if order == "lowest":
+        return [F(value).asc(nulls_last=True), name, 'id']
+    return [F(value).desc(nulls_last=True), name, 'id']
+
+
+def subject_student_chart(session_year_id=None, order="highest", page=1, limit=CHART_PAGE_SIZE):
+    # Students of a Subject are the Students of its Course
+    student_filter = Q(course_id__students__session_year_id=session_year_id) if session_year_id is not None else None
+    subjects = Subjects.objects.values_list('subject_name').annotate(
+        students=Count('course_id__students', filter=student_filter),
+    ).order_by(*chart_ordering(order, 'students', 'subject_name'))
+    rows, has_next = chart_page(subjects, page, limit)
+    return {
+        "subject_list": [subject_name for subject_name, students in rows],
+        "student_count_list_in_subject": [students for subject_name, students in rows],
+        "page": page,
+        "has_next": has_next,
+    }
+
+
+def staff_attendance_chart(session_year_id=None, order="highest", page=1, limit=CHART_PAGE_SIZE):
+    # Attendance taken by a Staff is summed over the Subject Counters of their Subjects
+    counter_filter = Q(admin__subjects__subjectattendancecounter__session_year_id=session_year_id) if session_year_id is not None else None
+    staffs = Staffs.objects.values_list('id', 'admin__first_name').annotate(
+        attendance=Coalesce(Sum('admin__subjects__subjectattendancecounter__attendance_count', filter=counter_filter), 0),
+    ).order_by(*chart_ordering(order, 'attendance', 'admin__first_name'))
+    rows, has_next = chart_page(staffs, page, limit)
+
+    # Leaves of the plotted Staffs only
+    leaves_per_staff = leaves_by(StaffLeaveCounter.objects.filter(staff_id__in=[row[0] for row in rows]), 'staff_id', session_year_id)
+    return {
+        "staff_name_list": [first_name for staff_id, first_name, attendance in rows],
+        "staff_attendance_present_list": [attendance for staff_id, first_name, attendance in rows],
+        "staff_attendance_leave_list": [leaves_per_staff.get(staff_id, 0) for staff_id, first_name, attendance in rows],
+        "page": page,
+        "has_next": has_next,
+    }
+
+
+def student_attendance_chart(session_year_id=None, order="lowest", page=1, limit=CHART_PAGE_SIZE):
+    counter_filter = Q(studentattendancecounter__session_year_id=session_year_id) if session_year_id is not None else None
+    students = in_session_year(Students.objects.all(), session_year_id).values_list('id', 'admin__first_name').annotate(
+        present=Coalesce(Sum('studentattendancecounter__present_count', filter=counter_filter), 0),
+        absent=Coalesce(Sum('studentattendancecounter__absent_count', filter=counter_filter), 0),
+    ).annotate(
+        # NULL for Students without Attendance, sorted after the others
+        percentage=ExpressionWrapper(F('present') * 100.0 / NullIf(F('present') + F('absent'), 0), output_field=FloatField()),
+    ).order_by(*chart_ordering(order, 'percentage', 'admin__first_name'))
+    rows, has_next = chart_page(students, page, limit)
+
+    # Leaves of the plotted Students only
+    leaves_per_student = leaves_by(StudentLeaveCounter.objects.filter(student_id__in=[row[0] for row in rows]), 'student_id', session_year_id)
+
+    student_attendance_present_list = []
+    student_attendance_leave_list = []
+    student_attendance_percentage_list = []
+    student_name_list = []
+    for student_id, first_name, present, absent, percentage in rows:
+        student_attendance_present_list.append(present)
+        student_attendance_leave_list.append(leaves_per_student.get(student_id, 0) + absent)
+        student_attendance_percentage_list.append(attendance_percentage(present, absent))
+        student_name_list.append(first_name)
+
+    return {
+        "student_attendance_present_list": student_attendance_present_list,
+        "student_attendance_leave_list": student_attendance_leave_list,
+        "student_attendance_percentage_list": student_attendance_percentage_list,
+        "student_name_list": student_name_list,
+        "page": page,
+        "has_next": has_next,
+    }
+
+
+def staff_home_summary(staff_user_id, session_year_id=None):
+    subjects = Subjects.objects.filter(staff_id=staff_user_id)
+    attendance_count = in_session_year(SubjectAttendanceCounter.objects.filter(subject_id__in=subjects), session_year_id).aggregate(total=Sum('attendance_count'))['total']
+    # Fetch All Approve Leave
+    leave_count = in_session_year(StaffLeaveCounter.objects.filter(staff_id__admin=staff_user_id), session_year_id).aggregate(total=Sum('approved_count'))['total']
+    return {
+        "students_count": in_session_year(Students.objects.filter(course_id__in=subjects.values('course_id')), session_year_id).count(),
+        "attendance_count": attendance_count or 0,
+        "leave_count": leave_count or 0,
+        "subject_count": subjects.count(),
+    }
+
+
+def staff_home_charts(staff_user_id, session_year_id=None):
+    # Fetching All Subjects of the Staff and the distinct Courses they belong to
+    subjects = list(Subjects.objects.filter(staff_id=staff_user_id).values_list('id', 'subject_name', 'course_id'))
+    course_ids = {course_id for subject_id, subject_name, course_id in subjects}
+
+    # Attendance taken per Subject, read from the Subject Counters
+    attendance_per_subject = dict(
+        in_session_year(SubjectAttendanceCounter.objects.filter(subject_id__in=[subject[0] for subject in subjects]), session_year_id).order_by().values_list('subject_id').annotate(total=Sum('attendance_count'))
+    )
+
+    #Fetch Attendance Data by Subjects
+    subject_list = []
+    attendance_list = []
+    for subject_id, subject_name, course_id in subjects:
+        subject_list.append(subject_name)
+        attendance_list.append(attendance_per_subject.get(subject_id, 0))
+
+    # Students of those Courses with their names and Present/Absent totals in one grouped query
+    counter_filter = Q(studentattendancecounter__session_year_id=session_year_id) if session_year_id is not None else None
+    students_attendance = in_session_year(Students.objects.filter(course_id__in=course_ids), session_year_id).order_by('id').values_list('id', 'admin__first_name', 'admin__last_name').annotate(
+        present=Coalesce(Sum('studentattendancecounter__present_count', filter=counter_filter), 0),
+        absent=Coalesce(Sum('studentattendancecounter__absent_count', filter=counter_filter), 0),
+    )
+    student_list = []
+    student_list_attendance_present = []
+    student_list_attendance_absent = []
+    for student_id, first_name, last_name, present, absent in students_attendance:
+        student_list.append(first_name+" "+last_name)
+        student_list_attendance_present.append(present)
+        student_list_attendance_absent.append(absent)
+
+    return {
+        "subject_list": subject_list,
+        "attendance_list": attendance_list,
+        "student_list": student_list,
+        "attendance_present_list": student_list_attendance_present,
+        "attendance_absent_list": student_list_attendance_absent
+    }
+
+
+def attendance_percentage(present, absent):
+    total = present + absent
+    return round(present * 100 / total, 2) if total else 0
+
+
+def student_home_summary(student_user_id, session_year_id=None):
+    # Totals are read from the Student Counters
+    totals = in_session_year(StudentAttendanceCounter.objects.filter(student_id__admin=student_user_id), session_year_id).aggregate(
+        present=Sum('present_count'),
+        absent=Sum('absent_count'),
+    )
+    attendance_present = totals['present'] or 0
+    attendance_absent = totals['absent'] or 0
+    return {
+        "total_attendance": attendance_present + attendance_absent,
+        "attendance_present": attendance_present,
+        "attendance_absent": attendance_absent,
+        "attendance_percentage": attendance_percentage(attendance_present, attendance_absent),
+        "total_subjects": Subjects.objects.filter(course_id__students__admin=student_user_id).count(),
+    }
+
+
+def student_home_charts(student_user_id, session_year_id=None):
+    student_id, course_id = Students.objects.values_list('id', 'course_id').get(admin=student_user_id)
+
+    # Present/Absent of the Student grouped by Subject in one query over the Monthly Rollups
+    attendance_per_subject = {}
+    attendance_rows = in_session_year(MonthlyAttendanceRollup.objects.filter(student_id=student_id), session_year_id).order_by().values_list('subject_id').annotate(
+        present=Sum('present_count'),
+        absent=Sum('absent_count'),
+    )
+    for subject_id, present, absent in attendance_rows:
+        attendance_per_subject[subject_id] = (present, absent)
+
+    subject_name = []
+    data_present = []
+    data_absent = []
+    data_percentage = []
+    for subject_id, name in Subjects.objects.filter(course_id=course_id).values_list('id', 'subject_name'):
+        attendance_present_count, attendance_absent_count = attendance_per_subject.get(subject_id, (0, 0))
+        subject_name.append(name)
+        data_present.append(attendance_present_count)
+        data_absent.append(attendance_absent_count)
+        data_percentage.append(attendance_percentage(attendance_present_count, attendance_absent_count))
+
+    return {
+        "subject_name": subject_name,
+        "data_present": data_present,
+        "data_absent": data_absent,
+        "data_percentage": data_percentage
+    }
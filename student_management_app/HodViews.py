@@ -4,88 +4,74 @@ from django.contrib import messages
 from django.core.files.storage import FileSystemStorage #To upload Profile Picture
 from django.urls import reverse
 from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.cache import cache_control
+from django.views.decorators.gzip import gzip_page
+from django.views.decorators.http import conditional_page
 from django.core import serializers
-import json
 
 from student_management_app.models import CustomUser, Staffs, Courses, Subjects, Students, SessionYearModel, FeedBackStudent, FeedBackStaffs, LeaveReportStudent, LeaveReportStaff, Attendance, AttendanceReport
 from .forms import AddStudentForm, EditStudentForm
+from . import DashboardStats, DashboardCounters, DashboardCache, DashboardSnapshots, SessionYearScope, AttendanceStorage, AjaxResponse, RosterCache
 
 
 def admin_home(request):
-    all_student_count = Students.objects.all().count()
-    subject_count = Subjects.objects.all().count()
-    course_count = Courses.objects.all().count()
-    staff_count = Staffs.objects.all().count()
-
-    # Total Subjects and students in Each Course
-    course_all = Courses.objects.all()
-    course_name_list = []
-    subject_count_list = []
-    student_count_list_in_course = []
-
-    for course in course_all:
-        subjects = Subjects.objects.filter(course_id=course.id).count()
-        students = Students.objects.filter(course_id=course.id).count()
-        course_name_list.append(course.course_name)
-        subject_count_list.append(subjects)
-        student_count_list_in_course.append(students)
-    
-    subject_all = Subjects.objects.all()
-    subject_list = []
-    student_count_list_in_subject = []
-    for subject in subject_all:
-        course = Courses.objects.get(id=subject.course_id.id)
-        student_count = Students.objects.filter(course_id=course.id).count()
-        subject_list.append(subject.subject_name)
-        student_count_list_in_subject.append(student_count)
-    
-    # For Saffs
-    staff_attendance_present_list=[]
-    staff_attendance_leave_list=[]
-    staff_name_list=[]
+    # Only the Counts are rendered, the Charts are loaded from admin_home_chart_data
+    summary = DashboardSnapshots.dashboard_context("admin_home", SessionYearScope.get_session_year(request))
+    context = dict(summary, **SessionYearScope.session_year_context(request))
+    return render(request, "hod_template/home_content.html", context)
 
-    staffs = Staffs.objects.all()
-    for staff in staffs:
-        subject_ids = Subjects.objects.filter(staff_id=staff.admin.id)
-        attendance = Attendance.objects.filter(subject_id__in=subject_ids).count()
-        leaves = LeaveReportStaff.objects.filter(staff_id=staff.id, leave_status=1).count()
-        staff_attendance_present_list.append(attendance)
-        staff_attendance_leave_list.append(leaves)
-        staff_name_list.append(staff.admin.first_name)
-
-    # For Students
-    student_attendance_present_list=[]
-    student_attendance_leave_list=[]
-    student_name_list=[]
 
-    students = Students.objects.all()
-    for student in students:
-        attendance = AttendanceReport.objects.filter(student_id=student.id, status=True).count()
-        absent = AttendanceReport.objects.filter(student_id=student.id, status=False).count()
-        leaves = LeaveReportStudent.objects.filter(student_id=student.id, leave_status=1).count()
-        student_attendance_present_list.append(attendance)
-        student_attendance_leave_list.append(leaves+absent)
-        student_name_list.append(student.admin.first_name)
+@gzip_page
+@cache_control(private=True, max_age=0, must_revalidate=True)
+@conditional_page
+def admin_home_chart_data(request):
+    # All the Chart Lists are built with grouped queries
+    charts = DashboardSnapshots.dashboard_context("admin_home_charts", SessionYearScope.get_session_year(request))
+    return JsonResponse(charts)
 
 
-    context={
-        "all_student_count": all_student_count,
-        "subject_count": subject_count,
-        "course_count": course_count,
-        "staff_count": staff_count,
-        "course_name_list": course_name_list,
-        "subject_count_list": subject_count_list,
-        "student_count_list_in_course": student_count_list_in_course,
-        "subject_list": subject_list,
-        "student_count_list_in_subject": student_count_list_in_subject,
-        "staff_attendance_present_list": staff_attendance_present_list,
-        "staff_attendance_leave_list": staff_attendance_leave_list,
-        "staff_name_list": staff_name_list,
-        "student_attendance_present_list": student_attendance_present_list,
-        "student_attendance_leave_list": student_attendance_leave_list,
-        "student_name_list": student_name_list,
-    }
-    return render(request, "hod_template/home_content.html", context)
+def chart_page_options(request, default_order):
+    # ?order=lowest|highest|name&page=1&limit=20 of the paginated Chart endpoints
+    order = request.GET.get("order", default_order)
+    if order not in DashboardStats.CHART_ORDERS:
+        order = default_order
+    try:
+        page = max(int(request.GET.get("page", 1)), 1)
+        limit = min(max(int(request.GET.get("limit", DashboardStats.CHART_PAGE_SIZE)), 1), DashboardStats.MAX_CHART_PAGE_SIZE)
+    except ValueError:
+        page, limit = 1, DashboardStats.CHART_PAGE_SIZE
+    return order, page, limit
+
+
+def paginated_chart_data(request, name, build, default_order):
+    session_year = SessionYearScope.get_session_year(request)
+    session_year_id = session_year.id if session_year else None
+    order, page, limit = chart_page_options(request, default_order)
+    cache_name = "%s:%s:%s:%s:%s" % (name, SessionYearScope.session_year_key(session_year), order, page, limit)
+    chart = DashboardCache.cached_context(cache_name, lambda: build(session_year_id, order, page, limit))
+    return JsonResponse(chart)
+
+
+@gzip_page
+@cache_control(private=True, max_age=0, must_revalidate=True)
+@conditional_page
+def admin_subject_chart_data(request):
+    return paginated_chart_data(request, "admin_subject_chart", DashboardStats.subject_student_chart, "highest")
+
+
+@gzip_page
+@cache_control(private=True, max_age=0, must_revalidate=True)
+@conditional_page
+def admin_staff_chart_data(request):
+    return paginated_chart_data(request, "admin_staff_chart", DashboardStats.staff_attendance_chart, "highest")
+
+
+@gzip_page
+@cache_control(private=True, max_age=0, must_revalidate=True)
+@conditional_page
+def admin_student_chart_data(request):
+    # Lowest attendance first by default
+    return paginated_chart_data(request, "admin_student_chart", DashboardStats.student_attendance_chart, "lowest")
 
 
 def add_staff(request):
@@ -241,6 +227,8 @@ def edit_course_save(request):
 def delete_course(request, course_id):
     course = Courses.objects.get(id=course_id)
     try:
+        # Deleting the Course deletes its Subjects
+        RosterCache.invalidate_subjects(*course.subjects_set.values_list('id', flat=True))
         course.delete()
         messages.success(request, "Course Deleted Successfully.")
         return redirect('manage_course')
@@ -272,6 +260,8 @@ def add_session_save(request):
         try:
             sessionyear = SessionYearModel(session_start_year=session_start_year, session_end_year=session_end_year)
             sessionyear.save()
+            # Approved leaves dated in the new Session Year are counted in it
+            DashboardCounters.rebuild_leave_counters()
             messages.success(request, "Session Year added Successfully!")
             return redirect("add_session")
         except:
@@ -301,6 +291,8 @@ def edit_session_save(request):
             session_year.session_start_year = session_start_year
             session_year.session_end_year = session_end_year
             session_year.save()
+            # The leaves are counted again in the Session Year their dates now fall in
+            DashboardCounters.rebuild_leave_counters()
 
             messages.success(request, "Session Year Updated Successfully.")
             return redirect('/edit_session/'+session_id)
@@ -313,6 +305,8 @@ def delete_session(request, session_id):
     session = SessionYearModel.objects.get(id=session_id)
     try:
         session.delete()
+        # Leave Counters of the deleted Session Year went with it
+        DashboardCounters.rebuild_leave_counters()
         messages.success(request, "Session Deleted Successfully.")
         return redirect('manage_session')
     except:
@@ -362,6 +356,8 @@ def add_student_save(request):
 
             try:
                 user = CustomUser.objects.create_user(username=username, password=password, email=email, first_name=first_name, last_name=last_name, user_type=3)
+                # The post_save signal first puts the Student in a placeholder roster
+                placeholder_roster = RosterCache.student_roster(user.students)
                 user.students.address = address
 
                 course_obj = Courses.objects.get(id=course_id)
@@ -373,6 +369,7 @@ def add_student_save(request):
                 user.students.gender = gender
                 user.students.profile_pic = profile_pic_url
                 user.save()
+                RosterCache.invalidate(placeholder_roster, RosterCache.student_roster(user.students))
                 messages.success(request, "Student Added Successfully!")
                 return redirect('add_student')
             except:
@@ -455,6 +452,7 @@ def edit_student_save(request):
 
                 # Then Update Students Table
                 student_model = Students.objects.get(admin=student_id)
+                old_roster = RosterCache.student_roster(student_model)
                 student_model.address = address
 
                 course = Courses.objects.get(id=course_id)
@@ -467,6 +465,8 @@ def edit_student_save(request):
                 if profile_pic_url != None:
                     student_model.profile_pic = profile_pic_url
                 student_model.save()
+                # The Student may have left a roster and joined another one (or changed name)
+                RosterCache.invalidate(old_roster, RosterCache.student_roster(student_model))
                 # Delete student_id SESSION after the data is updated
                 del request.session['student_id']
 
@@ -483,6 +483,7 @@ def delete_student(request, student_id):
     student = Students.objects.get(admin=student_id)
     try:
         student.delete()
+        RosterCache.invalidate(RosterCache.student_roster(student))
         messages.success(request, "Student Deleted Successfully.")
         return redirect('manage_student')
     except:
@@ -565,6 +566,7 @@ def edit_subject_save(request):
             subject.staff_id = staff
             
             subject.save()
+            RosterCache.invalidate_subjects(subject.id)
 
             messages.success(request, "Subject Updated Successfully.")
             # return redirect('/edit_subject/'+subject_id)
@@ -580,6 +582,7 @@ def edit_subject_save(request):
 def delete_subject(request, subject_id):
     subject = Subjects.objects.get(id=subject_id)
     try:
+        RosterCache.invalidate_subjects(subject.id)
         subject.delete()
         messages.success(request, "Subject Deleted Successfully.")
         return redirect('manage_subject')
@@ -664,15 +667,19 @@ def student_leave_view(request):
 
 def student_leave_approve(request, leave_id):
     leave = LeaveReportStudent.objects.get(id=leave_id)
+    old_status = leave.leave_status
     leave.leave_status = 1
     leave.save()
+    DashboardCounters.record_leave_status(leave, old_status)
     return redirect('student_leave_view')
 
 
 def student_leave_reject(request, leave_id):
     leave = LeaveReportStudent.objects.get(id=leave_id)
+    old_status = leave.leave_status
     leave.leave_status = 2
     leave.save()
+    DashboardCounters.record_leave_status(leave, old_status)
     return redirect('student_leave_view')
 
 
@@ -686,15 +693,19 @@ def staff_leave_view(request):
 
 def staff_leave_approve(request, leave_id):
     leave = LeaveReportStaff.objects.get(id=leave_id)
+    old_status = leave.leave_status
     leave.leave_status = 1
     leave.save()
+    DashboardCounters.record_leave_status(leave, old_status)
     return redirect('staff_leave_view')
 
 
 def staff_leave_reject(request, leave_id):
     leave = LeaveReportStaff.objects.get(id=leave_id)
+    old_status = leave.leave_status
     leave.leave_status = 2
     leave.save()
+    DashboardCounters.record_leave_status(leave, old_status)
     return redirect('staff_leave_view')
 
 
@@ -721,16 +732,9 @@ def admin_get_attendance_dates(request):
     session_model = SessionYearModel.objects.get(id=session_year)
 
     # students = Students.objects.filter(course_id=subject_model.course_id, session_year_id=session_model)
-    attendance = Attendance.objects.filter(subject_id=subject_model, session_year_id=session_model)
-
-    # Only Passing Student Id and Student Name Only
-    list_data = []
-
-    for attendance_single in attendance:
-        data_small={"id":attendance_single.id, "attendance_date":str(attendance_single.attendance_date), "session_year_id":attendance_single.session_year_id.id}
-        list_data.append(data_small)
+    attendance = Attendance.objects.filter(subject_id=subject_model, session_year_id=session_model).values_list('id', 'attendance_date', 'session_year_id')
 
-    return JsonResponse(json.dumps(list_data), content_type="application/json", safe=False)
+    return AjaxResponse.rows_response(request, AjaxResponse.ATTENDANCE_DATE_FIELDS, attendance)
 
 
 @csrf_exempt
@@ -739,15 +743,8 @@ def admin_get_attendance_student(request):
     attendance_date = request.POST.get('attendance_date')
     attendance = Attendance.objects.get(id=attendance_date)
 
-    attendance_data = AttendanceReport.objects.filter(attendance_id=attendance)
-    # Only Passing Student Id and Student Name Only
-    list_data = []
-
-    for student in attendance_data:
-        data_small={"id":student.student_id.admin.id, "name":student.student_id.admin.first_name+" "+student.student_id.admin.last_name, "status":student.status}
-        list_data.append(data_small)
-
-    return JsonResponse(json.dumps(list_data), content_type="application/json", safe=False)
+    # Only Passing Student Id, Student Name and Status, whatever the storage of the register
+    return AjaxResponse.rows_response(request, AjaxResponse.REGISTER_FIELDS, AttendanceStorage.register_rows(attendance))
 
 
 def admin_profile(request):
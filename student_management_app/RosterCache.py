@@ -0,0 +1,95 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+
+from student_management_app import DashboardCache
+from student_management_app.models import Students, Subjects
+
+
+# Students (user id and name) of a Course in a Session Year, as listed by the
+# Take Attendance and Add Result pages. Rosters are cached until a Student of
+# the Course is added, edited or deleted (see invalidate).
+#
+# Like DashboardCache, each roster has a version that invalidate bumps right away
+# AND again once the transaction commits, and a roster is stored under the version
+# read before the Students were. A roster read before a commit, even if stored
+# after it, is therefore left under an old version and never served again.
+#
+# The Course of each Subject, which get_students looks up before the roster, is
+# cached the same way until the Subject is edited or deleted (see invalidate_subjects).
+
+ROSTER_VERSION_KEY = "roster:version:%s:%s"
+ROSTER_KEY = "roster:%s:%s:%s"
+SUBJECT_COURSE_VERSION_KEY = "roster:subject:version:%s"
+SUBJECT_COURSE_KEY = "roster:subject:%s:%s"
+
+
+def roster_timeout():
+    return getattr(settings, "ROSTER_CACHE_TIMEOUT", 3600)
+
+
+def get_roster(course_id, session_year_id):
+    # [(<Student user id>, name)] ordered by Student, from the cache when possible
+    version = current_version(ROSTER_VERSION_KEY % (course_id, session_year_id))
+    key = ROSTER_KEY % (course_id, session_year_id, version)
+    rows = cache.get(key)
+    if rows is not None:
+        return rows
+
+    students = Students.objects.filter(course_id=course_id, session_year_id=session_year_id).order_by('id').values_list(
+        'admin_id', 'admin__first_name', 'admin__last_name'
+    )
+    rows = [(admin_id, first_name + " " + last_name) for admin_id, first_name, last_name in students]
+    # A roster read inside a transaction may include writes that are later rolled back
+    if not connection.in_atomic_block:
+        cache.set(key, rows, roster_timeout())
+    return rows
+
+
+def get_subject_course(subject_id):
+    # Course id of the Subject, from the cache when possible (Subjects.DoesNotExist if missing)
+    key = SUBJECT_COURSE_KEY % (subject_id, current_version(SUBJECT_COURSE_VERSION_KEY % subject_id))
+    course_id = cache.get(key)
+    if course_id is not None:
+        return course_id
+
+    course_id = Subjects.objects.filter(id=subject_id).values_list('course_id', flat=True).get()
+    if not connection.in_atomic_block:
+        cache.set(key, course_id, roster_timeout())
+    return course_id
+
+
+def invalidate(*rosters):
+    # rosters: (course_id, session_year_id) of every roster a Student left or joined
+    bump_on_commit([ROSTER_VERSION_KEY % roster for roster in set(rosters)])
+
+
+def invalidate_subjects(*subject_ids):
+    # subject_ids: every Subject whose Course changed or that was deleted
+    bump_on_commit([SUBJECT_COURSE_VERSION_KEY % subject_id for subject_id in set(subject_ids)])
+
+
+def bump_on_commit(version_keys):
+    for key in version_keys:
+        incr_version(key)
+        transaction.on_commit(lambda key=key: incr_version(key))
+
+
+def current_version(key):
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, DashboardCache.initial_version(), None)
+        version = cache.get(key)
+    return version
+
+
+def incr_version(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        # Key missing (first use or evicted)
+        cache.add(key, DashboardCache.initial_version(), None)
+
+
+def student_roster(student):
+    return (student.course_id_id, student.session_year_id_id)
@@ -0,0 +1,90 @@
+import datetime
+
+from student_management_app.models import SessionYearModel
+
+
+# Dashboards show one Session Year at a time. The Session Year is resolved once
+# per request (and cached on it) in this order:
+#   1. ?session_year=<id> in the query string, remembered in the user's session
+#      ("all" selects the whole history);
+#   2. the Session Year previously selected by the user;
+#   3. for Students, the Session Year they are enrolled in;
+#   4. the Session Year the current date falls in, else the latest one.
+
+PARAM = "session_year"
+ALL = "all"
+
+
+def get_session_year(request):
+    # Returns the SessionYearModel of the request, or None for the whole history
+    if not hasattr(request, "_session_year"):
+        request._session_year = resolve_session_year(request)
+    return request._session_year
+
+
+def session_year_key(session_year):
+    # Used in cache keys and URLs
+    return session_year.id if session_year is not None else ALL
+
+
+def session_year_context(request):
+    # Template variables of the Session Year selector
+    session_year = get_session_year(request)
+    return {
+        "session_years": SessionYearModel.objects.order_by('-session_start_year'),
+        "session_year": session_year,
+        "session_year_key": session_year_key(session_year),
+    }
+
+
+def resolve_session_year(request):
+    selected = request.GET.get(PARAM)
+    if selected is not None:
+        request.session[PARAM] = selected
+    else:
+        selected = request.session.get(PARAM)
+
+    if selected == ALL:
+        return None
+    if selected:
+        try:
+            return SessionYearModel.objects.get(id=selected)
+        except (ValueError, SessionYearModel.DoesNotExist):
+            request.session.pop(PARAM, None)
+
+    if request.user.is_authenticated and str(request.user.user_type) == "3":
+        session_year = SessionYearModel.objects.filter(students__admin=request.user).first()
+        if session_year is not None:
+            return session_year
+
+    return current_session_year()
+
+
+def current_session_year(today=None):
+    today = today or datetime.date.today()
+    session_year = SessionYearModel.objects.filter(session_start_year__lte=today, session_end_year__gte=today).order_by('-session_start_year').first()
+    if session_year is None:
+        session_year = SessionYearModel.objects.order_by('-session_start_year').first()
+    return session_year
+
+
+def session_year_for_date(value):
+    # Id of the Session Year a date ("YYYY-MM-DD" string or date) falls in, None if in none
+    return find_session_year(value, session_years_by_date())
+
+
+def session_years_by_date():
+    # [(start, end, id)] of every Session Year, for mapping many dates without a query each
+    return list(SessionYearModel.objects.order_by('-session_start_year').values_list('session_start_year', 'session_end_year', 'id'))
+
+
+def find_session_year(value, session_years):
+    if isinstance(value, str):
+        try:
+            value = datetime.date.fromisoformat(value)
+        except ValueError:
+            return None
+    for start, end, session_year_id in session_years:
+        if start <= value <= end:
+            return session_year_id
+    return None
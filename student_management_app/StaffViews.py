@@ -4,68 +4,36 @@ from django.contrib import messages
 from django.core.files.storage import FileSystemStorage #To upload Profile Picture
 from django.urls import reverse
 from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.cache import cache_control
+from django.views.decorators.gzip import gzip_page
+from django.views.decorators.http import conditional_page
 from django.core import serializers
 import json
 
 
-from student_management_app.models import CustomUser, Staffs, Courses, Subjects, Students, SessionYearModel, Attendance, AttendanceReport, LeaveReportStaff, FeedBackStaffs, StudentResult
+from student_management_app.models import CustomUser, Staffs, Courses, Subjects, Students, SessionYearModel, Attendance, AttendanceReport, LeaveReportStaff, FeedBackStaffs, StudentResult, AttendanceJob
+from . import DashboardStats, DashboardCache, SessionYearScope, AttendanceService, AttendanceStorage, AttendanceQueue, AjaxResponse, RosterCache
 
 
 def staff_home(request):
-    # Fetching All Students under Staff
+    # Only the Counts are rendered, the Charts are loaded from staff_home_chart_data
+    session_year = SessionYearScope.get_session_year(request)
+    session_year_id = session_year.id if session_year else None
+    cache_name = "staff_home:%s:%s" % (request.user.id, SessionYearScope.session_year_key(session_year))
+    summary = DashboardCache.cached_context(cache_name, lambda: DashboardStats.staff_home_summary(request.user.id, session_year_id))
+    context = dict(summary, **SessionYearScope.session_year_context(request))
+    return render(request, "staff_template/staff_home_template.html", context)
 
-    subjects = Subjects.objects.filter(staff_id=request.user.id)
-    course_id_list = []
-    for subject in subjects:
-        course = Courses.objects.get(id=subject.course_id.id)
-        course_id_list.append(course.id)
-    
-    final_course = []
-    # Removing Duplicate Course Id
-    for course_id in course_id_list:
-        if course_id not in final_course:
-            final_course.append(course_id)
-    
-    students_count = Students.objects.filter(course_id__in=final_course).count()
-    subject_count = subjects.count()
-
-    # Fetch All Attendance Count
-    attendance_count = Attendance.objects.filter(subject_id__in=subjects).count()
-    # Fetch All Approve Leave
-    staff = Staffs.objects.get(admin=request.user.id)
-    leave_count = LeaveReportStaff.objects.filter(staff_id=staff.id, leave_status=1).count()
-
-    #Fetch Attendance Data by Subjects
-    subject_list = []
-    attendance_list = []
-    for subject in subjects:
-        attendance_count1 = Attendance.objects.filter(subject_id=subject.id).count()
-        subject_list.append(subject.subject_name)
-        attendance_list.append(attendance_count1)
-
-    students_attendance = Students.objects.filter(course_id__in=final_course)
-    student_list = []
-    student_list_attendance_present = []
-    student_list_attendance_absent = []
-    for student in students_attendance:
-        attendance_present_count = AttendanceReport.objects.filter(status=True, student_id=student.id).count()
-        attendance_absent_count = AttendanceReport.objects.filter(status=False, student_id=student.id).count()
-        student_list.append(student.admin.first_name+" "+ student.admin.last_name)
-        student_list_attendance_present.append(attendance_present_count)
-        student_list_attendance_absent.append(attendance_absent_count)
 
-    context={
-        "students_count": students_count,
-        "attendance_count": attendance_count,
-        "leave_count": leave_count,
-        "subject_count": subject_count,
-        "subject_list": subject_list,
-        "attendance_list": attendance_list,
-        "student_list": student_list,
-        "attendance_present_list": student_list_attendance_present,
-        "attendance_absent_list": student_list_attendance_absent
-    }
-    return render(request, "staff_template/staff_home_template.html", context)
+@gzip_page
+@cache_control(private=True, max_age=0, must_revalidate=True)
+@conditional_page
+def staff_home_chart_data(request):
+    session_year = SessionYearScope.get_session_year(request)
+    session_year_id = session_year.id if session_year else None
+    cache_name = "staff_home_charts:%s:%s" % (request.user.id, SessionYearScope.session_year_key(session_year))
+    charts = DashboardCache.cached_context(cache_name, lambda: DashboardStats.staff_home_charts(request.user.id, session_year_id))
+    return JsonResponse(charts)
 
 
 
@@ -142,21 +110,12 @@ def get_students(request):
     session_year = request.POST.get("session_year")
 
     # Students enroll to Course, Course has Subjects
-    # Getting all data from subject model based on subject_id
-    subject_model = Subjects.objects.get(id=subject_id)
-
-    session_model = SessionYearModel.objects.get(id=session_year)
-
-    students = Students.objects.filter(course_id=subject_model.course_id, session_year_id=session_model)
+    # Getting the Course of the Subject and its roster, both from the cache
+    course_id = RosterCache.get_subject_course(int(subject_id))
 
     # Only Passing Student Id and Student Name Only
-    list_data = []
-
-    for student in students:
-        data_small={"id":student.admin.id, "name":student.admin.first_name+" "+student.admin.last_name}
-        list_data.append(data_small)
-
-    return JsonResponse(json.dumps(list_data), content_type="application/json", safe=False)
+    rows = RosterCache.get_roster(course_id, int(session_year))
+    return AjaxResponse.rows_response(request, AjaxResponse.STUDENT_FIELDS, rows)
 
 
 
@@ -176,17 +135,15 @@ def save_attendance_data(request):
     json_student = json.loads(student_ids)
     # print(dict_student[0]['id'])
 
-    # print(student_ids)
     try:
-        # First Attendance Data is Saved on Attendance Model
-        attendance = Attendance(subject_id=subject_model, attendance_date=attendance_date, session_year_id=session_year_model)
-        attendance.save()
-
-        for stud in json_student:
-            # Attendance of Individual Student saved on AttendanceReport Model
-            student = Students.objects.get(admin=stud['id'])
-            attendance_report = AttendanceReport(student_id=student, attendance_id=attendance, status=stud['status'])
-            attendance_report.save()
+        if AttendanceQueue.queue_enabled():
+            # Saved later by the queue worker, the page polls attendance_job_status
+            job = AttendanceQueue.enqueue(request.user.id, subject_model.id, session_year_model.id, attendance_date, json_student)
+            response = HttpResponse("OK")
+            response["X-Attendance-Job"] = job.id
+            return response
+        # The Attendance and all its AttendanceReport rows are saved in one transaction
+        AttendanceService.save_attendance(subject_model.id, session_year_model.id, attendance_date, json_student, editor_id=request.user.id)
         return HttpResponse("OK")
     except:
         return HttpResponse("Error")
@@ -194,6 +151,26 @@ def save_attendance_data(request):
 
 
 
+@csrf_exempt
+def save_attendance_batch(request):
+    # Many registers at once, streamed as NDJSON (see AttendanceService.save_attendance_batch)
+    if request.method != "POST":
+        return HttpResponse("Method Not Allowed", status=405)
+
+    # Only Subjects taught by the Staff can be saved
+    results = AttendanceService.save_attendance_batch(request, staff_user_id=request.user.id)
+    return JsonResponse({"results": results})
+
+
+def attendance_job_status(request):
+    # Polled by the Take Attendance page while its register waits in the queue
+    try:
+        job = AttendanceJob.objects.get(id=request.GET.get("job_id"), staff_id=request.user.id)
+    except (ValueError, AttendanceJob.DoesNotExist):
+        return JsonResponse({"error": "Unknown job"}, status=404)
+    return JsonResponse(AttendanceQueue.job_status(job))
+
+
 def staff_update_attendance(request):
     subjects = Subjects.objects.filter(staff_id=request.user.id)
     session_years = SessionYearModel.objects.all()
@@ -218,16 +195,9 @@ def get_attendance_dates(request):
     session_model = SessionYearModel.objects.get(id=session_year)
 
     # students = Students.objects.filter(course_id=subject_model.course_id, session_year_id=session_model)
-    attendance = Attendance.objects.filter(subject_id=subject_model, session_year_id=session_model)
-
-    # Only Passing Student Id and Student Name Only
-    list_data = []
+    attendance = Attendance.objects.filter(subject_id=subject_model, session_year_id=session_model).values_list('id', 'attendance_date', 'session_year_id')
 
-    for attendance_single in attendance:
-        data_small={"id":attendance_single.id, "attendance_date":str(attendance_single.attendance_date), "session_year_id":attendance_single.session_year_id.id}
-        list_data.append(data_small)
-
-    return JsonResponse(json.dumps(list_data), content_type="application/json", safe=False)
+    return AjaxResponse.rows_response(request, AjaxResponse.ATTENDANCE_DATE_FIELDS, attendance)
 
 
 @csrf_exempt
@@ -236,15 +206,8 @@ def get_attendance_student(request):
     attendance_date = request.POST.get('attendance_date')
     attendance = Attendance.objects.get(id=attendance_date)
 
-    attendance_data = AttendanceReport.objects.filter(attendance_id=attendance)
-    # Only Passing Student Id and Student Name Only
-    list_data = []
-
-    for student in attendance_data:
-        data_small={"id":student.student_id.admin.id, "name":student.student_id.admin.first_name+" "+student.student_id.admin.last_name, "status":student.status}
-        list_data.append(data_small)
-
-    return JsonResponse(json.dumps(list_data), content_type="application/json", safe=False)
+    # Only Passing Student Id, Student Name and Status, whatever the storage of the register
+    return AjaxResponse.rows_response(request, AjaxResponse.REGISTER_FIELDS, AttendanceStorage.register_rows(attendance))
 
 
 @csrf_exempt
@@ -257,16 +220,11 @@ def update_attendance_data(request):
     json_student = json.loads(student_ids)
 
     try:
-        
-        for stud in json_student:
-            # Attendance of Individual Student saved on AttendanceReport Model
-            student = Students.objects.get(admin=stud['id'])
-
-            attendance_report = AttendanceReport.objects.get(student_id=student, attendance_id=attendance)
-            attendance_report.status=stud['status']
-
-            attendance_report.save()
-        return HttpResponse("OK")
+        # Only the Students whose status changed are written
+        changed_count = AttendanceService.update_attendance(attendance, json_student, editor_id=request.user.id)
+        response = HttpResponse("OK")
+        response["X-Attendance-Changed"] = changed_count
+        return response
     except:
         return HttpResponse("Error")
 
@@ -1,46 +1,38 @@
 from django.shortcuts import render, redirect
-from django.http import HttpResponse, HttpResponseRedirect
+from django.http import HttpResponse, HttpResponseRedirect, JsonResponse
 from django.contrib import messages
 from django.core.files.storage import FileSystemStorage #To upload Profile Picture
 from django.urls import reverse
+from django.views.decorators.cache import cache_control
+from django.views.decorators.gzip import gzip_page
+from django.views.decorators.http import conditional_page
 import datetime # To Parse input DateTime into Python Date Time Object
 
 from student_management_app.models import CustomUser, Staffs, Courses, Subjects, Students, Attendance, AttendanceReport, LeaveReportStudent, FeedBackStudent, StudentResult
+from . import DashboardStats, DashboardCache, SessionYearScope, AttendanceStorage, RosterCache
 
 
 def student_home(request):
-    student_obj = Students.objects.get(admin=request.user.id)
-    total_attendance = AttendanceReport.objects.filter(student_id=student_obj).count()
-    attendance_present = AttendanceReport.objects.filter(student_id=student_obj, status=True).count()
-    attendance_absent = AttendanceReport.objects.filter(student_id=student_obj, status=False).count()
-
-    course_obj = Courses.objects.get(id=student_obj.course_id.id)
-    total_subjects = Subjects.objects.filter(course_id=course_obj).count()
-
-    subject_name = []
-    data_present = []
-    data_absent = []
-    subject_data = Subjects.objects.filter(course_id=student_obj.course_id)
-    for subject in subject_data:
-        attendance = Attendance.objects.filter(subject_id=subject.id)
-        attendance_present_count = AttendanceReport.objects.filter(attendance_id__in=attendance, status=True, student_id=student_obj.id).count()
-        attendance_absent_count = AttendanceReport.objects.filter(attendance_id__in=attendance, status=False, student_id=student_obj.id).count()
-        subject_name.append(subject.subject_name)
-        data_present.append(attendance_present_count)
-        data_absent.append(attendance_absent_count)
-    
-    context={
-        "total_attendance": total_attendance,
-        "attendance_present": attendance_present,
-        "attendance_absent": attendance_absent,
-        "total_subjects": total_subjects,
-        "subject_name": subject_name,
-        "data_present": data_present,
-        "data_absent": data_absent
-    }
+    # Only the Counts are rendered, the Charts are loaded from student_home_chart_data
+    session_year = SessionYearScope.get_session_year(request)
+    session_year_id = session_year.id if session_year else None
+    cache_name = "student_home:%s:%s" % (request.user.id, SessionYearScope.session_year_key(session_year))
+    summary = DashboardCache.cached_context(cache_name, lambda: DashboardStats.student_home_summary(request.user.id, session_year_id))
+    context = dict(summary, **SessionYearScope.session_year_context(request))
     return render(request, "student_template/student_home_template.html", context)
 
 
+@gzip_page
+@cache_control(private=True, max_age=0, must_revalidate=True)
+@conditional_page
+def student_home_chart_data(request):
+    session_year = SessionYearScope.get_session_year(request)
+    session_year_id = session_year.id if session_year else None
+    cache_name = "student_home_charts:%s:%s" % (request.user.id, SessionYearScope.session_year_key(session_year))
+    charts = DashboardCache.cached_context(cache_name, lambda: DashboardStats.student_home_charts(request.user.id, session_year_id))
+    return JsonResponse(charts)
+
+
 def student_view_attendance(request):
     student = Students.objects.get(admin=request.user.id) # Getting Logged in Student Data
     course = student.course_id # Getting Course Enrolled of LoggedIn Student
@@ -73,24 +65,52 @@ def student_view_attendance_post(request):
         # Getting Student Data Based on Logged in Data
         stud_obj = Students.objects.get(admin=user_obj)
 
-        # Now Accessing Attendance Data based on the Range of Date Selected and Subject Selected
-        attendance = Attendance.objects.filter(attendance_date__range=(start_date_parse, end_date_parse), subject_id=subject_obj)
-        # Getting Attendance Report based on the attendance details obtained above
-        attendance_reports = AttendanceReport.objects.filter(attendance_id__in=attendance, student_id=stud_obj)
+        # Now Accessing Attendance Data based on the Range of Date Selected and Subject Selected,
+        # from AttendanceReport rows or from registers in compact storage
+        attendance_reports = AttendanceStorage.student_attendance(stud_obj.id, subject_obj.id, start_date_parse, end_date_parse)
 
         # for attendance_report in attendance_reports:
         #     print("Date: "+ str(attendance_report.attendance_id.attendance_date), "Status: "+ str(attendance_report.status))
 
         # messages.success(request, "Attendacne View Success")
 
+        # Present/Absent totals of each month of the range, from the Monthly Rollup day masks
+        monthly_summary = AttendanceStorage.student_monthly_summary(stud_obj.id, subject_obj.id, start_date_parse, end_date_parse)
+
         context = {
             "subject_obj": subject_obj,
-            "attendance_reports": attendance_reports
+            "attendance_reports": attendance_reports,
+            "monthly_summary": monthly_summary
         }
 
         return render(request, 'student_template/student_attendance_data.html', context)
        
 
+def student_attendance_calendar(request):
+    # Day by day attendance of the logged in Student in every Subject, as JSON
+    # ?month=YYYY-MM (default: this month), or ?start=YYYY-MM&end=YYYY-MM for a range
+    try:
+        today = datetime.date.today().strftime('%Y-%m')
+        start_month = datetime.datetime.strptime(request.GET.get('start', request.GET.get('month', today)), '%Y-%m').date()
+        end_month = datetime.datetime.strptime(request.GET.get('end', start_month.strftime('%Y-%m')), '%Y-%m').date()
+    except ValueError:
+        return JsonResponse({"error": "Invalid month"}, status=400)
+    if end_month < start_month:
+        return JsonResponse({"error": "Invalid month range"}, status=400)
+
+    student_id = Students.objects.filter(admin=request.user.id).values_list('id', flat=True).get()
+    subjects, days = AttendanceStorage.student_calendar(student_id, start_month, end_month)
+    return JsonResponse({
+        "start": start_month.strftime('%Y-%m'),
+        "end": end_month.strftime('%Y-%m'),
+        "subjects": [{"id": subject_id, "name": subject_name} for subject_id, subject_name in subjects.items()],
+        "days": [
+            {"date": day.isoformat(), "subject_id": subject_id, "session_year_id": session_year_id, "status": status}
+            for day, subject_id, session_year_id, status in days
+        ],
+    })
+
+
 def student_apply_leave(request):
     student_obj = Students.objects.get(admin=request.user.id)
     leave_data = LeaveReportStudent.objects.filter(student_id=student_obj)
@@ -178,6 +198,8 @@ def student_profile_update(request):
             student = Students.objects.get(admin=customuser.id)
             student.address = address
             student.save()
+            # The name is listed in the roster of the Student's Course
+            RosterCache.invalidate(RosterCache.student_roster(student))
             
             messages.success(request, "Profile Updated Successfully")
             return redirect('student_profile')
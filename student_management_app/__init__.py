@@ -0,0 +1 @@
+default_app_config = 'student_management_app.apps.StudentManagementAppConfig'
@@ -3,3 +3,8 @@ from django.apps import AppConfig
 
 class StudentManagementAppConfig(AppConfig):
     name = 'student_management_app'
+
+    def ready(self):
+        from django.core import checks
+        from student_management_app import AttendanceQueue
+        checks.register(AttendanceQueue.check_shared_cache)
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from student_management_app import AttendanceStorage, DashboardCache, DashboardCounters
+from student_management_app.models import Attendance
+
+
+class Command(BaseCommand):
+    help = "Moves the Attendance registers to another storage mode (see AttendanceStorage.py), a chunk at a time"
+
+    def add_arguments(self, parser):
+        parser.add_argument('storage_mode', choices=AttendanceStorage.STORAGE_MODES, help="Storage the registers are moved to")
+        parser.add_argument('--chunk-size', type=int, default=200, help="Number of registers converted per transaction")
+
+    def handle(self, *args, **options):
+        storage_mode = options['storage_mode']
+        # The Statuses of compact registers are read per Student from the Rollup day masks
+        if storage_mode != AttendanceStorage.ROWS and not DashboardCounters.rollups_complete():
+            self.stdout.write("The Monthly Attendance Rollups are out of date, rebuilding them first")
+            DashboardCounters.rebuild_rollups()
+        attendance_ids = list(Attendance.objects.exclude(storage_mode=storage_mode).order_by('id').values_list('id', flat=True))
+        for start in range(0, len(attendance_ids), options['chunk_size']):
+            with transaction.atomic():
+                for attendance in Attendance.objects.filter(id__in=attendance_ids[start:start + options['chunk_size']]):
+                    AttendanceStorage.convert_register(attendance, storage_mode)
+            self.stdout.write("%s/%s registers" % (min(start + options['chunk_size'], len(attendance_ids)), len(attendance_ids)))
+        warning = DashboardCache.stale_dashboards_warning()
+        if warning:
+            self.stderr.write(self.style.WARNING(warning))
+        self.stdout.write(self.style.SUCCESS("Attendance Storage Converted Successfully."))
@@ -0,0 +1,56 @@
+import csv
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from student_management_app import AttendanceService, DashboardCache, DashboardCounters
+
+
+class Command(BaseCommand):
+    help = ("Imports Attendance from a CSV file with the columns student (username), subject (id or name), "
+            "session_year (id), attendance_date and status (1/0, P/A, present/absent)")
+
+    def add_arguments(self, parser):
+        parser.add_argument('csv_file', help="Path of the CSV file")
+        parser.add_argument('--chunk-size', type=int, default=5000, help="Number of rows written per transaction")
+        parser.add_argument('--date-format', default="%Y-%m-%d", help="strptime format of attendance_date")
+        parser.add_argument('--delimiter', default=",", help="CSV delimiter")
+        parser.add_argument('--skip-rebuild', action='store_true', help="Do not rebuild the Dashboard Counters after importing")
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+
+        def progress(stats):
+            elapsed = max(time.monotonic() - started, 0.001)
+            self.stdout.write("%s rows, %s reports saved, %s skipped, %s errors (%.0f rows/s)" % (
+                stats.rows, stats.reports, stats.skipped, len(stats.errors), stats.rows / elapsed
+            ))
+
+        try:
+            csv_file = open(options['csv_file'], newline='', encoding='utf-8-sig')
+        except OSError as error:
+            raise CommandError(error)
+        with csv_file:
+            reader = csv.DictReader(csv_file, delimiter=options['delimiter'])
+            stats = AttendanceService.import_attendance(
+                reader, chunk_size=options['chunk_size'], date_format=options['date_format'], progress=progress
+            )
+
+        for line_number, error in stats.errors[:20]:
+            self.stderr.write("Line %s: %s" % (line_number, error))
+        if len(stats.errors) > 20:
+            self.stderr.write("... and %s more errors" % (len(stats.errors) - 20))
+
+        # bulk_create does not go through DashboardCounters
+        if options['skip_rebuild']:
+            self.stdout.write("Run rebuild_dashboard_counters and rebuild_attendance_rollups to update the Dashboards.")
+        else:
+            DashboardCounters.rebuild_counters()
+            DashboardCounters.rebuild_rollups()
+
+        warning = DashboardCache.stale_dashboards_warning()
+        if warning:
+            self.stderr.write(self.style.WARNING(warning))
+        self.stdout.write(self.style.SUCCESS("Attendance Imported Successfully: %s registers, %s reports in %.1fs." % (
+            stats.registers, stats.reports, time.monotonic() - started
+        )))
@@ -0,0 +1,48 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from student_management_app import AttendanceQueue, DashboardCache
+
+
+class Command(BaseCommand):
+    help = "Saves the Attendance registers waiting in the queue (see ATTENDANCE_QUEUE), a batch at a time"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=AttendanceQueue.QUEUE_BATCH_SIZE, help="Number of registers saved per transaction")
+        parser.add_argument('--loop', action='store_true', help="Keep running, checking the queue every --interval seconds when it is empty")
+        parser.add_argument('--interval', type=float, default=1, help="Seconds between two checks of an empty queue with --loop")
+
+    def handle(self, *args, **options):
+        # The Dashboard versions bumped here must reach the server processes
+        if not DashboardCache.cache_is_shared():
+            raise CommandError("The cache backend is LocMemCache, which the server processes do not see: "
+                               "configure a shared cache (see CACHES in settings.py) to run the worker.")
+
+        released = AttendanceQueue.release_jobs()
+        if released:
+            self.stdout.write("Retrying %s interrupted registers" % released)
+
+        failed = False
+        while True:
+            try:
+                if failed:
+                    # Jobs left "processing" if the failed batch could not be put back in the queue
+                    AttendanceQueue.release_jobs()
+                    failed = False
+                processed = AttendanceQueue.process_jobs(options['batch_size'])
+            except Exception as error:
+                # The batch is back in the queue (see process_jobs), keep running with --loop
+                if not options['loop']:
+                    raise CommandError("Failed to save a batch: %s" % error)
+                self.stderr.write("Failed to save a batch, retrying: %s" % error)
+                failed = True
+                time.sleep(options['interval'])
+                continue
+            if processed:
+                self.stdout.write("Saved %s registers" % processed)
+            elif not options['loop']:
+                break
+            else:
+                time.sleep(options['interval'])
+        self.stdout.write(self.style.SUCCESS("Attendance Queue Processed Successfully."))
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from student_management_app import DashboardCache, DashboardCounters
+
+
+class Command(BaseCommand):
+    help = "Rebuilds the Monthly Attendance Rollups from the Attendance registers, a chunk of Subjects at a time"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=50, help="Number of Subjects (not Students, as before compact storage) processed per transaction")
+
+    def handle(self, *args, **options):
+        def progress(done, total):
+            self.stdout.write("%s/%s Subjects" % (done, total))
+
+        DashboardCounters.rebuild_rollups(chunk_size=options['chunk_size'], progress=progress)
+        warning = DashboardCache.stale_dashboards_warning()
+        if warning:
+            self.stderr.write(self.style.WARNING(warning))
+        self.stdout.write(self.style.SUCCESS("Monthly Attendance Rollups Rebuilt Successfully."))
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from student_management_app import DashboardCache, DashboardCounters
+
+
+class Command(BaseCommand):
+    help = "Rebuilds the dashboard Counter tables from the Attendance and Leave data"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help="Number of Counter rows inserted per query")
+
+    def handle(self, *args, **options):
+        DashboardCounters.rebuild_counters(batch_size=options['batch_size'])
+        warning = DashboardCache.stale_dashboards_warning()
+        if warning:
+            self.stderr.write(self.style.WARNING(warning))
+        self.stdout.write(self.style.SUCCESS("Dashboard Counters Rebuilt Successfully."))
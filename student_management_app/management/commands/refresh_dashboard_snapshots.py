@@ -0,0 +1,23 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from student_management_app import DashboardSnapshots
+
+
+class Command(BaseCommand):
+    help = "Recomputes the stale HOD Dashboard snapshots (see DASHBOARD_SNAPSHOT_TTL)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help="Recompute every snapshot, stale or not")
+        parser.add_argument('--loop', action='store_true', help="Keep running, checking the snapshots every --interval seconds")
+        parser.add_argument('--interval', type=int, default=30, help="Seconds between two checks with --loop")
+
+    def handle(self, *args, **options):
+        while True:
+            for name in DashboardSnapshots.refresh_stale(force=options['all']):
+                self.stdout.write("Refreshed %s" % name)
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
+        self.stdout.write(self.style.SUCCESS("Dashboard Snapshots Refreshed Successfully."))
@@ -0,0 +1,117 @@
+# Generated by Django 3.0.7 on 2026-10-18 03:33
+
+from django.db import migrations, models
+from django.db.models import Count, Q
+import django.db.models.deletion
+
+
+# The Counters of an existing database are filled here, the same way
+# rebuild_dashboard_counters does, so the Dashboards never read empty tables
+# after upgrading.
+
+def fill_counters(apps, schema_editor):
+    Attendance = apps.get_model('student_management_app', 'Attendance')
+    AttendanceReport = apps.get_model('student_management_app', 'AttendanceReport')
+    LeaveReportStudent = apps.get_model('student_management_app', 'LeaveReportStudent')
+    LeaveReportStaff = apps.get_model('student_management_app', 'LeaveReportStaff')
+    StudentAttendanceCounter = apps.get_model('student_management_app', 'StudentAttendanceCounter')
+    SubjectAttendanceCounter = apps.get_model('student_management_app', 'SubjectAttendanceCounter')
+    StudentLeaveCounter = apps.get_model('student_management_app', 'StudentLeaveCounter')
+    StaffLeaveCounter = apps.get_model('student_management_app', 'StaffLeaveCounter')
+    db_alias = schema_editor.connection.alias
+
+    student_rows = AttendanceReport.objects.using(db_alias).order_by().values_list('student_id', 'attendance_id__session_year_id').annotate(
+        present=Count('id', filter=Q(status=True)),
+        absent=Count('id', filter=Q(status=False)),
+    )
+    StudentAttendanceCounter.objects.using(db_alias).bulk_create([
+        StudentAttendanceCounter(student_id_id=student_id, session_year_id_id=session_year_id, present_count=present, absent_count=absent)
+        for student_id, session_year_id, present, absent in student_rows.iterator()
+    ], batch_size=1000)
+
+    subject_counters = {}
+    for subject_id, session_year_id, total in Attendance.objects.using(db_alias).order_by().values_list('subject_id', 'session_year_id').annotate(total=Count('id')):
+        subject_counters[(subject_id, session_year_id)] = SubjectAttendanceCounter(
+            subject_id_id=subject_id, session_year_id_id=session_year_id, attendance_count=total
+        )
+    report_rows = AttendanceReport.objects.using(db_alias).order_by().values_list('attendance_id__subject_id', 'attendance_id__session_year_id').annotate(
+        present=Count('id', filter=Q(status=True)),
+        absent=Count('id', filter=Q(status=False)),
+    )
+    for subject_id, session_year_id, present, absent in report_rows:
+        counter = subject_counters[(subject_id, session_year_id)]
+        counter.present_count = present
+        counter.absent_count = absent
+    SubjectAttendanceCounter.objects.using(db_alias).bulk_create(subject_counters.values(), batch_size=1000)
+
+    # Only Approved (1) leaves are counted
+    StudentLeaveCounter.objects.using(db_alias).bulk_create([
+        StudentLeaveCounter(student_id_id=student_id, approved_count=total)
+        for student_id, total in LeaveReportStudent.objects.using(db_alias).filter(leave_status=1).order_by().values_list('student_id').annotate(total=Count('id'))
+    ], batch_size=1000)
+    StaffLeaveCounter.objects.using(db_alias).bulk_create([
+        StaffLeaveCounter(staff_id_id=staff_id, approved_count=total)
+        for staff_id, total in LeaveReportStaff.objects.using(db_alias).filter(leave_status=1).order_by().values_list('staff_id').annotate(total=Count('id'))
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('student_management_app', '0005_studentresult'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StudentLeaveCounter',
+            fields=[
+                ('id', models.AutoField(primary_key=True, serialize=False)),
+                ('approved_count', models.IntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('student_id', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, to='student_management_app.Students')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='StaffLeaveCounter',
+            fields=[
+                ('id', models.AutoField(primary_key=True, serialize=False)),
+                ('approved_count', models.IntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('staff_id', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, to='student_management_app.Staffs')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='SubjectAttendanceCounter',
+            fields=[
+                ('id', models.AutoField(primary_key=True, serialize=False)),
+                ('attendance_count', models.IntegerField(default=0)),
+                ('present_count', models.IntegerField(default=0)),
+                ('absent_count', models.IntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('session_year_id', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='student_management_app.SessionYearModel')),
+                ('subject_id', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='student_management_app.Subjects')),
+            ],
+            options={
+                'unique_together': {('subject_id', 'session_year_id')},
+            },
+        ),
+        migrations.CreateModel(
+            name='StudentAttendanceCounter',
+            fields=[
+                ('id', models.AutoField(primary_key=True, serialize=False)),
+                ('present_count', models.IntegerField(default=0)),
+                ('absent_count', models.IntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('session_year_id', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='student_management_app.SessionYearModel')),
+                ('student_id', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='student_management_app.Students')),
+            ],
+            options={
+                'unique_together': {('student_id', 'session_year_id')},
+            },
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
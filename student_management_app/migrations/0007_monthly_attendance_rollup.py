@@ -0,0 +1,54 @@
+# Generated by Django 3.0.7 on 2026-10-18 03:40
+
+from django.db import migrations, models
+from django.db.models import Count, Q
+from django.db.models.functions import TruncMonth
+import django.db.models.deletion
+
+
+def fill_rollups(apps, schema_editor):
+    # Rollups of the existing AttendanceReport rows, one Subject at a time
+    Subjects = apps.get_model('student_management_app', 'Subjects')
+    AttendanceReport = apps.get_model('student_management_app', 'AttendanceReport')
+    MonthlyAttendanceRollup = apps.get_model('student_management_app', 'MonthlyAttendanceRollup')
+    db_alias = schema_editor.connection.alias
+
+    for subject_id in Subjects.objects.using(db_alias).order_by('id').values_list('id', flat=True):
+        rows = AttendanceReport.objects.using(db_alias).filter(attendance_id__subject_id=subject_id).order_by().values_list(
+            'student_id', 'attendance_id__session_year_id', TruncMonth('attendance_id__attendance_date'),
+        ).annotate(
+            present=Count('id', filter=Q(status=True)),
+            absent=Count('id', filter=Q(status=False)),
+        )
+        MonthlyAttendanceRollup.objects.using(db_alias).bulk_create([
+            MonthlyAttendanceRollup(student_id_id=student_id, subject_id_id=subject_id, session_year_id_id=session_year_id, month=month, present_count=present, absent_count=absent)
+            for student_id, session_year_id, month, present, absent in rows
+        ], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('student_management_app', '0006_dashboard_counters'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MonthlyAttendanceRollup',
+            fields=[
+                ('id', models.AutoField(primary_key=True, serialize=False)),
+                ('month', models.DateField()),
+                ('present_count', models.IntegerField(default=0)),
+                ('absent_count', models.IntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('session_year_id', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='student_management_app.SessionYearModel')),
+                ('student_id', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='student_management_app.Students')),
+                ('subject_id', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='student_management_app.Subjects')),
+            ],
+            options={
+                'unique_together': {('student_id', 'subject_id', 'session_year_id', 'month')},
+            },
+        ),
+        migrations.RunPython(fill_rollups, migrations.RunPython.noop),
+    ]
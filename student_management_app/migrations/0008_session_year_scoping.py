@@ -0,0 +1,86 @@
+# Generated by Django 3.0.7 on 2026-10-18 03:41
+
+from django.db import migrations, models
+from django.db.models import Count
+import django.db.models.deletion
+
+from student_management_app.SessionYearScope import find_session_year
+
+
+def scope_leave_counters(apps, schema_editor):
+    # The Leave Counters filled by 0006 are split by the Session Year of each leave_date
+    SessionYearModel = apps.get_model('student_management_app', 'SessionYearModel')
+    db_alias = schema_editor.connection.alias
+    session_years = list(SessionYearModel.objects.using(db_alias).order_by('-session_start_year').values_list('session_start_year', 'session_end_year', 'id'))
+
+    for leave_name, counter_name, owner_field in (
+        ('LeaveReportStudent', 'StudentLeaveCounter', 'student_id'),
+        ('LeaveReportStaff', 'StaffLeaveCounter', 'staff_id'),
+    ):
+        LeaveReport = apps.get_model('student_management_app', leave_name)
+        LeaveCounter = apps.get_model('student_management_app', counter_name)
+        totals = {}
+        leaves = LeaveReport.objects.using(db_alias).filter(leave_status=1).order_by().values_list(owner_field, 'leave_date').annotate(total=Count('id'))
+        for owner_id, leave_date, total in leaves.iterator():
+            key = (owner_id, find_session_year(leave_date, session_years))
+            totals[key] = totals.get(key, 0) + total
+        LeaveCounter.objects.using(db_alias).all().delete()
+        LeaveCounter.objects.using(db_alias).bulk_create([
+            LeaveCounter(**{owner_field + "_id": owner_id, "session_year_id_id": session_year_id, "approved_count": total})
+            for (owner_id, session_year_id), total in totals.items()
+        ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('student_management_app', '0007_monthly_attendance_rollup'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='staffleavecounter',
+            name='session_year_id',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, to='student_management_app.SessionYearModel'),
+        ),
+        migrations.AddField(
+            model_name='studentleavecounter',
+            name='session_year_id',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, to='student_management_app.SessionYearModel'),
+        ),
+        migrations.AlterField(
+            model_name='staffleavecounter',
+            name='staff_id',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='student_management_app.Staffs'),
+        ),
+        migrations.AlterField(
+            model_name='studentleavecounter',
+            name='student_id',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='student_management_app.Students'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='staffleavecounter',
+            unique_together={('session_year_id', 'staff_id')},
+        ),
+        migrations.AlterUniqueTogether(
+            name='studentattendancecounter',
+            unique_together={('session_year_id', 'student_id')},
+        ),
+        migrations.AlterUniqueTogether(
+            name='studentleavecounter',
+            unique_together={('session_year_id', 'student_id')},
+        ),
+        migrations.AlterUniqueTogether(
+            name='subjectattendancecounter',
+            unique_together={('session_year_id', 'subject_id')},
+        ),
+        migrations.AddIndex(
+            model_name='monthlyattendancerollup',
+            index=models.Index(fields=['student_id', 'session_year_id', 'month'], name='student_man_student_660890_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='students',
+            index=models.Index(fields=['session_year_id', 'course_id'], name='student_man_session_6a872f_idx'),
+        ),
+        migrations.RunPython(scope_leave_counters, migrations.RunPython.noop),
+    ]
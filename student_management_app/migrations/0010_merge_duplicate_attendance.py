@@ -0,0 +1,116 @@
+from django.db import migrations, transaction
+from django.db.models import Count, Max, Min, Q
+from django.db.models.functions import TruncMonth
+
+
+# Merges duplicated Attendance registers (same Subject, Session Year and date)
+# and duplicated AttendanceReport rows (same Student in one register) before
+# 0011 makes them unique. Duplicates are merged a chunk at a time, each chunk
+# in its own transaction, so large tables are not locked for the whole run.
+# The Counters and Rollups filled by 0006 and 0007 counted the duplicates, so
+# those of the Subjects and Students concerned are recomputed afterwards.
+
+CHUNK_SIZE = 500
+
+
+def merge_duplicate_attendance(apps, schema_editor):
+    Attendance = apps.get_model('student_management_app', 'Attendance')
+    AttendanceReport = apps.get_model('student_management_app', 'AttendanceReport')
+    db_alias = schema_editor.connection.alias
+
+    # The oldest register is kept and receives the reports of the others
+    registers = list(
+        Attendance.objects.using(db_alias).order_by().values('subject_id', 'session_year_id', 'attendance_date')
+        .annotate(total=Count('id'), keep_id=Min('id')).filter(total__gt=1)
+        .values_list('subject_id', 'session_year_id', 'attendance_date', 'keep_id')
+    )
+    subject_ids = set(subject_id for subject_id, session_year_id, attendance_date, keep_id in registers)
+    for start in range(0, len(registers), CHUNK_SIZE):
+        with transaction.atomic(using=db_alias):
+            for subject_id, session_year_id, attendance_date, keep_id in registers[start:start + CHUNK_SIZE]:
+                others = Attendance.objects.using(db_alias).filter(
+                    subject_id=subject_id, session_year_id=session_year_id, attendance_date=attendance_date
+                ).exclude(id=keep_id)
+                AttendanceReport.objects.using(db_alias).filter(attendance_id__in=others).update(attendance_id=keep_id)
+                others.delete()
+
+    # The latest report of a Student in a register is kept
+    reports = list(
+        AttendanceReport.objects.using(db_alias).order_by().values('attendance_id', 'student_id')
+        .annotate(total=Count('id'), keep_id=Max('id')).filter(total__gt=1)
+        .values_list('attendance_id', 'student_id', 'keep_id')
+    )
+    subject_ids.update(Attendance.objects.using(db_alias).filter(
+        id__in=set(attendance_id for attendance_id, student_id, keep_id in reports)
+    ).values_list('subject_id', flat=True))
+    for start in range(0, len(reports), CHUNK_SIZE):
+        with transaction.atomic(using=db_alias):
+            for attendance_id, student_id, keep_id in reports[start:start + CHUNK_SIZE]:
+                AttendanceReport.objects.using(db_alias).filter(
+                    attendance_id=attendance_id, student_id=student_id
+                ).exclude(id=keep_id).delete()
+
+    if subject_ids:
+        recount_attendance(apps, db_alias, subject_ids)
+
+
+def recount_attendance(apps, db_alias, subject_ids):
+    # Counters and Rollups of the merged Subjects and of their Students, from the
+    # AttendanceReport rows (the only storage at this point)
+    Attendance = apps.get_model('student_management_app', 'Attendance')
+    AttendanceReport = apps.get_model('student_management_app', 'AttendanceReport')
+    StudentAttendanceCounter = apps.get_model('student_management_app', 'StudentAttendanceCounter')
+    SubjectAttendanceCounter = apps.get_model('student_management_app', 'SubjectAttendanceCounter')
+    MonthlyAttendanceRollup = apps.get_model('student_management_app', 'MonthlyAttendanceRollup')
+    statuses = {
+        "present": Count('id', filter=Q(status=True)),
+        "absent": Count('id', filter=Q(status=False)),
+    }
+
+    with transaction.atomic(using=db_alias):
+        subject_counters = {}
+        for subject_id, session_year_id, total in Attendance.objects.using(db_alias).filter(subject_id__in=subject_ids).order_by().values_list('subject_id', 'session_year_id').annotate(total=Count('id')):
+            subject_counters[(subject_id, session_year_id)] = SubjectAttendanceCounter(
+                subject_id_id=subject_id, session_year_id_id=session_year_id, attendance_count=total
+            )
+        report_rows = AttendanceReport.objects.using(db_alias).filter(attendance_id__subject_id__in=subject_ids).order_by().values_list(
+            'attendance_id__subject_id', 'attendance_id__session_year_id'
+        ).annotate(**statuses)
+        for subject_id, session_year_id, present, absent in report_rows:
+            counter = subject_counters[(subject_id, session_year_id)]
+            counter.present_count = present
+            counter.absent_count = absent
+        SubjectAttendanceCounter.objects.using(db_alias).filter(subject_id__in=subject_ids).delete()
+        SubjectAttendanceCounter.objects.using(db_alias).bulk_create(subject_counters.values(), batch_size=1000)
+
+        student_ids = set(AttendanceReport.objects.using(db_alias).filter(attendance_id__subject_id__in=subject_ids).values_list('student_id', flat=True))
+        student_rows = AttendanceReport.objects.using(db_alias).filter(student_id__in=student_ids).order_by().values_list(
+            'student_id', 'attendance_id__session_year_id'
+        ).annotate(**statuses)
+        StudentAttendanceCounter.objects.using(db_alias).filter(student_id__in=student_ids).delete()
+        StudentAttendanceCounter.objects.using(db_alias).bulk_create([
+            StudentAttendanceCounter(student_id_id=student_id, session_year_id_id=session_year_id, present_count=present, absent_count=absent)
+            for student_id, session_year_id, present, absent in student_rows.iterator()
+        ], batch_size=1000)
+
+        rollup_rows = AttendanceReport.objects.using(db_alias).filter(attendance_id__subject_id__in=subject_ids).order_by().values_list(
+            'student_id', 'attendance_id__subject_id', 'attendance_id__session_year_id', TruncMonth('attendance_id__attendance_date'),
+        ).annotate(**statuses)
+        MonthlyAttendanceRollup.objects.using(db_alias).filter(subject_id__in=subject_ids).delete()
+        MonthlyAttendanceRollup.objects.using(db_alias).bulk_create([
+            MonthlyAttendanceRollup(student_id_id=student_id, subject_id_id=subject_id, session_year_id_id=session_year_id, month=month, present_count=present, absent_count=absent)
+            for student_id, subject_id, session_year_id, month, present, absent in rollup_rows.iterator()
+        ], batch_size=500)
+
+
+class Migration(migrations.Migration):
+    # Every chunk commits on its own
+    atomic = False
+
+    dependencies = [
+        ('student_management_app', '0009_dashboard_snapshot'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_attendance, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 3.0.7 on 2026-10-18 03:53
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('student_management_app', '0010_merge_duplicate_attendance'),
+    ]
+
+    operations = [
+        migrations.AlterUniqueTogether(
+            name='attendance',
+            unique_together={('subject_id', 'session_year_id', 'attendance_date')},
+        ),
+        migrations.AlterUniqueTogether(
+            name='attendancereport',
+            unique_together={('attendance_id', 'student_id')},
+        ),
+    ]
@@ -0,0 +1,77 @@
+# Generated by Django 3.0.7 on 2026-10-18 03:59
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def fill_rollup_days(apps, schema_editor):
+    # Day masks of the existing Rollups, computed one Subject at a time
+    Subjects = apps.get_model('student_management_app', 'Subjects')
+    AttendanceReport = apps.get_model('student_management_app', 'AttendanceReport')
+    MonthlyAttendanceRollup = apps.get_model('student_management_app', 'MonthlyAttendanceRollup')
+    db_alias = schema_editor.connection.alias
+
+    for subject_id in Subjects.objects.using(db_alias).order_by('id').values_list('id', flat=True):
+        days = {}
+        reports = AttendanceReport.objects.using(db_alias).filter(attendance_id__subject_id=subject_id).values_list(
+            'student_id', 'attendance_id__session_year_id', 'attendance_id__attendance_date', 'status'
+        )
+        for student_id, session_year_id, attendance_date, status in reports.iterator():
+            present_days, absent_days = days.get((student_id, session_year_id, attendance_date.replace(day=1)), (0, 0))
+            day = 1 << (attendance_date.day - 1)
+            if status:
+                present_days |= day
+            else:
+                absent_days |= day
+            days[(student_id, session_year_id, attendance_date.replace(day=1))] = (present_days, absent_days)
+
+        rollups = list(MonthlyAttendanceRollup.objects.using(db_alias).filter(subject_id=subject_id))
+        for rollup in rollups:
+            rollup.present_days, rollup.absent_days = days.get((rollup.student_id_id, rollup.session_year_id_id, rollup.month), (0, 0))
+        MonthlyAttendanceRollup.objects.using(db_alias).bulk_update(rollups, ['present_days', 'absent_days'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('student_management_app', '0011_attendance_unique'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AttendanceRoster',
+            fields=[
+                ('id', models.AutoField(primary_key=True, serialize=False)),
+                ('student_ids', models.TextField()),
+                ('checksum', models.CharField(max_length=64, unique=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='attendance',
+            name='status_bits',
+            field=models.BinaryField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='attendance',
+            name='storage_mode',
+            field=models.CharField(choices=[('rows', 'AttendanceReport rows'), ('packed', 'Packed Statuses')], default='rows', max_length=10),
+        ),
+        migrations.AddField(
+            model_name='monthlyattendancerollup',
+            name='absent_days',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='monthlyattendancerollup',
+            name='present_days',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='attendance',
+            name='roster',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, to='student_management_app.AttendanceRoster'),
+        ),
+        migrations.RunPython(fill_rollup_days, migrations.RunPython.noop),
+    ]
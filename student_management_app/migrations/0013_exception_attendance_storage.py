@@ -0,0 +1,23 @@
+# Generated by Django 3.0.7 on 2026-10-18 04:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('student_management_app', '0012_packed_attendance_storage'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='attendance',
+            name='absent_student_ids',
+            field=models.TextField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='attendance',
+            name='storage_mode',
+            field=models.CharField(choices=[('rows', 'AttendanceReport rows'), ('packed', 'Packed Statuses'), ('exceptions', 'Absent Students')], default='rows', max_length=10),
+        ),
+    ]
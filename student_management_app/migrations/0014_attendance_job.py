@@ -0,0 +1,32 @@
+# Generated by Django 3.0.7 on 2026-10-18 04:04
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('student_management_app', '0013_exception_attendance_storage'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AttendanceJob',
+            fields=[
+                ('id', models.AutoField(primary_key=True, serialize=False)),
+                ('payload', models.TextField()),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('processing', 'Processing'), ('done', 'Done'), ('error', 'Error')], default='pending', max_length=10)),
+                ('attendance_id', models.IntegerField(blank=True, null=True)),
+                ('error', models.TextField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('staff_id', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='attendancejob',
+            index=models.Index(fields=['status', 'id'], name='student_man_status_e211ba_idx'),
+        ),
+    ]
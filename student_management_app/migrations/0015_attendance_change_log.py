@@ -0,0 +1,30 @@
+# Generated by Django 3.0.7 on 2026-10-18 04:08
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('student_management_app', '0014_attendance_job'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AttendanceChangeLog',
+            fields=[
+                ('id', models.AutoField(primary_key=True, serialize=False)),
+                ('changes', models.TextField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('attendance_id', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='student_management_app.Attendance')),
+                ('editor_id', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='attendancechangelog',
+            index=models.Index(fields=['attendance_id', 'created_at'], name='student_man_attenda_980cfe_idx'),
+        ),
+    ]
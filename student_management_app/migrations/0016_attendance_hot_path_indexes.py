@@ -0,0 +1,21 @@
+# Generated by Django 3.0.7 on 2026-10-18 04:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('student_management_app', '0015_attendance_change_log'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='attendance',
+            index=models.Index(fields=['subject_id', 'attendance_date'], name='student_man_subject_b07db1_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='attendancereport',
+            index=models.Index(fields=['student_id', 'attendance_id', 'status'], name='student_man_student_3d00bf_idx'),
+        ),
+    ]
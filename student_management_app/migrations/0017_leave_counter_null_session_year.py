@@ -0,0 +1,38 @@
+# Generated by Django 3.0.7 on 2026-10-18 04:28
+
+from django.db import migrations, models
+from django.db.models import Count, Min, Sum
+
+
+def merge_duplicate_leave_counters(apps, schema_editor):
+    # Leave Counters without a Session Year were not unique: each Student / Staff
+    # keeps its oldest one, with the total of the others
+    db_alias = schema_editor.connection.alias
+    for counter_name, owner_field in (('StudentLeaveCounter', 'student_id'), ('StaffLeaveCounter', 'staff_id')):
+        LeaveCounter = apps.get_model('student_management_app', counter_name)
+        duplicates = LeaveCounter.objects.using(db_alias).filter(session_year_id=None).order_by().values(owner_field).annotate(
+            total=Count('id'), keep_id=Min('id'), approved=Sum('approved_count')
+        ).filter(total__gt=1).values_list(owner_field, 'keep_id', 'approved')
+        for owner_id, keep_id, approved in list(duplicates):
+            counters = LeaveCounter.objects.using(db_alias).filter(session_year_id=None, **{owner_field: owner_id})
+            counters.exclude(id=keep_id).delete()
+            counters.update(approved_count=approved)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('student_management_app', '0016_attendance_hot_path_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_leave_counters, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='staffleavecounter',
+            constraint=models.UniqueConstraint(condition=models.Q(session_year_id__isnull=True), fields=('staff_id',), name='staffleavecounter_no_session_year'),
+        ),
+        migrations.AddConstraint(
+            model_name='studentleavecounter',
+            constraint=models.UniqueConstraint(condition=models.Q(session_year_id__isnull=True), fields=('student_id',), name='studentleavecounter_no_session_year'),
+        ),
+    ]
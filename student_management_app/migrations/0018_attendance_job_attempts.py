@@ -0,0 +1,18 @@
+# Generated by Django 3.0.7 on 2026-10-18 04:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('student_management_app', '0017_leave_counter_null_session_year'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='attendancejob',
+            name='attempts',
+            field=models.IntegerField(default=0),
+        ),
+    ]
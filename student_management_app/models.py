@@ -1,8 +1,10 @@
 from django.contrib.auth.models import AbstractUser
 from django.db import models
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 
+from . import DashboardCache
+
 
 
 class SessionYearModel(models.Model):
@@ -73,17 +75,44 @@ class Students(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
     objects = models.Manager()
 
+    class Meta:
+        # Dashboards count and list the Students of one Session Year (per Course)
+        indexes = [models.Index(fields=['session_year_id', 'course_id'])]
+
+
+# Ordered list of the Students of an Attendance register kept in compact storage.
+# Registers with the same Students share one row.
+class AttendanceRoster(models.Model):
+    id = models.AutoField(primary_key=True)
+    student_ids = models.TextField()
+    checksum = models.CharField(max_length=64, unique=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    objects = models.Manager()
+
 
 class Attendance(models.Model):
     # Subject Attendance
+    storage_mode_data = (("rows", "AttendanceReport rows"), ("packed", "Packed Statuses"), ("exceptions", "Absent Students"))
     id = models.AutoField(primary_key=True)
     subject_id = models.ForeignKey(Subjects, on_delete=models.DO_NOTHING)
     attendance_date = models.DateField()
     session_year_id = models.ForeignKey(SessionYearModel, on_delete=models.CASCADE)
+    # How the Statuses of the register are stored (see AttendanceStorage.py)
+    storage_mode = models.CharField(default="rows", choices=storage_mode_data, max_length=10)
+    roster = models.ForeignKey(AttendanceRoster, on_delete=models.PROTECT, null=True, blank=True)
+    status_bits = models.BinaryField(null=True, blank=True)
+    absent_student_ids = models.TextField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     objects = models.Manager()
 
+    class Meta:
+        # One register per Subject, Session Year and day
+        unique_together = [['subject_id', 'session_year_id', 'attendance_date']]
+        # The registers of a Subject in a date range (Student attendance page)
+        indexes = [models.Index(fields=['subject_id', 'attendance_date'])]
+
 
 class AttendanceReport(models.Model):
     # Individual Student Attendance
@@ -95,6 +124,26 @@ class AttendanceReport(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
     objects = models.Manager()
 
+    class Meta:
+        unique_together = [['attendance_id', 'student_id']]
+        # Statuses of one Student across registers, read from the index alone
+        indexes = [models.Index(fields=['student_id', 'attendance_id', 'status'])]
+
+
+# Append-only history of the Attendance registers: one row per save or update,
+# holding only the Students that changed (see AttendanceHistory.py)
+class AttendanceChangeLog(models.Model):
+    id = models.AutoField(primary_key=True)
+    attendance_id = models.ForeignKey(Attendance, on_delete=models.CASCADE)
+    editor_id = models.ForeignKey(CustomUser, on_delete=models.SET_NULL, null=True, blank=True)
+    changes = models.TextField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    objects = models.Manager()
+
+    class Meta:
+        indexes = [models.Index(fields=['attendance_id', 'created_at'])]
+
 
 class LeaveReportStudent(models.Model):
     id = models.AutoField(primary_key=True)
@@ -168,6 +217,127 @@ class StudentResult(models.Model):
     objects = models.Manager()
 
 
+# Denormalized Counters used by the Dashboards
+# They are kept up to date by DashboardCounters when Attendance or Leave data changes
+# and can be rebuilt with "python manage.py rebuild_dashboard_counters"
+class StudentAttendanceCounter(models.Model):
+    id = models.AutoField(primary_key=True)
+    student_id = models.ForeignKey(Students, on_delete=models.CASCADE)
+    session_year_id = models.ForeignKey(SessionYearModel, on_delete=models.CASCADE)
+    present_count = models.IntegerField(default=0)
+    absent_count = models.IntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    objects = models.Manager()
+
+    class Meta:
+        unique_together = [['session_year_id', 'student_id']]
+
+
+class SubjectAttendanceCounter(models.Model):
+    id = models.AutoField(primary_key=True)
+    subject_id = models.ForeignKey(Subjects, on_delete=models.CASCADE)
+    session_year_id = models.ForeignKey(SessionYearModel, on_delete=models.CASCADE)
+    attendance_count = models.IntegerField(default=0)
+    present_count = models.IntegerField(default=0)
+    absent_count = models.IntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    objects = models.Manager()
+
+    class Meta:
+        unique_together = [['session_year_id', 'subject_id']]
+
+
+# Leaves are counted in the Session Year their leave_date falls in (NULL when in none,
+# with its own unique constraint since unique_together does not cover NULL).
+# They are re-mapped whenever a Session Year is added, edited or deleted.
+class StudentLeaveCounter(models.Model):
+    id = models.AutoField(primary_key=True)
+    student_id = models.ForeignKey(Students, on_delete=models.CASCADE)
+    session_year_id = models.ForeignKey(SessionYearModel, on_delete=models.CASCADE, null=True)
+    approved_count = models.IntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    objects = models.Manager()
+
+    class Meta:
+        unique_together = [['session_year_id', 'student_id']]
+        constraints = [models.UniqueConstraint(fields=['student_id'], condition=models.Q(session_year_id__isnull=True), name='studentleavecounter_no_session_year')]
+
+
+class StaffLeaveCounter(models.Model):
+    id = models.AutoField(primary_key=True)
+    staff_id = models.ForeignKey(Staffs, on_delete=models.CASCADE)
+    session_year_id = models.ForeignKey(SessionYearModel, on_delete=models.CASCADE, null=True)
+    approved_count = models.IntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    objects = models.Manager()
+
+    class Meta:
+        unique_together = [['session_year_id', 'staff_id']]
+        constraints = [models.UniqueConstraint(fields=['staff_id'], condition=models.Q(session_year_id__isnull=True), name='staffleavecounter_no_session_year')]
+
+
+# Present/Absent totals of a Student in a Subject for one month (month is its first day)
+# Filled by DashboardCounters together with the Counters above and rebuilt with
+# "python manage.py rebuild_attendance_rollups". The day masks are the per-Student
+# index of the registers kept in compact storage (see AttendanceStorage.py).
+class MonthlyAttendanceRollup(models.Model):
+    id = models.AutoField(primary_key=True)
+    student_id = models.ForeignKey(Students, on_delete=models.CASCADE)
+    subject_id = models.ForeignKey(Subjects, on_delete=models.CASCADE)
+    session_year_id = models.ForeignKey(SessionYearModel, on_delete=models.CASCADE)
+    month = models.DateField()
+    present_count = models.IntegerField(default=0)
+    absent_count = models.IntegerField(default=0)
+    # Days of the month the Student was Present / Absent (bit 0 is the 1st)
+    present_days = models.IntegerField(default=0)
+    absent_days = models.IntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    objects = models.Manager()
+
+    class Meta:
+        unique_together = [['student_id', 'subject_id', 'session_year_id', 'month']]
+        # Student Dashboards read one Session Year of a Student
+        indexes = [models.Index(fields=['student_id', 'session_year_id', 'month'])]
+
+
+# Precomputed Dashboard data (JSON) served while it is recomputed in the background
+# See DashboardSnapshots.py and "python manage.py refresh_dashboard_snapshots"
+class DashboardSnapshot(models.Model):
+    id = models.AutoField(primary_key=True)
+    name = models.CharField(max_length=255, unique=True)
+    data = models.TextField()
+    computed_at = models.DateTimeField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    objects = models.Manager()
+
+
+# Attendance registers waiting to be saved by "python manage.py process_attendance_queue"
+# See AttendanceQueue.py
+class AttendanceJob(models.Model):
+    status_data = (("pending", "Pending"), ("processing", "Processing"), ("done", "Done"), ("error", "Error"))
+    id = models.AutoField(primary_key=True)
+    staff_id = models.ForeignKey(CustomUser, on_delete=models.CASCADE)
+    payload = models.TextField()
+    status = models.CharField(default="pending", choices=status_data, max_length=10)
+    attendance_id = models.IntegerField(null=True, blank=True)
+    error = models.TextField(null=True, blank=True)
+    # Times the job was put back in the queue after a transient error
+    attempts = models.IntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    objects = models.Manager()
+
+    class Meta:
+        indexes = [models.Index(fields=['status', 'id'])]
+
+
+
 #Creating Django Signals
 
 # It's like trigger in database. It will run only when Data is Added in CustomUser model
@@ -194,6 +364,32 @@ def save_user_profile(sender, instance, **kwargs):
         instance.staffs.save()
     if instance.user_type == 3:
         instance.students.save()
-    
 
 
+
+# Invalidating the cached Dashboards whenever the data they show changes
+DASHBOARD_CACHE_ENTITIES = {
+    Attendance: "attendance",
+    AttendanceReport: "attendance",
+    Students: "students",
+    SessionYearModel: "sessions",
+    Subjects: "subjects",
+    Courses: "courses",
+    Staffs: "staffs",
+    CustomUser: "users",
+    LeaveReportStudent: "leave",
+    LeaveReportStaff: "leave",
+    StudentResult: "result",
+}
+
+
+def bump_dashboard_cache(sender, instance, **kwargs):
+    # Logging in only updates last_login, which no Dashboard shows
+    if kwargs.get('update_fields') == frozenset(['last_login']):
+        return
+    DashboardCache.bump(DASHBOARD_CACHE_ENTITIES[sender])
+
+
+for dashboard_model in DASHBOARD_CACHE_ENTITIES:
+    post_save.connect(bump_dashboard_cache, sender=dashboard_model)
+    post_delete.connect(bump_dashboard_cache, sender=dashboard_model)
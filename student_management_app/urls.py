@@ -11,6 +11,10 @@ urlpatterns = [
     path('get_user_details/', views.get_user_details, name="get_user_details"),
     path('logout_user/', views.logout_user, name="logout_user"),
     path('admin_home/', HodViews.admin_home, name="admin_home"),
+    path('admin_home_chart_data/', HodViews.admin_home_chart_data, name="admin_home_chart_data"),
+    path('admin_subject_chart_data/', HodViews.admin_subject_chart_data, name="admin_subject_chart_data"),
+    path('admin_staff_chart_data/', HodViews.admin_staff_chart_data, name="admin_staff_chart_data"),
+    path('admin_student_chart_data/', HodViews.admin_student_chart_data, name="admin_student_chart_data"),
     path('add_staff/', HodViews.add_staff, name="add_staff"),
     path('add_staff_save/', HodViews.add_staff_save, name="add_staff_save"),
     path('manage_staff/', HodViews.manage_staff, name="manage_staff"),
@@ -63,9 +67,12 @@ urlpatterns = [
 
     # URLS for Staff
     path('staff_home/', StaffViews.staff_home, name="staff_home"),
+    path('staff_home_chart_data/', StaffViews.staff_home_chart_data, name="staff_home_chart_data"),
     path('staff_take_attendance/', StaffViews.staff_take_attendance, name="staff_take_attendance"),
     path('get_students/', StaffViews.get_students, name="get_students"),
     path('save_attendance_data/', StaffViews.save_attendance_data, name="save_attendance_data"),
+    path('save_attendance_batch/', StaffViews.save_attendance_batch, name="save_attendance_batch"),
+    path('attendance_job_status/', StaffViews.attendance_job_status, name="attendance_job_status"),
     path('staff_update_attendance/', StaffViews.staff_update_attendance, name="staff_update_attendance"),
     path('get_attendance_dates/', StaffViews.get_attendance_dates, name="get_attendance_dates"),
     path('get_attendance_student/', StaffViews.get_attendance_student, name="get_attendance_student"),
@@ -81,8 +88,10 @@ urlpatterns = [
 
     # URSL for Student
     path('student_home/', StudentViews.student_home, name="student_home"),
+    path('student_home_chart_data/', StudentViews.student_home_chart_data, name="student_home_chart_data"),
     path('student_view_attendance/', StudentViews.student_view_attendance, name="student_view_attendance"),
     path('student_view_attendance_post/', StudentViews.student_view_attendance_post, name="student_view_attendance_post"),
+    path('student_attendance_calendar/', StudentViews.student_attendance_calendar, name="student_attendance_calendar"),
     path('student_apply_leave/', StudentViews.student_apply_leave, name="student_apply_leave"),
     path('student_apply_leave_save/', StudentViews.student_apply_leave_save, name="student_apply_leave_save"),
     path('student_feedback/', StudentViews.student_feedback, name="student_feedback"),
@@ -91,6 +91,37 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/3.0/topics/cache/
+# The Dashboards are cached with version counters (see DashboardCache.py) that
+# every write bumps. LocMemCache is private to one process, so it is only right
+# when every write happens in a single server process. With more than one server
+# process, ATTENDANCE_QUEUE (its worker writes) or the management commands that
+# write attendance, use a cache shared by all of them (Memcached, Redis, ...).
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
+# Seconds a cached Dashboard is kept when nothing changes
+DASHBOARD_CACHE_TIMEOUT = 300
+
+# Seconds a cached Course roster (Take Attendance / Add Result pages) or Course
+# of a Subject is kept when nothing changes it (see RosterCache.py)
+ROSTER_CACHE_TIMEOUT = 3600
+
+# Seconds after which the HOD Dashboard snapshot is recomputed in the background
+# while the previous one keeps being served (see DashboardSnapshots.py).
+# None disables the snapshots and the Dashboard is built on request.
+DASHBOARD_SNAPSHOT_TTL = None
+
+# Recompute stale snapshots in a thread of the web process. Set to False when
+# "python manage.py refresh_dashboard_snapshots --loop" runs instead.
+DASHBOARD_SNAPSHOT_THREAD = True
+
+
 # Password validation
 # https://docs.djangoproject.com/en/3.0/ref/settings/#auth-password-validators
 
@@ -142,3 +173,13 @@ AUTH_USER_MODEL = "student_management_app.CustomUser"
 
 # Registering Custom Backend "EmailBackEnd"
 AUTHENTICATION_BACKENDS = ['student_management_app.EmailBackEnd.EmailBackEnd']
+
+# Storage of new Attendance registers (see AttendanceStorage.py): "rows" keeps one
+# AttendanceReport row per Student, "packed" keeps the whole register in one row,
+# "exceptions" keeps the register in one row with only the Absent Students listed.
+ATTENDANCE_STORAGE_MODE = "rows"
+
+# Queue the registers posted by the Take Attendance page instead of saving them in
+# the request (see AttendanceQueue.py). Requires "python manage.py process_attendance_queue --loop"
+# and a shared cache backend (see CACHES).
+ATTENDANCE_QUEUE = False
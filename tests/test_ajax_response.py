@@ -0,0 +1,60 @@
+import json
+
+from django.test import TestCase
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+
+from student_management_app import AttendanceService
+from student_management_app.models import Students
+
+from tests.test_attendance_service import AttendanceServiceSetUp
+
+User = get_user_model()
+
+
+class TestAjaxResponse(AttendanceServiceSetUp, TestCase):
+    def setUp(self):
+        super().setUp()
+        for user in self.student_users:
+            Students.objects.filter(admin=user).update(session_year_id=self.session)
+        self.attendance = AttendanceService.save_attendance(self.subject.id, self.session.id, "2025-03-10", self.statuses(self.student_users))
+
+    def fetch_students(self, **params):
+        return self.client.post(reverse('get_students'), {"subject": self.subject.id, "session_year": self.session.id, **params})
+
+    def test_legacy_format_is_the_default(self):
+        """Sem versão, a resposta continua sendo uma string com o JSON dentro."""
+        response = self.fetch_students()
+        students = json.loads(response.json())
+        self.assertEqual([student["id"] for student in students], [user.id for user in self.student_users])
+
+        response = self.client.post(reverse('get_attendance_dates'), {"subject": self.subject.id, "session_year_id": self.session.id})
+        self.assertEqual(json.loads(response.json()), [{"id": self.attendance.id, "attendance_date": "2025-03-10", "session_year_id": self.session.id}])
+
+    def test_version_2_is_encoded_once(self):
+        """Na versão 2 o JSON é codificado uma vez, em objetos ou em colunas."""
+        rows = self.fetch_students(version=2).json()
+        self.assertEqual([student["id"] for student in rows], [user.id for user in self.student_users])
+
+        columns = self.client.post(reverse('get_attendance_student'), {"attendance_date": self.attendance.id, "version": 2, "layout": "columns"}).json()
+        self.assertEqual(columns["ids"], [user.id for user in self.student_users])
+        self.assertEqual(columns["statuses"], [True, True, True])
+        self.assertEqual(len(columns["names"]), 3)
+
+        self.assertEqual(self.fetch_students(version=9).status_code, 400)
+
+    def test_hod_endpoints_share_the_formats(self):
+        """Os endpoints do HOD aceitam os mesmos formatos."""
+        hod_user = User.objects.create_user(username="hodajax", password="hodpass", user_type=1)
+        self.client.force_login(hod_user)
+        response = self.client.post(reverse('admin_get_attendance_dates'), {
+            "subject": self.subject.id, "session_year_id": self.session.id, "version": 2, "layout": "columns",
+        })
+        self.assertEqual(response.json(), {"ids": [self.attendance.id], "attendance_dates": ["2025-03-10"], "session_year_ids": [self.session.id]})
+
+        # Sem chamadas, as colunas vêm vazias
+        self.attendance.delete()
+        response = self.client.post(reverse('admin_get_attendance_dates'), {
+            "subject": self.subject.id, "session_year_id": self.session.id, "version": 2, "layout": "columns",
+        })
+        self.assertEqual(response.json(), {"ids": [], "attendance_dates": [], "session_year_ids": []})
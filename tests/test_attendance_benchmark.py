@@ -0,0 +1,21 @@
+from django.test import TestCase
+
+from benchmarks import attendance_benchmark
+
+
+class TestAttendanceBenchmark(TestCase):
+    def test_measures_every_endpoint_and_class_size(self):
+        """O benchmark mede cada endpoint para cada tamanho de turma."""
+        results = attendance_benchmark.run_benchmark(sizes=(3, 7), repeat=2)
+
+        self.assertEqual(
+            [(row["endpoint"], row["class_size"]) for row in results],
+            [(endpoint, size) for size in (3, 7) for endpoint in attendance_benchmark.ENDPOINTS],
+        )
+        for row in results:
+            self.assertEqual(row["runs"], 2)
+            self.assertGreater(row["queries"], 0)
+            self.assertLessEqual(row["min_ms"], row["median_ms"])
+
+        baseline = {"results": [dict(row, median_ms=row["median_ms"] * 2) for row in results]}
+        self.assertEqual(len(attendance_benchmark.compare(results, baseline)), len(results))
@@ -0,0 +1,47 @@
+import json
+
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from student_management_app import AttendanceHistory, AttendanceService
+from student_management_app.models import Students, Attendance, AttendanceChangeLog
+
+from tests.test_attendance_service import AttendanceServiceSetUp
+
+
+class TestAttendanceHistory(AttendanceServiceSetUp, TestCase):
+    def test_one_compact_log_row_per_write(self):
+        """Cada gravação acrescenta uma única linha com só os alunos alterados."""
+        first, second, third = [Students.objects.get(admin=user).id for user in self.student_users]
+        self.post_attendance(self.statuses(self.student_users[:2]) + self.statuses(self.student_users[2:], 0))
+        attendance = Attendance.objects.get()
+        self.client.post(reverse('update_attendance_data'), data={
+            "student_ids": json.dumps(self.statuses(self.student_users[1:])),
+            "attendance_date": attendance.id,
+        })
+
+        logs = list(AttendanceChangeLog.objects.order_by('id').values_list('editor_id', 'changes'))
+        self.assertEqual(logs, [
+            (self.staff_user.id, "p%d,p%d,a%d" % (first, second, third)),
+            (self.staff_user.id, "+%d" % third),
+        ])
+        # Nada mudou: nenhuma linha nova
+        AttendanceService.update_attendance(attendance, self.statuses(self.student_users[1:]))
+        self.assertEqual(AttendanceChangeLog.objects.count(), 2)
+
+    def test_register_at_rebuilds_past_statuses(self):
+        """O registro pode ser reconstruído como estava em qualquer momento."""
+        before = timezone.now()
+        first, second, third = [Students.objects.get(admin=user).id for user in self.student_users]
+        attendance = AttendanceService.save_attendance(self.subject.id, self.session.id, "2025-03-10", self.statuses(self.student_users[:2]))
+        created = timezone.now()
+        AttendanceService.update_attendance(attendance, self.statuses(self.student_users[:1], 0))
+        updated = timezone.now()
+        AttendanceService.save_attendance(self.subject.id, self.session.id, "2025-03-10", self.statuses(self.student_users))
+
+        self.assertIsNone(AttendanceHistory.register_at(attendance, before))
+        self.assertEqual(AttendanceHistory.register_at(attendance, created), {first: True, second: True})
+        self.assertEqual(AttendanceHistory.register_at(attendance, updated), {first: False, second: True})
+        self.assertEqual(AttendanceHistory.register_at(attendance, timezone.now()), {first: True, second: True, third: True})
+        self.assertEqual([len(changes) for created_at, editor_id, changes in AttendanceHistory.register_history(attendance)], [2, 1, 2])
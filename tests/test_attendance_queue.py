@@ -0,0 +1,139 @@
+import io
+import os
+import tempfile
+from unittest import mock
+
+from django.db import OperationalError
+from django.test import TestCase, override_settings
+from django.core.cache import cache
+from django.core.management.base import CommandError
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+
+from student_management_app import AttendanceQueue, AttendanceService, DashboardCache
+from student_management_app.models import Attendance, AttendanceReport, AttendanceJob, StudentAttendanceCounter
+
+from tests.test_attendance_service import AttendanceServiceSetUp
+
+User = get_user_model()
+
+
+class StopWorker(BaseException):
+    # Interrompe o laço do worker nos testes
+    pass
+
+
+# O worker grava em outro processo, então a fila exige um cache compartilhado
+SHARED_CACHE = {'default': {
+    'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+    'LOCATION': os.path.join(tempfile.gettempdir(), 'student_management_queue_tests'),
+}}
+
+
+@override_settings(ATTENDANCE_QUEUE=True, CACHES=SHARED_CACHE)
+class TestAttendanceQueue(AttendanceServiceSetUp, TestCase):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+
+    def job_status(self, job_id):
+        return self.client.get(reverse('attendance_job_status'), {"job_id": job_id})
+
+    def test_register_is_saved_by_the_worker(self):
+        """A chamada é enfileirada e gravada depois pelo worker."""
+        response = self.post_attendance(self.statuses(self.student_users))
+        self.assertEqual(response.content, b"OK")
+        job_id = response["X-Attendance-Job"]
+        self.assertFalse(Attendance.objects.exists())
+        self.assertEqual(self.job_status(job_id).json()["status"], "pending")
+
+        call_command('process_attendance_queue', stdout=io.StringIO())
+        status = self.job_status(job_id).json()
+        self.assertEqual(status["status"], "done")
+        self.assertEqual(status["attendance_id"], Attendance.objects.get().id)
+        self.assertEqual(AttendanceReport.objects.filter(status=True).count(), 3)
+        self.assertEqual(StudentAttendanceCounter.objects.count(), 3)
+
+    def test_invalid_register_is_not_queued(self):
+        """Alunos inexistentes são recusados antes de entrar na fila."""
+        response = self.post_attendance(self.statuses(self.student_users) + [{"id": 999999, "status": 1}])
+        self.assertEqual(response.content, b"Error")
+        self.assertFalse(AttendanceJob.objects.exists())
+
+    def test_batch_saves_every_job_and_reports_errors(self):
+        """O worker grava um lote de chamadas e marca as que falharam."""
+        for day in range(10, 13):
+            self.post_attendance(self.statuses(self.student_users), "2025-03-%d" % day)
+        bad = AttendanceQueue.enqueue(self.staff_user.id, self.subject.id, self.session.id, "not a date", self.statuses(self.student_users))
+
+        self.assertEqual(AttendanceQueue.process_jobs(batch_size=2), 2)
+        self.assertEqual(AttendanceQueue.process_jobs(batch_size=2), 2)
+        self.assertEqual(AttendanceQueue.process_jobs(batch_size=2), 0)
+        self.assertEqual(Attendance.objects.count(), 3)
+        bad.refresh_from_db()
+        self.assertEqual(bad.status, "error")
+        self.assertTrue(bad.error)
+
+    def test_interrupted_jobs_are_retried_and_jobs_are_private(self):
+        """Jobs interrompidos voltam para a fila e só o professor vê os seus."""
+        job_id = self.post_attendance(self.statuses(self.student_users))["X-Attendance-Job"]
+        AttendanceJob.objects.update(status="processing")
+        call_command('process_attendance_queue', stdout=io.StringIO())
+        self.assertEqual(AttendanceJob.objects.get().status, "done")
+
+        other_staff = User.objects.create_user(username="outroprofessor", password="staffpass", user_type=2)
+        self.client.force_login(other_staff)
+        self.assertEqual(self.job_status(job_id).status_code, 404)
+
+    def test_locked_register_is_retried(self):
+        """Um "database is locked" numa chamada devolve o job à fila em vez de marcá-lo como erro."""
+        job_id = self.post_attendance(self.statuses(self.student_users))["X-Attendance-Job"]
+        with mock.patch.object(AttendanceService, 'save_attendance', side_effect=OperationalError("database is locked")):
+            AttendanceQueue.process_jobs()
+        job = AttendanceJob.objects.get(id=job_id)
+        self.assertEqual((job.status, job.attempts), ("pending", 1))
+
+        AttendanceQueue.process_jobs()
+        self.assertEqual(AttendanceJob.objects.get(id=job_id).status, "done")
+        self.assertTrue(Attendance.objects.exists())
+
+    def test_failed_batch_goes_back_to_the_queue(self):
+        """Um lote que falha inteiro volta para a fila, até o limite de tentativas."""
+        self.post_attendance(self.statuses(self.student_users))
+        with mock.patch.object(AttendanceService, 'save_attendance_chunk', side_effect=OperationalError("database is locked")):
+            for attempt in range(1, AttendanceQueue.QUEUE_MAX_ATTEMPTS + 1):
+                with self.assertRaises(OperationalError):
+                    AttendanceQueue.process_jobs()
+                job = AttendanceJob.objects.get()
+                self.assertEqual(job.attempts, attempt)
+        self.assertEqual(job.status, "error")
+        self.assertEqual(job.error, "database is locked")
+
+    def test_worker_keeps_looping_after_a_failed_batch(self):
+        """Com --loop o worker informa o erro e continua processando."""
+        err = io.StringIO()
+        with mock.patch.object(AttendanceQueue, 'process_jobs', side_effect=[OperationalError("database is locked"), 1, StopWorker]) as process_jobs, \
+                mock.patch.object(AttendanceQueue, 'release_jobs', return_value=0) as release_jobs, \
+                mock.patch('time.sleep'):
+            with self.assertRaises(StopWorker):
+                call_command('process_attendance_queue', '--loop', stdout=io.StringIO(), stderr=err)
+        self.assertEqual(process_jobs.call_count, 3)
+        # Na partida e de novo depois da falha
+        self.assertEqual(release_jobs.call_count, 2)
+        self.assertIn("database is locked", err.getvalue())
+
+        with mock.patch.object(AttendanceQueue, 'process_jobs', side_effect=OperationalError("database is locked")):
+            with self.assertRaises(CommandError):
+                call_command('process_attendance_queue', stdout=io.StringIO())
+
+    def test_queue_requires_a_shared_cache(self):
+        """Com LocMemCache o worker não roda e a verificação do Django acusa o erro."""
+        self.assertEqual(AttendanceQueue.check_shared_cache(None), [])
+        with override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}):
+            self.assertFalse(DashboardCache.cache_is_shared())
+            self.assertEqual([error.id for error in AttendanceQueue.check_shared_cache(None)], ["student_management_app.E001"])
+            with self.assertRaises(CommandError):
+                call_command('process_attendance_queue', stdout=io.StringIO())
+            with override_settings(ATTENDANCE_QUEUE=False):
+                self.assertEqual(AttendanceQueue.check_shared_cache(None), [])
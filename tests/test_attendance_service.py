@@ -0,0 +1,239 @@
+import datetime
+import io
+import json
+import os
+import tempfile
+
+from django.test import TestCase, Client
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+
+from student_management_app import AttendanceService
+from student_management_app.models import (
+    Courses, SessionYearModel, Subjects, Students, Attendance, AttendanceReport,
+    StudentAttendanceCounter, SubjectAttendanceCounter
+)
+
+User = get_user_model()
+
+
+class AttendanceServiceSetUp:
+    def setUp(self):
+        self.course = Courses.objects.create(id=1, course_name="Curso Chamada")
+        self.session = SessionYearModel.objects.create(
+            id=1, session_start_year="2025-01-01", session_end_year="2025-12-31"
+        )
+        self.staff_user = User.objects.create_user(username="staffchamada", password="staffpass", user_type=2)
+        self.subject = Subjects.objects.create(subject_name="Geografia", course_id=self.course, staff_id=self.staff_user)
+        self.student_users = [self.create_student_user("alunochamada%d" % i) for i in range(3)]
+
+        self.client = Client()
+        self.client.force_login(self.staff_user)
+
+    def create_student_user(self, username):
+        return User.objects.create_user(username=username, password="studpass", user_type=3)
+
+    def statuses(self, users, status=1):
+        return [{"id": user.id, "status": status} for user in users]
+
+    def post_attendance(self, statuses, attendance_date="2025-03-10"):
+        return self.client.post(reverse('save_attendance_data'), data={
+            "student_ids": json.dumps(statuses),
+            "subject_id": self.subject.id,
+            "attendance_date": attendance_date,
+            "session_year_id": self.session.id,
+        })
+
+
+class TestSaveAttendance(AttendanceServiceSetUp, TestCase):
+    def test_saves_register_with_constant_number_of_queries(self):
+        """Salvar a chamada não faz uma consulta por aluno."""
+        # A primeira chamada da matéria também cria o contador da matéria
+        AttendanceService.save_attendance(self.subject.id, self.session.id, "2025-03-09", self.statuses(self.student_users))
+        with self.assertNumQueries(15):
+            AttendanceService.save_attendance(self.subject.id, self.session.id, "2025-03-10", self.statuses(self.student_users))
+
+        self.student_users += [self.create_student_user("extrachamada%d" % i) for i in range(20)]
+        with self.assertNumQueries(15):
+            AttendanceService.save_attendance(self.subject.id, self.session.id, "2025-03-11", self.statuses(self.student_users))
+        self.assertEqual(AttendanceReport.objects.count(), 3 + 3 + 23)
+
+    def test_unknown_student_saves_nothing(self):
+        """Um aluno inexistente faz a chamada inteira ser descartada."""
+        statuses = self.statuses(self.student_users) + [{"id": 999999, "status": 1}]
+        response = self.post_attendance(statuses)
+
+        self.assertEqual(response.content, b"Error")
+        self.assertFalse(Attendance.objects.exists())
+        self.assertFalse(AttendanceReport.objects.exists())
+        self.assertFalse(StudentAttendanceCounter.objects.exists())
+
+    def test_resubmitting_a_register_is_an_upsert(self):
+        """Reenviar a mesma chamada não duplica registros nem contagens."""
+        self.assertEqual(self.post_attendance(self.statuses(self.student_users, 0)).content, b"OK")
+        self.assertEqual(self.post_attendance(self.statuses(self.student_users, 0)).content, b"OK")
+        self.assertEqual(Attendance.objects.count(), 1)
+        self.assertEqual(AttendanceReport.objects.count(), 3)
+
+        # Só o que mudou (e o aluno novo) é gravado
+        new_user = self.create_student_user("alunonovochamada")
+        statuses = self.statuses(self.student_users[:2], 0) + self.statuses([self.student_users[2], new_user], 1)
+        self.assertEqual(self.post_attendance(statuses).content, b"OK")
+        self.assertEqual(Attendance.objects.count(), 1)
+        self.assertEqual(AttendanceReport.objects.count(), 4)
+
+        counters = dict(
+            (admin_id, (present, absent)) for admin_id, present, absent
+            in StudentAttendanceCounter.objects.values_list('student_id__admin', 'present_count', 'absent_count')
+        )
+        self.assertEqual(counters[self.student_users[0].id], (0, 1))
+        self.assertEqual(counters[self.student_users[2].id], (1, 0))
+        self.assertEqual(counters[new_user.id], (1, 0))
+        self.assertEqual(SubjectAttendanceCounter.objects.get(subject_id=self.subject).attendance_count, 1)
+
+    def test_view_saves_every_status(self):
+        """A view grava o status de cada aluno."""
+        statuses = [{"id": user.id, "status": status} for user, status in zip(self.student_users, [1, 0, "1"])]
+        self.assertEqual(self.post_attendance(statuses).content, b"OK")
+
+        saved = dict(AttendanceReport.objects.values_list('student_id__admin', 'status'))
+        self.assertEqual(saved, {self.student_users[0].id: True, self.student_users[1].id: False, self.student_users[2].id: True})
+
+
+class TestUpdateAttendance(AttendanceServiceSetUp, TestCase):
+    def post_update(self, attendance, statuses):
+        return self.client.post(reverse('update_attendance_data'), data={
+            "student_ids": json.dumps(statuses),
+            "attendance_date": attendance.id,
+        })
+
+    def test_only_changed_statuses_are_written(self):
+        """Somente os status alterados são gravados, e a resposta informa quantos."""
+        attendance = AttendanceService.save_attendance(self.subject.id, self.session.id, "2025-03-10", self.statuses(self.student_users, 0))
+        statuses = [{"id": user.id, "status": status} for user, status in zip(self.student_users, [1, 0, 1])]
+
+        response = self.post_update(attendance, statuses)
+        self.assertEqual(response.content, b"OK")
+        self.assertEqual(response["X-Attendance-Changed"], "2")
+        saved = dict(AttendanceReport.objects.values_list('student_id__admin', 'status'))
+        self.assertEqual(saved, {self.student_users[0].id: True, self.student_users[1].id: False, self.student_users[2].id: True})
+
+        # Reenviar o mesmo registro não altera nada
+        with self.assertNumQueries(3):
+            self.assertEqual(AttendanceService.update_attendance(attendance, statuses), 0)
+
+    def test_updates_with_constant_number_of_queries(self):
+        """A atualização faz um UPDATE por valor de status, não por aluno."""
+        self.student_users += [self.create_student_user("extraupdate%d" % i) for i in range(20)]
+        attendance = AttendanceService.save_attendance(self.subject.id, self.session.id, "2025-03-10", self.statuses(self.student_users, 0))
+        statuses = [{"id": user.id, "status": i % 2} for i, user in enumerate(self.student_users)]
+        with self.assertNumQueries(11):
+            self.assertEqual(AttendanceService.update_attendance(attendance, statuses), 11)
+
+        # Presenças e faltas mudam: um UPDATE por valor em cada tabela
+        statuses = [{"id": user.id, "status": 1 - i % 2} for i, user in enumerate(self.student_users)]
+        with self.assertNumQueries(14):
+            self.assertEqual(AttendanceService.update_attendance(attendance, statuses), 23)
+
+
+class TestSaveAttendanceBatch(AttendanceServiceSetUp, TestCase):
+    def post_batch(self, registers):
+        body = "\n".join(register if isinstance(register, str) else json.dumps(register) for register in registers)
+        return self.client.post(reverse('save_attendance_batch'), data=body, content_type="application/x-ndjson")
+
+    def register(self, attendance_date, status=1, **extra):
+        register = {
+            "subject_id": self.subject.id,
+            "attendance_date": attendance_date,
+            "session_year_id": self.session.id,
+            "student_ids": self.statuses(self.student_users, status),
+        }
+        register.update(extra)
+        return register
+
+    def test_saves_many_registers_with_per_register_results(self):
+        """Um lote NDJSON salva várias chamadas e devolve o resultado de cada uma."""
+        other_staff = User.objects.create_user(username="outroprof", password="staffpass", user_type=2)
+        other_subject = Subjects.objects.create(subject_name="Artes", course_id=self.course, staff_id=other_staff)
+        response = self.post_batch([
+            self.register("2025-03-10"),
+            "{nao e json",
+            self.register("2025-03-11", status=0),
+            self.register("2025-03-12", subject_id=other_subject.id),
+            "",
+            self.register("2025-03-13", student_ids=[{"id": 999999, "status": 1}]),
+            self.register("2025-03-10"),
+        ])
+
+        results = response.json()["results"]
+        self.assertEqual([result["line"] for result in results], [1, 2, 3, 4, 6, 7])
+        self.assertEqual([result["status"] for result in results], ["OK", "Error", "OK", "Error", "Error", "OK"])
+        # A mesma chamada reenviada no lote é a mesma Attendance
+        self.assertEqual(results[0]["attendance_id"], results[5]["attendance_id"])
+        self.assertEqual(Attendance.objects.count(), 2)
+        self.assertEqual(AttendanceReport.objects.count(), 6)
+        self.assertEqual(SubjectAttendanceCounter.objects.get(subject_id=self.subject).attendance_count, 2)
+
+    def test_malformed_registers_only_fail_their_own_line(self):
+        """Ids inválidos ou alunos fora do formato só dão erro na própria linha."""
+        response = self.post_batch([
+            self.register("2025-03-10", student_ids=[5]),
+            self.register("2025-03-11", subject_id="abc"),
+            self.register("2025-03-12", session_year_id=None),
+            self.register("2025-03-13", student_ids=[{"id": "x", "status": 1}]),
+            self.register("2025-03-14", student_ids=[{"status": 1}]),
+            "[1, 2]",
+            self.register("2025-03-15"),
+        ])
+        self.assertEqual(response.status_code, 200)
+        results = response.json()["results"]
+        self.assertEqual([result["status"] for result in results], ["Error"] * 6 + ["OK"])
+        self.assertEqual(Attendance.objects.count(), 1)
+
+    def test_registers_are_saved_in_chunks(self):
+        """Os registros são processados em blocos, com consultas compartilhadas por bloco."""
+        registers = [json.dumps(self.register("2025-04-%02d" % day)) for day in range(1, 6)]
+        results = AttendanceService.save_attendance_batch(registers, self.staff_user.id, chunk_size=2)
+        self.assertEqual([result["status"] for result in results], ["OK"] * 5)
+        self.assertEqual(Attendance.objects.count(), 5)
+
+
+class TestImportAttendance(AttendanceServiceSetUp, TestCase):
+    def write_csv(self, lines):
+        csv_file = tempfile.NamedTemporaryFile("w", suffix=".csv", delete=False)
+        csv_file.write("\n".join(["student,subject,session_year,attendance_date,status"] + lines) + "\n")
+        csv_file.close()
+        self.addCleanup(os.remove, csv_file.name)
+        return csv_file.name
+
+    def test_import_command_is_chunked_and_can_be_run_again(self):
+        """O comando importa em blocos, ignora linhas inválidas e pode ser repetido."""
+        usernames = [user.username for user in self.student_users]
+        path = self.write_csv([
+            "%s,%s,%s,2025-03-10,P" % (usernames[0], self.subject.id, self.session.id),
+            "%s,Geografia,%s,2025-03-10,A" % (usernames[1], self.session.id),
+            "%s,%s,%s,2025-03-11,1" % (usernames[0], self.subject.id, self.session.id),
+            "naoexiste,%s,%s,2025-03-11,1" % (self.subject.id, self.session.id),
+            "%s,%s,%s,10/03/2025,1" % (usernames[2], self.subject.id, self.session.id),
+        ])
+        out, err = io.StringIO(), io.StringIO()
+        call_command('import_attendance', path, '--chunk-size=2', stdout=out, stderr=err)
+
+        self.assertIn("Line 5", err.getvalue())
+        self.assertIn("Line 6", err.getvalue())
+        self.assertIn("rows/s", out.getvalue())
+        self.assertEqual(Attendance.objects.count(), 2)
+        self.assertEqual(
+            sorted(AttendanceReport.objects.values_list('student_id__admin__username', 'attendance_id__attendance_date', 'status')),
+            [
+                (usernames[0], datetime.date(2025, 3, 10), True),
+                (usernames[0], datetime.date(2025, 3, 11), True),
+                (usernames[1], datetime.date(2025, 3, 10), False),
+            ]
+        )
+        # Os contadores dos dashboards são reconstruídos no fim
+        self.assertEqual(SubjectAttendanceCounter.objects.get(subject_id=self.subject).attendance_count, 2)
+
+        call_command('import_attendance', path, '--skip-rebuild', stdout=io.StringIO(), stderr=io.StringIO())
+        self.assertEqual(AttendanceReport.objects.count(), 3)
@@ -0,0 +1,213 @@
+import datetime
+import io
+import json
+
+from django.test import TestCase, override_settings
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from django.core.management import call_command
+
+from student_management_app import AttendanceService, AttendanceStorage, DashboardCounters
+from student_management_app.models import (
+    Subjects, Students, SessionYearModel, Attendance, AttendanceReport, AttendanceRoster,
+    StudentAttendanceCounter, SubjectAttendanceCounter, MonthlyAttendanceRollup
+)
+
+from tests.test_attendance_service import AttendanceServiceSetUp
+
+User = get_user_model()
+
+
+def counters():
+    return (
+        sorted(StudentAttendanceCounter.objects.values_list('student_id', 'session_year_id', 'present_count', 'absent_count')),
+        sorted(SubjectAttendanceCounter.objects.values_list('subject_id', 'session_year_id', 'attendance_count', 'present_count', 'absent_count')),
+        sorted(MonthlyAttendanceRollup.objects.values_list('student_id', 'subject_id', 'month', 'present_count', 'absent_count', 'present_days', 'absent_days')),
+    )
+
+
+class TestAttendanceStorage(AttendanceServiceSetUp, TestCase):
+    def take_attendance(self):
+        first, second, third = self.student_users
+        AttendanceService.save_attendance(self.subject.id, self.session.id, "2025-03-10", self.statuses([first, second]) + self.statuses([third], 0))
+        AttendanceService.save_attendance(self.subject.id, self.session.id, "2025-03-12", self.statuses(self.student_users, 0))
+        attendance = Attendance.objects.get(attendance_date="2025-03-12")
+        AttendanceService.update_attendance(attendance, self.statuses([second]))
+        return attendance
+
+    def test_pack_and_unpack_statuses(self):
+        """Os status são guardados um bit por aluno."""
+        statuses = [True, False, True] + [False] * 6 + [True]
+        packed = AttendanceStorage.pack_statuses(statuses)
+        self.assertEqual(len(packed), 2)
+        self.assertEqual(AttendanceStorage.unpack_statuses(packed, len(statuses)), statuses)
+
+    def take_compact_attendance(self, storage_mode):
+        # Refaz as mesmas chamadas no formato compacto, devolve os contadores e leituras das duas versões
+        self.take_attendance()
+        rows = (counters(), [AttendanceStorage.read_register(attendance) for attendance in Attendance.objects.order_by('attendance_date')])
+        Attendance.objects.all().delete()
+        StudentAttendanceCounter.objects.all().delete()
+        SubjectAttendanceCounter.objects.all().delete()
+        MonthlyAttendanceRollup.objects.all().delete()
+
+        with override_settings(ATTENDANCE_STORAGE_MODE=storage_mode):
+            self.take_attendance()
+        compact = (counters(), [AttendanceStorage.read_register(attendance) for attendance in Attendance.objects.order_by('attendance_date')])
+        return rows, compact
+
+    def test_packed_register_matches_rows_register(self):
+        """Contadores, rollups e leituras são iguais nos dois formatos."""
+        rows, packed = self.take_compact_attendance(AttendanceStorage.PACKED)
+        # A chamada inteira fica numa única linha
+        self.assertFalse(AttendanceReport.objects.exists())
+        self.assertEqual(set(Attendance.objects.values_list('storage_mode', flat=True)), {AttendanceStorage.PACKED})
+        self.assertEqual(AttendanceRoster.objects.count(), 1)
+        self.assertEqual(packed, rows)
+
+        # Reconstruir a partir dos registros compactos dá o mesmo resultado
+        DashboardCounters.rebuild_counters()
+        DashboardCounters.rebuild_rollups()
+        self.assertEqual(counters(), rows[0])
+
+    def test_exceptions_register_only_lists_absent_students(self):
+        """Só as faltas são gravadas e as presenças são derivadas da turma."""
+        rows, exceptions = self.take_compact_attendance(AttendanceStorage.EXCEPTIONS)
+        self.assertFalse(AttendanceReport.objects.exists())
+        students = [Students.objects.get(admin=user).id for user in self.student_users]
+        self.assertEqual(
+            list(Attendance.objects.order_by('attendance_date').values_list('absent_student_ids', flat=True)),
+            [str(students[2]), "%d,%d" % (students[0], students[2])],
+        )
+        self.assertEqual(exceptions, rows)
+
+        DashboardCounters.rebuild_counters()
+        DashboardCounters.rebuild_rollups()
+        self.assertEqual(counters(), rows[0])
+
+    @override_settings(ATTENDANCE_STORAGE_MODE=AttendanceStorage.PACKED)
+    def test_pages_read_packed_registers(self):
+        """O aluno e o professor veem os status de chamadas compactas."""
+        attendance = self.take_attendance()
+        response = self.client.post(reverse('get_attendance_student'), {"attendance_date": attendance.id})
+        self.assertEqual([student["status"] for student in json.loads(response.json())], [False, True, False])
+
+        self.client.force_login(self.student_users[1])
+        response = self.client.post(reverse('student_view_attendance_post'), {
+            "subject": self.subject.id, "start_date": "2025-03-01", "end_date": "2025-03-31",
+        })
+        self.assertEqual([report["status"] for report in response.context["attendance_reports"]], [True, True])
+
+    def test_monthly_summary_counts_only_the_days_in_range(self):
+        """O resumo mensal conta só os dias do período, também em meses parciais."""
+        self.take_attendance()
+        self.client.force_login(self.student_users[0])
+        response = self.client.post(reverse('student_view_attendance_post'), {
+            "subject": self.subject.id, "start_date": "2025-03-11", "end_date": "2025-03-20",
+        })
+        self.assertEqual([report["attendance_date"] for report in response.context["attendance_reports"]], [datetime.date(2025, 3, 12)])
+        self.assertEqual(list(response.context["monthly_summary"]), [{"month": datetime.date(2025, 3, 1), "present": 0, "absent": 1}])
+
+        response = self.client.post(reverse('student_view_attendance_post'), {
+            "subject": self.subject.id, "start_date": "2025-02-15", "end_date": "2025-03-10",
+        })
+        self.assertEqual(list(response.context["monthly_summary"]), [{"month": datetime.date(2025, 3, 1), "present": 1, "absent": 0}])
+
+    def test_registers_of_two_session_years_on_the_same_day(self):
+        """Chamadas do mesmo dia em anos letivos diferentes não se misturam."""
+        other_session = SessionYearModel.objects.create(session_start_year="2024-08-01", session_end_year="2025-07-31")
+        first, second, third = self.student_users
+        AttendanceService.save_attendance(self.subject.id, self.session.id, "2025-03-10", self.statuses([first]) + self.statuses([second], 0))
+        with override_settings(ATTENDANCE_STORAGE_MODE=AttendanceStorage.PACKED):
+            AttendanceService.save_attendance(self.subject.id, other_session.id, "2025-03-10", self.statuses([first], 0) + self.statuses([third]))
+        students = [Students.objects.get(admin=user).id for user in self.student_users]
+        start, end = datetime.date(2025, 3, 1), datetime.date(2025, 3, 31)
+
+        # Cada chamada mostra o status do aluno nela, na ordem dos anos letivos
+        self.assertEqual([day["status"] for day in AttendanceStorage.student_attendance(students[0], self.subject.id, start, end)], [True, False])
+        # O aluno só vê as chamadas em que está
+        self.assertEqual([day["status"] for day in AttendanceStorage.student_attendance(students[1], self.subject.id, start, end)], [False])
+        self.assertEqual([day["status"] for day in AttendanceStorage.student_attendance(students[2], self.subject.id, start, end)], [True])
+
+        subjects, days = AttendanceStorage.student_calendar(students[0], start, start)
+        self.assertEqual(days, [
+            (datetime.date(2025, 3, 10), self.subject.id, self.session.id, True),
+            (datetime.date(2025, 3, 10), self.subject.id, other_session.id, False),
+        ])
+
+    def test_convert_storage_command(self):
+        """O comando converte as chamadas existentes sem mudar os status."""
+        self.take_attendance()
+        saved = [AttendanceStorage.read_register(attendance) for attendance in Attendance.objects.order_by('attendance_date')]
+
+        call_command('convert_attendance_storage', AttendanceStorage.PACKED, '--chunk-size=1', stdout=io.StringIO(), stderr=io.StringIO())
+        self.assertFalse(AttendanceReport.objects.exists())
+        self.assertEqual([AttendanceStorage.read_register(attendance) for attendance in Attendance.objects.order_by('attendance_date')], saved)
+
+        call_command('convert_attendance_storage', AttendanceStorage.EXCEPTIONS, stdout=io.StringIO(), stderr=io.StringIO())
+        self.assertEqual([AttendanceStorage.read_register(attendance) for attendance in Attendance.objects.order_by('attendance_date')], saved)
+
+        call_command('convert_attendance_storage', AttendanceStorage.ROWS, stdout=io.StringIO(), stderr=io.StringIO())
+        self.assertEqual(AttendanceReport.objects.count(), 6)
+        self.assertEqual([AttendanceStorage.read_register(attendance) for attendance in Attendance.objects.order_by('attendance_date')], saved)
+
+    def test_convert_rebuilds_missing_rollups(self):
+        """Sem rollups, o comando os reconstrói antes de compactar as chamadas."""
+        self.take_attendance()
+        saved = counters()[2]
+        MonthlyAttendanceRollup.objects.all().delete()
+        self.assertFalse(DashboardCounters.rollups_complete())
+
+        call_command('convert_attendance_storage', AttendanceStorage.PACKED, stdout=io.StringIO(), stderr=io.StringIO())
+        self.assertTrue(DashboardCounters.rollups_complete())
+        self.assertEqual(counters()[2], saved)
+        student_id = Students.objects.get(admin=self.student_users[1]).id
+        self.assertEqual(
+            [day["status"] for day in AttendanceStorage.student_attendance(student_id, self.subject.id, datetime.date(2025, 3, 1), datetime.date(2025, 3, 31))],
+            [True, True],
+        )
+
+    def test_register_rows_with_constant_number_of_queries(self):
+        """A lista de alunos da chamada é lida numa consulta, qualquer que seja a turma."""
+        self.student_users += [self.create_student_user("extraserializa%d" % i) for i in range(20)]
+        attendance = AttendanceService.save_attendance(self.subject.id, self.session.id, "2025-03-10", self.statuses(self.student_users))
+        with self.assertNumQueries(1):
+            rows = AttendanceStorage.register_rows(attendance)
+        self.assertEqual([admin_id for admin_id, name, status in rows], [user.id for user in self.student_users])
+
+        AttendanceStorage.convert_register(attendance, AttendanceStorage.PACKED)
+        with self.assertNumQueries(2):
+            self.assertEqual(AttendanceStorage.register_rows(attendance), rows)
+
+        # Os endpoints do professor e do HOD devolvem a mesma lista
+        hod_user = User.objects.create_user(username="hodserializa", password="hodpass", user_type=1)
+        staff_response = self.client.post(reverse('get_attendance_student'), {"attendance_date": attendance.id})
+        self.client.force_login(hod_user)
+        hod_response = self.client.post(reverse('admin_get_attendance_student'), {"attendance_date": attendance.id})
+        expected = [{"id": admin_id, "name": name, "status": status} for admin_id, name, status in rows]
+        self.assertEqual(json.loads(staff_response.json()), expected)
+        self.assertEqual(json.loads(hod_response.json()), expected)
+
+    def test_student_calendar_covers_every_subject(self):
+        """O calendário mensal do aluno junta todas as matérias numa consulta."""
+        other_subject = Subjects.objects.create(subject_name="Química", course_id=self.course, staff_id=self.staff_user)
+        self.take_attendance()
+        with override_settings(ATTENDANCE_STORAGE_MODE=AttendanceStorage.PACKED):
+            AttendanceService.save_attendance(other_subject.id, self.session.id, "2025-04-01", self.statuses(self.student_users[1:2], 0))
+        student_id = Students.objects.get(admin=self.student_users[1]).id
+
+        with self.assertNumQueries(1):
+            subjects, days = AttendanceStorage.student_calendar(student_id, datetime.date(2025, 3, 1), datetime.date(2025, 4, 1))
+        self.assertEqual(subjects, {self.subject.id: "Geografia", other_subject.id: "Química"})
+        self.assertEqual(days, [
+            (datetime.date(2025, 3, 10), self.subject.id, self.session.id, True),
+            (datetime.date(2025, 3, 12), self.subject.id, self.session.id, True),
+            (datetime.date(2025, 4, 1), other_subject.id, self.session.id, False),
+        ])
+
+        self.client.force_login(self.student_users[1])
+        response = self.client.get(reverse('student_attendance_calendar'), {"start": "2025-03", "end": "2025-04"})
+        self.assertEqual([day["date"] for day in response.json()["days"]], ["2025-03-10", "2025-03-12", "2025-04-01"])
+        response = self.client.get(reverse('student_attendance_calendar'), {"month": "2025-04"})
+        self.assertEqual(response.json()["days"], [{"date": "2025-04-01", "subject_id": other_subject.id, "session_year_id": self.session.id, "status": False}])
+        self.assertEqual(self.client.get(reverse('student_attendance_calendar'), {"month": "abril"}).status_code, 400)
@@ -0,0 +1,141 @@
+import datetime
+
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TransactionTestCase
+
+APP = 'student_management_app'
+
+
+class MigrationTestCase(TransactionTestCase):
+    # Migra o banco até migrate_from, cria os dados e migra até migrate_to
+    migrate_from = None
+    migrate_to = None
+
+    def setUp(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate([(APP, self.migrate_from)])
+        self.addCleanup(self.migrate_to_latest)
+        self.seed(executor.loader.project_state((APP, self.migrate_from)).apps)
+
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        executor.migrate([(APP, self.migrate_to)])
+        self.apps = executor.loader.project_state((APP, self.migrate_to)).apps
+
+    def migrate_to_latest(self):
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        executor.migrate(executor.loader.graph.leaf_nodes(APP))
+
+    def seed(self, apps):
+        CustomUser = apps.get_model(APP, 'CustomUser')
+        self.session = apps.get_model(APP, 'SessionYearModel').objects.create(
+            session_start_year=datetime.date(2025, 1, 1), session_end_year=datetime.date(2025, 12, 31)
+        )
+        course = apps.get_model(APP, 'Courses').objects.create(course_name="Curso")
+        staff_user = CustomUser.objects.create(username="professor", user_type=2)
+        self.staff = apps.get_model(APP, 'Staffs').objects.create(admin=staff_user, address="Rua")
+        self.subject = apps.get_model(APP, 'Subjects').objects.create(subject_name="História", course_id=course, staff_id=staff_user)
+        self.students = [
+            apps.get_model(APP, 'Students').objects.create(
+                admin=CustomUser.objects.create(username="aluno%d" % i, user_type=3),
+                gender="Female", address="Rua", course_id=course, session_year_id=self.session,
+            )
+            for i in range(2)
+        ]
+
+        Attendance = apps.get_model(APP, 'Attendance')
+        AttendanceReport = apps.get_model(APP, 'AttendanceReport')
+        for attendance_date, statuses in (("2025-03-10", (True, False)), ("2025-03-12", (True, True)), ("2025-04-02", (False, True))):
+            attendance = Attendance.objects.create(subject_id=self.subject, attendance_date=attendance_date, session_year_id=self.session)
+            for student, status in zip(self.students, statuses):
+                AttendanceReport.objects.create(attendance_id=attendance, student_id=student, status=status)
+
+        LeaveReportStudent = apps.get_model(APP, 'LeaveReportStudent')
+        LeaveReportStudent.objects.create(student_id=self.students[0], leave_date="2025-05-01", leave_message="-", leave_status=1)
+        LeaveReportStudent.objects.create(student_id=self.students[0], leave_date="2024-05-01", leave_message="-", leave_status=1)
+        LeaveReportStudent.objects.create(student_id=self.students[1], leave_date="2025-05-01", leave_message="-", leave_status=2)
+        apps.get_model(APP, 'LeaveReportStaff').objects.create(staff_id=self.staff, leave_date="2025-06-01", leave_message="-", leave_status=1)
+
+
+class TestCounterMigrations(MigrationTestCase):
+    migrate_from = '0005_studentresult'
+    migrate_to = '0008_session_year_scoping'
+
+    def test_counters_are_filled_on_upgrade(self):
+        """Os contadores de um banco existente são preenchidos pela migração."""
+        first, second = (student.id for student in self.students)
+        self.assertEqual(
+            sorted(self.apps.get_model(APP, 'StudentAttendanceCounter').objects.values_list('student_id', 'session_year_id', 'present_count', 'absent_count')),
+            [(first, self.session.id, 2, 1), (second, self.session.id, 2, 1)],
+        )
+        self.assertEqual(
+            list(self.apps.get_model(APP, 'SubjectAttendanceCounter').objects.values_list('subject_id', 'attendance_count', 'present_count', 'absent_count')),
+            [(self.subject.id, 3, 4, 2)],
+        )
+        # As licenças ficam no ano letivo da data de cada uma (None fora de todos)
+        self.assertEqual(
+            sorted(self.apps.get_model(APP, 'StudentLeaveCounter').objects.values_list('student_id', 'session_year_id', 'approved_count'), key=str),
+            sorted([(first, self.session.id, 1), (first, None, 1)], key=str),
+        )
+        self.assertEqual(
+            list(self.apps.get_model(APP, 'StaffLeaveCounter').objects.values_list('staff_id', 'session_year_id', 'approved_count')),
+            [(self.staff.id, self.session.id, 1)],
+        )
+
+
+class TestRollupMigrations(MigrationTestCase):
+    migrate_from = '0005_studentresult'
+    migrate_to = '0012_packed_attendance_storage'
+
+    def test_rollups_are_filled_on_upgrade(self):
+        """Os rollups mensais e as máscaras de dias são preenchidos pela migração."""
+        first, second = (student.id for student in self.students)
+        self.assertEqual(
+            sorted(self.apps.get_model(APP, 'MonthlyAttendanceRollup').objects.values_list(
+                'student_id', 'month', 'present_count', 'absent_count', 'present_days', 'absent_days'
+            )),
+            [
+                (first, datetime.date(2025, 3, 1), 2, 0, (1 << 9) | (1 << 11), 0),
+                (first, datetime.date(2025, 4, 1), 0, 1, 0, 1 << 1),
+                (second, datetime.date(2025, 3, 1), 1, 1, 1 << 11, 1 << 9),
+                (second, datetime.date(2025, 4, 1), 1, 0, 1 << 1, 0),
+            ],
+        )
+
+
+class TestDuplicateMergeMigration(MigrationTestCase):
+    migrate_from = '0005_studentresult'
+    migrate_to = '0012_packed_attendance_storage'
+
+    def seed(self, apps):
+        super().seed(apps)
+        # O registro de 10/03 duplicado e um status repetido no de 12/03
+        Attendance = apps.get_model(APP, 'Attendance')
+        AttendanceReport = apps.get_model(APP, 'AttendanceReport')
+        duplicate = Attendance.objects.create(subject_id=self.subject, attendance_date="2025-03-10", session_year_id=self.session)
+        AttendanceReport.objects.create(attendance_id=duplicate, student_id=self.students[0], status=True)
+        AttendanceReport.objects.create(attendance_id=Attendance.objects.get(attendance_date="2025-03-12"), student_id=self.students[1], status=True)
+
+    def test_counters_and_rollups_are_recounted_after_merging(self):
+        """Os contadores e rollups não contam os registros duplicados removidos."""
+        first, second = (student.id for student in self.students)
+        self.assertEqual(self.apps.get_model(APP, 'Attendance').objects.count(), 3)
+        self.assertEqual(
+            sorted(self.apps.get_model(APP, 'StudentAttendanceCounter').objects.values_list('student_id', 'present_count', 'absent_count')),
+            [(first, 2, 1), (second, 2, 1)],
+        )
+        self.assertEqual(
+            list(self.apps.get_model(APP, 'SubjectAttendanceCounter').objects.values_list('attendance_count', 'present_count', 'absent_count')),
+            [(3, 4, 2)],
+        )
+        self.assertEqual(
+            sorted(self.apps.get_model(APP, 'MonthlyAttendanceRollup').objects.values_list('student_id', 'month', 'present_count', 'absent_count', 'present_days')),
+            [
+                (first, datetime.date(2025, 3, 1), 2, 0, (1 << 9) | (1 << 11)),
+                (first, datetime.date(2025, 4, 1), 0, 1, 0),
+                (second, datetime.date(2025, 3, 1), 1, 1, 1 << 11),
+                (second, datetime.date(2025, 4, 1), 1, 0, 1 << 1),
+            ],
+        )
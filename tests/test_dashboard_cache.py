@@ -0,0 +1,65 @@
+import io
+
+from django.test import TransactionTestCase, override_settings
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import transaction
+
+from student_management_app import DashboardCache
+from student_management_app.models import Courses
+
+
+class TestDashboardCache(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        self.builds = 0
+
+    def build(self):
+        self.builds += 1
+        return {"course_count": Courses.objects.count()}
+
+    def test_repeated_hits_are_served_from_cache(self):
+        """A segunda leitura não deve recalcular o contexto."""
+        first = DashboardCache.cached_context("teste", self.build)
+        with self.assertNumQueries(0):
+            second = DashboardCache.cached_context("teste", self.build)
+        self.assertEqual(first, second)
+        self.assertEqual(self.builds, 1)
+
+    def test_write_invalidates_cached_context(self):
+        """Salvar um registro incrementa a versão e descarta o contexto antigo."""
+        self.assertEqual(DashboardCache.cached_context("teste", self.build)["course_count"], 0)
+        Courses.objects.create(course_name="Curso Novo")
+        self.assertEqual(DashboardCache.cached_context("teste", self.build)["course_count"], 1)
+        self.assertEqual(self.builds, 2)
+
+    def test_context_built_inside_transaction_is_not_cached(self):
+        """Um contexto calculado dentro de uma transação não é guardado."""
+        with transaction.atomic():
+            Courses.objects.create(course_name="Curso Desfeito")
+            DashboardCache.cached_context("teste", self.build)
+            transaction.set_rollback(True)
+        self.assertEqual(DashboardCache.cached_context("teste", self.build)["course_count"], 0)
+        self.assertEqual(self.builds, 2)
+
+    def test_commit_bumps_version_again(self):
+        """O commit incrementa de novo a versão da entidade alterada."""
+        DashboardCache.bump("courses")
+        before = cache.get(DashboardCache.VERSION_KEY % "courses")
+        with transaction.atomic():
+            DashboardCache.bump("courses")
+            self.assertEqual(cache.get(DashboardCache.VERSION_KEY % "courses"), before + 1)
+        self.assertEqual(cache.get(DashboardCache.VERSION_KEY % "courses"), before + 2)
+
+    def test_commands_warn_when_the_cache_is_per_process(self):
+        """Com LocMemCache os comandos avisam que o servidor pode mostrar dashboards antigos."""
+        for command in ('rebuild_dashboard_counters', 'rebuild_attendance_rollups'):
+            err = io.StringIO()
+            call_command(command, stdout=io.StringIO(), stderr=err)
+            self.assertIn("LocMemCache", err.getvalue())
+
+        with override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}}):
+            self.assertTrue(DashboardCache.cache_is_shared())
+            err = io.StringIO()
+            call_command('rebuild_dashboard_counters', stdout=io.StringIO(), stderr=err)
+            self.assertEqual(err.getvalue(), "")
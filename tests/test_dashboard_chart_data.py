@@ -0,0 +1,81 @@
+from django.test import TestCase, Client
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+
+from student_management_app.models import Courses, SessionYearModel, Subjects
+
+User = get_user_model()
+
+
+class TestDashboardChartData(TestCase):
+    def setUp(self):
+        self.course = Courses.objects.create(id=1, course_name="Curso Gráficos")
+        self.session = SessionYearModel.objects.create(
+            id=1,
+            session_start_year="2025-01-01",
+            session_end_year="2025-12-31"
+        )
+        self.hod_user = User.objects.create_user(username="hodcharts", password="hodpass", user_type=1)
+        self.staff_user = User.objects.create_user(username="staffcharts", password="staffpass", user_type=2)
+        self.student_user = User.objects.create_user(username="studentcharts", password="studpass", user_type=3)
+        Subjects.objects.create(subject_name="História", course_id=self.course, staff_id=self.staff_user)
+        self.client = Client()
+
+    def get_json(self, user, url_name, keys):
+        self.client.force_login(user)
+        response = self.client.get(reverse(url_name))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], "application/json")
+        data = response.json()
+        for key in keys:
+            self.assertIn(key, data)
+        return response
+
+    def test_admin_home_chart_data(self):
+        """O endpoint do HOD retorna as séries dos gráficos em JSON."""
+        response = self.get_json(self.hod_user, 'admin_home_chart_data', ["course_name_list", "student_count_list_in_course"])
+        self.assertEqual(response.json()["course_name_list"], ["Curso Gráficos"])
+
+    def test_admin_paginated_chart_data(self):
+        """Os gráficos por aluno, professor e matéria vêm paginados e limitados."""
+        for i in range(3):
+            User.objects.create_user(username="extracharts%d" % i, password="studpass", user_type=3)
+        self.client.force_login(self.hod_user)
+
+        data = self.client.get(reverse('admin_student_chart_data'), {"order": "name", "limit": 2}).json()
+        self.assertEqual(len(data["student_name_list"]), 2)
+        self.assertTrue(data["has_next"])
+        data = self.client.get(reverse('admin_student_chart_data'), {"order": "name", "limit": 2, "page": 2}).json()
+        self.assertEqual((len(data["student_name_list"]), data["page"], data["has_next"]), (2, 2, False))
+
+        # Limite acima do máximo e parâmetros inválidos são ajustados
+        data = self.client.get(reverse('admin_student_chart_data'), {"order": "x", "limit": 10000, "page": "y"}).json()
+        self.assertEqual((len(data["student_name_list"]), data["page"]), (4, 1))
+
+        self.get_json(self.hod_user, 'admin_staff_chart_data', ["staff_name_list", "staff_attendance_present_list", "has_next"])
+        response = self.get_json(self.hod_user, 'admin_subject_chart_data', ["subject_list", "student_count_list_in_subject"])
+        self.assertEqual(response.json()["student_count_list_in_subject"], [4])
+
+    def test_staff_home_chart_data(self):
+        """O endpoint do professor retorna as séries dos gráficos em JSON."""
+        response = self.get_json(self.staff_user, 'staff_home_chart_data', ["subject_list", "attendance_list", "student_list"])
+        self.assertEqual(response.json()["student_list"], [" "])
+
+    def test_student_home_chart_data(self):
+        """O endpoint do aluno retorna as séries dos gráficos em JSON."""
+        response = self.get_json(self.student_user, 'student_home_chart_data', ["subject_name", "data_present", "data_absent", "data_percentage"])
+        self.assertEqual(response.json()["subject_name"], ["História"])
+
+    def test_chart_data_supports_conditional_get(self):
+        """Uma segunda requisição com o mesmo ETag recebe 304 sem corpo."""
+        response = self.get_json(self.hod_user, 'admin_home_chart_data', [])
+        self.assertIn("private", response['Cache-Control'])
+        response = self.client.get(reverse('admin_home_chart_data'), HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_home_page_does_not_embed_chart_series(self):
+        """A página inicial só renderiza os totais; as séries vêm do endpoint."""
+        self.client.force_login(self.hod_user)
+        response = self.client.get(reverse('admin_home'))
+        self.assertNotIn("student_name_list", response.context)
+        self.assertContains(response, reverse('admin_home_chart_data'))
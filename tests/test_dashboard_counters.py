@@ -0,0 +1,175 @@
+import datetime
+import io
+import json
+
+from django.db import IntegrityError, transaction
+from django.test import TestCase, Client
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+
+from student_management_app import DashboardCounters
+
+from student_management_app.models import (
+    Courses, SessionYearModel, Subjects, Students, Staffs, Attendance,
+    LeaveReportStudent, LeaveReportStaff, StudentAttendanceCounter,
+    SubjectAttendanceCounter, StudentLeaveCounter, StaffLeaveCounter,
+    MonthlyAttendanceRollup
+)
+
+User = get_user_model()
+
+
+class TestDashboardCounters(TestCase):
+    def setUp(self):
+        self.course = Courses.objects.create(id=1, course_name="Curso Contadores")
+        self.session = SessionYearModel.objects.create(
+            id=1,
+            session_start_year="2025-01-01",
+            session_end_year="2025-12-31"
+        )
+        self.staff_user = User.objects.create_user(username="staffcount", password="staffpass", user_type=2)
+        self.staff = Staffs.objects.get(admin=self.staff_user)
+        self.subject = Subjects.objects.create(
+            subject_name="Física", course_id=self.course, staff_id=self.staff_user
+        )
+        self.student_users = [
+            User.objects.create_user(username="alunocount%d" % i, password="studpass", user_type=3)
+            for i in range(2)
+        ]
+        self.students = [Students.objects.get(admin=user) for user in self.student_users]
+
+        self.client = Client()
+        self.client.force_login(self.staff_user)
+
+    def save_attendance(self, statuses, attendance_date="2025-03-10"):
+        student_ids = [{"id": user.id, "status": status} for user, status in zip(self.student_users, statuses)]
+        response = self.client.post(reverse('save_attendance_data'), data={
+            "student_ids": json.dumps(student_ids),
+            "subject_id": self.subject.id,
+            "attendance_date": attendance_date,
+            "session_year_id": self.session.id,
+        })
+        self.assertEqual(response.content, b"OK")
+        return Attendance.objects.latest('id')
+
+    def assertStudentCounter(self, student, present, absent):
+        counter = StudentAttendanceCounter.objects.get(student_id=student, session_year_id=self.session)
+        self.assertEqual((counter.present_count, counter.absent_count), (present, absent))
+
+    def test_save_attendance_updates_counters(self):
+        """Salvar a chamada incrementa os contadores de aluno e de matéria."""
+        self.save_attendance([1, 0])
+
+        self.assertStudentCounter(self.students[0], 1, 0)
+        self.assertStudentCounter(self.students[1], 0, 1)
+        subject_counter = SubjectAttendanceCounter.objects.get(subject_id=self.subject)
+        self.assertEqual(subject_counter.attendance_count, 1)
+        self.assertEqual((subject_counter.present_count, subject_counter.absent_count), (1, 1))
+
+    def test_update_attendance_only_moves_changed_statuses(self):
+        """Atualizar a chamada move apenas os status que mudaram."""
+        attendance = self.save_attendance([1, 0])
+        student_ids = [{"id": self.student_users[0].id, "status": 1}, {"id": self.student_users[1].id, "status": 1}]
+        response = self.client.post(reverse('update_attendance_data'), data={
+            "student_ids": json.dumps(student_ids),
+            "attendance_date": attendance.id,
+        })
+        self.assertEqual(response.content, b"OK")
+
+        self.assertStudentCounter(self.students[0], 1, 0)
+        self.assertStudentCounter(self.students[1], 1, 0)
+        subject_counter = SubjectAttendanceCounter.objects.get(subject_id=self.subject)
+        self.assertEqual(subject_counter.attendance_count, 1)
+        self.assertEqual((subject_counter.present_count, subject_counter.absent_count), (2, 0))
+
+    def test_leave_approve_and_reject_update_counters(self):
+        """Aprovar e depois rejeitar uma licença não deve deixar contagem residual."""
+        hod_user = User.objects.create_user(username="hodcount", password="hodpass", user_type=1)
+        hod_client = Client()
+        hod_client.force_login(hod_user)
+
+        student_leave = LeaveReportStudent.objects.create(
+            student_id=self.students[0], leave_date="2025-03-11", leave_message="x", leave_status=0
+        )
+        staff_leave = LeaveReportStaff.objects.create(
+            staff_id=self.staff, leave_date="2025-03-11", leave_message="x", leave_status=0
+        )
+
+        hod_client.get(reverse('student_leave_approve', args=[student_leave.id]))
+        hod_client.get(reverse('student_leave_approve', args=[student_leave.id]))
+        hod_client.get(reverse('staff_leave_approve', args=[staff_leave.id]))
+        self.assertEqual(StudentLeaveCounter.objects.get(student_id=self.students[0]).approved_count, 1)
+        self.assertEqual(StaffLeaveCounter.objects.get(staff_id=self.staff).approved_count, 1)
+
+        hod_client.get(reverse('student_leave_reject', args=[student_leave.id]))
+        hod_client.get(reverse('staff_leave_reject', args=[staff_leave.id]))
+        self.assertEqual(StudentLeaveCounter.objects.get(student_id=self.students[0]).approved_count, 0)
+        self.assertEqual(StaffLeaveCounter.objects.get(staff_id=self.staff).approved_count, 0)
+
+    def test_leaves_outside_every_session_year_share_one_counter(self):
+        """Licenças fora de qualquer ano letivo somam num único contador (session_year NULL)."""
+        leaves = [
+            LeaveReportStudent.objects.create(student_id=self.students[0], leave_date=leave_date, leave_message="x", leave_status=1)
+            for leave_date in ("2024-03-11", "2024-04-11")
+        ]
+        for leave in leaves:
+            DashboardCounters.record_leave_status(leave, 0)
+        self.assertEqual(list(StudentLeaveCounter.objects.values_list('session_year_id', 'approved_count')), [(None, 2)])
+
+        # O banco recusa um segundo contador sem ano letivo para o mesmo aluno
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            StudentLeaveCounter.objects.create(student_id=self.students[0], session_year_id=None)
+
+    def test_session_year_changes_remap_leave_counters(self):
+        """Criar ou editar um ano letivo move as licenças aprovadas para o ano certo."""
+        hod_client = Client()
+        hod_client.force_login(User.objects.create_user(username="hodanos", password="hodpass", user_type=1))
+        leave = LeaveReportStudent.objects.create(student_id=self.students[0], leave_date="2026-03-11", leave_message="x", leave_status=0)
+        hod_client.get(reverse('student_leave_approve', args=[leave.id]))
+        self.assertEqual(list(StudentLeaveCounter.objects.values_list('session_year_id', 'approved_count')), [(None, 1)])
+
+        hod_client.post(reverse('add_session_save'), {"session_start_year": "2026-01-01", "session_end_year": "2026-12-31"})
+        new_session = SessionYearModel.objects.get(session_start_year="2026-01-01")
+        self.assertEqual(list(StudentLeaveCounter.objects.values_list('session_year_id', 'approved_count')), [(new_session.id, 1)])
+
+        hod_client.post(reverse('edit_session_save'), {"session_id": self.session.id, "session_start_year": "2025-01-01", "session_end_year": "2026-06-30"})
+        hod_client.post(reverse('edit_session_save'), {"session_id": new_session.id, "session_start_year": "2026-07-01", "session_end_year": "2026-12-31"})
+        self.assertEqual(list(StudentLeaveCounter.objects.values_list('session_year_id', 'approved_count')), [(self.session.id, 1)])
+
+    def test_rebuild_command_matches_incremental_counters(self):
+        """O comando rebuild_dashboard_counters reconstrói os mesmos valores."""
+        self.save_attendance([1, 0])
+        self.save_attendance([0, 0], attendance_date="2025-03-11")
+        before = sorted(StudentAttendanceCounter.objects.values_list('student_id', 'present_count', 'absent_count'))
+
+        StudentAttendanceCounter.objects.all().delete()
+        call_command('rebuild_dashboard_counters', stdout=io.StringIO(), stderr=io.StringIO())
+
+        after = sorted(StudentAttendanceCounter.objects.values_list('student_id', 'present_count', 'absent_count'))
+        self.assertEqual(before, after)
+        self.assertEqual(SubjectAttendanceCounter.objects.get(subject_id=self.subject).attendance_count, 2)
+
+    def test_rollups_follow_save_and_update(self):
+        """Os rollups mensais acompanham o salvamento e a atualização da chamada."""
+        attendance = self.save_attendance([1, 0])
+        self.save_attendance([1, 1], attendance_date="2025-04-02")
+        self.client.post(reverse('update_attendance_data'), data={
+            "student_ids": json.dumps([{"id": self.student_users[1].id, "status": 1}]),
+            "attendance_date": attendance.id,
+        })
+
+        rollups = sorted(MonthlyAttendanceRollup.objects.values_list('student_id', 'month', 'present_count', 'absent_count'))
+        self.assertEqual(rollups, [
+            (self.students[0].id, datetime.date(2025, 3, 1), 1, 0),
+            (self.students[0].id, datetime.date(2025, 4, 1), 1, 0),
+            (self.students[1].id, datetime.date(2025, 3, 1), 1, 0),
+            (self.students[1].id, datetime.date(2025, 4, 1), 1, 0),
+        ])
+
+        # A reconstrução em SQL refaz também as máscaras de dias
+        masks = sorted(MonthlyAttendanceRollup.objects.values_list('student_id', 'month', 'present_days', 'absent_days'))
+        MonthlyAttendanceRollup.objects.all().delete()
+        call_command('rebuild_attendance_rollups', '--chunk-size=1', stdout=io.StringIO(), stderr=io.StringIO())
+        self.assertEqual(sorted(MonthlyAttendanceRollup.objects.values_list('student_id', 'month', 'present_count', 'absent_count')), rollups)
+        self.assertEqual(sorted(MonthlyAttendanceRollup.objects.values_list('student_id', 'month', 'present_days', 'absent_days')), masks)
@@ -0,0 +1,81 @@
+import datetime
+import io
+
+from django.test import TestCase, TransactionTestCase, Client, override_settings
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.utils import timezone
+
+from student_management_app import DashboardSnapshots
+from student_management_app.models import Courses, SessionYearModel, DashboardSnapshot
+
+User = get_user_model()
+
+
+class DashboardSnapshotSetUp:
+    def setUp(self):
+        Courses.objects.create(id=1, course_name="Curso Snapshot")
+        self.session = SessionYearModel.objects.create(
+            id=1, session_start_year="2025-01-01", session_end_year="2025-12-31"
+        )
+        self.hod_user = User.objects.create_user(username="hodsnapshot", password="hodpass", user_type=1)
+        self.client = Client()
+        self.client.force_login(self.hod_user)
+
+    def create_student(self, username):
+        User.objects.create_user(username=username, password="studpass", user_type=3)
+
+    def student_count(self):
+        return self.client.get(reverse('admin_home'), {"session_year": self.session.id}).context["all_student_count"]
+
+    def make_stale(self):
+        DashboardSnapshot.objects.update(computed_at=timezone.now() - datetime.timedelta(hours=1))
+
+
+@override_settings(DASHBOARD_SNAPSHOT_TTL=60, DASHBOARD_SNAPSHOT_THREAD=False)
+class TestDashboardSnapshots(DashboardSnapshotSetUp, TestCase):
+    def test_serves_previous_snapshot_until_refreshed(self):
+        """O snapshot antigo continua sendo servido até o comando recalculá-lo."""
+        self.create_student("alunosnap0")
+        self.assertEqual(self.student_count(), 1)
+        self.assertTrue(DashboardSnapshot.objects.filter(name="admin_home:%d" % self.session.id).exists())
+
+        self.create_student("alunosnap1")
+        self.assertEqual(self.student_count(), 1)
+
+        # Ainda dentro do TTL: nada a recalcular
+        call_command('refresh_dashboard_snapshots', stdout=io.StringIO())
+        self.assertEqual(self.student_count(), 1)
+
+        self.make_stale()
+        self.assertEqual(self.student_count(), 1)
+        call_command('refresh_dashboard_snapshots', stdout=io.StringIO())
+        self.assertEqual(self.student_count(), 2)
+
+    def test_chart_data_is_served_from_snapshot(self):
+        """O JSON dos gráficos também vem do snapshot."""
+        self.create_student("alunosnap0")
+        url = reverse('admin_home_chart_data')
+        self.assertEqual(self.client.get(url).json()["student_count_list_in_course"], [1])
+        self.create_student("alunosnap1")
+        self.assertEqual(self.client.get(url).json()["student_count_list_in_course"], [1])
+
+
+@override_settings(DASHBOARD_SNAPSHOT_TTL=60, DASHBOARD_SNAPSHOT_THREAD=True)
+class TestDashboardSnapshotThread(DashboardSnapshotSetUp, TransactionTestCase):
+    def test_stale_snapshot_is_refreshed_by_a_thread(self):
+        """Um snapshot vencido é devolvido e recalculado em uma thread."""
+        name = "admin_home:%d" % self.session.id
+        self.assertEqual(DashboardSnapshots.get_snapshot(name)["all_student_count"], 0)
+        self.create_student("alunosnap0")
+        self.make_stale()
+
+        DashboardSnapshots.refreshing.add(name)
+        # Já existe uma thread para este snapshot: não inicia outra
+        self.assertIsNone(DashboardSnapshots.schedule_refresh(name))
+        DashboardSnapshots.refreshing.discard(name)
+
+        thread = DashboardSnapshots.schedule_refresh(name)
+        thread.join()
+        self.assertEqual(DashboardSnapshots.get_snapshot(name)["all_student_count"], 1)
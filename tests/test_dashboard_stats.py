@@ -0,0 +1,199 @@
+import datetime
+
+from django.test import TestCase
+from django.contrib.auth import get_user_model
+
+from student_management_app import DashboardStats, DashboardCounters
+from student_management_app.models import (
+    Courses, SessionYearModel, Subjects, Students, Staffs,
+    Attendance, AttendanceReport, LeaveReportStudent, LeaveReportStaff
+)
+
+User = get_user_model()
+
+
+class DashboardStatsSetUp:
+    def setUp(self):
+        # Cria curso e sessão com id=1 (exigidos pela signal de Students)
+        self.course = Courses.objects.create(id=1, course_name="Curso A")
+        self.session = SessionYearModel.objects.create(
+            id=1,
+            session_start_year="2025-01-01",
+            session_end_year="2025-12-31"
+        )
+        self.other_course = Courses.objects.create(course_name="Curso B")
+
+        self.staff_user = User.objects.create_user(
+            username="staffstats", password="staffpass", first_name="Prof", user_type=2
+        )
+        self.staff = Staffs.objects.get(admin=self.staff_user)
+        self.subject = Subjects.objects.create(
+            subject_name="Matemática", course_id=self.course, staff_id=self.staff_user
+        )
+
+        self.students = [self.create_student("aluno%d" % i) for i in range(3)]
+
+    def create_student(self, username):
+        user = User.objects.create_user(
+            username=username, password="studpass", first_name=username, user_type=3
+        )
+        return Students.objects.get(admin=user)
+
+    def take_attendance(self, statuses):
+        # Uma chamada por dia (a chamada é única por matéria, sessão e data)
+        attendance = Attendance.objects.create(
+            subject_id=self.subject,
+            attendance_date=datetime.date(2025, 3, 1) + datetime.timedelta(days=Attendance.objects.count()),
+            session_year_id=self.session
+        )
+        for student, status in zip(self.students, statuses):
+            AttendanceReport.objects.create(student_id=student, attendance_id=attendance, status=status)
+        return attendance
+
+
+class TestAdminHomeStats(DashboardStatsSetUp, TestCase):
+    def test_admin_home_stats_values(self):
+        """Verifica se as listas do dashboard batem com os dados cadastrados."""
+        self.take_attendance([True, False, True])
+        self.take_attendance([True, True, False])
+        LeaveReportStudent.objects.create(
+            student_id=self.students[0], leave_date="2025-03-02", leave_message="x", leave_status=1
+        )
+        LeaveReportStaff.objects.create(
+            staff_id=self.staff, leave_date="2025-03-02", leave_message="x", leave_status=1
+        )
+
+        # Os totais são lidos das tabelas de contadores
+        DashboardCounters.rebuild_counters()
+        stats = {
+            **DashboardStats.admin_home_summary(),
+            **DashboardStats.admin_home_charts(),
+            **DashboardStats.subject_student_chart(),
+            **DashboardStats.staff_attendance_chart(),
+            **DashboardStats.student_attendance_chart(order="name"),
+        }
+
+        self.assertEqual(stats["all_student_count"], 3)
+        self.assertEqual(stats["course_name_list"], ["Curso A", "Curso B"])
+        self.assertEqual(stats["subject_count_list"], [1, 0])
+        self.assertEqual(stats["student_count_list_in_course"], [3, 0])
+        self.assertEqual(stats["subject_list"], ["Matemática"])
+        self.assertEqual(stats["student_count_list_in_subject"], [3])
+        self.assertEqual(stats["staff_name_list"], ["Prof"])
+        self.assertEqual(stats["staff_attendance_present_list"], [2])
+        self.assertEqual(stats["staff_attendance_leave_list"], [1])
+        self.assertEqual(stats["student_name_list"], ["aluno0", "aluno1", "aluno2"])
+        self.assertEqual(stats["student_attendance_present_list"], [2, 1, 1])
+        # Faltas + licenças aprovadas
+        self.assertEqual(stats["student_attendance_leave_list"], [1, 1, 1])
+
+    def test_student_chart_top_and_bottom_pages(self):
+        """O gráfico de alunos traz só a página pedida, ordenada pela frequência."""
+        self.students.append(self.create_student("aluno3"))
+        self.take_attendance([True, False, True])
+        self.take_attendance([True, False, False])
+        DashboardCounters.rebuild_counters()
+
+        lowest = DashboardStats.student_attendance_chart(order="lowest", limit=2)
+        # aluno3 não tem chamadas e fica por último
+        self.assertEqual(lowest["student_name_list"], ["aluno1", "aluno2"])
+        self.assertEqual(lowest["student_attendance_percentage_list"], [0, 50.0])
+        self.assertTrue(lowest["has_next"])
+
+        last_page = DashboardStats.student_attendance_chart(order="lowest", page=2, limit=2)
+        self.assertEqual(last_page["student_name_list"], ["aluno0", "aluno3"])
+        self.assertFalse(last_page["has_next"])
+
+        highest = DashboardStats.student_attendance_chart(order="highest", limit=1)
+        self.assertEqual(highest["student_name_list"], ["aluno0"])
+
+    def test_admin_home_stats_query_count_is_constant(self):
+        """O número de consultas não deve crescer com a quantidade de alunos."""
+        self.take_attendance([True, False, True])
+        with self.assertNumQueries(3):
+            DashboardStats.admin_home_charts()
+        with self.assertNumQueries(2):
+            DashboardStats.student_attendance_chart()
+        with self.assertNumQueries(2):
+            DashboardStats.staff_attendance_chart()
+
+        self.students += [self.create_student("extra%d" % i) for i in range(5)]
+        self.take_attendance([False] * len(self.students))
+        with self.assertNumQueries(3):
+            DashboardStats.admin_home_charts()
+        with self.assertNumQueries(2):
+            DashboardStats.student_attendance_chart()
+        with self.assertNumQueries(2):
+            DashboardStats.staff_attendance_chart()
+
+
+class TestStaffHomeStats(DashboardStatsSetUp, TestCase):
+    def test_staff_home_stats_values(self):
+        """Verifica os gráficos do professor: alunos dos cursos das suas matérias."""
+        Subjects.objects.create(subject_name="Álgebra", course_id=self.course, staff_id=self.staff_user)
+        self.take_attendance([True, False, False])
+        DashboardCounters.rebuild_counters()
+
+        stats = dict(DashboardStats.staff_home_summary(self.staff_user.id), **DashboardStats.staff_home_charts(self.staff_user.id))
+
+        self.assertEqual(stats["subject_count"], 2)
+        self.assertEqual(stats["students_count"], 3)
+        self.assertEqual(stats["attendance_count"], 1)
+        self.assertEqual(stats["subject_list"], ["Matemática", "Álgebra"])
+        self.assertEqual(stats["attendance_list"], [1, 0])
+        self.assertEqual(stats["attendance_present_list"], [1, 0, 0])
+        self.assertEqual(stats["attendance_absent_list"], [0, 1, 1])
+
+    def test_staff_home_stats_query_count_is_constant(self):
+        """O número de consultas não depende de quantos alunos ou cursos o professor tem."""
+        self.take_attendance([True, False, True])
+        DashboardCounters.rebuild_counters()
+        with self.assertNumQueries(4):
+            DashboardStats.staff_home_summary(self.staff_user.id)
+        with self.assertNumQueries(3):
+            DashboardStats.staff_home_charts(self.staff_user.id)
+
+        Subjects.objects.create(subject_name="Química", course_id=self.other_course, staff_id=self.staff_user)
+        self.students += [self.create_student("extra%d" % i) for i in range(5)]
+        with self.assertNumQueries(4):
+            DashboardStats.staff_home_summary(self.staff_user.id)
+        with self.assertNumQueries(3):
+            DashboardStats.staff_home_charts(self.staff_user.id)
+
+
+class TestStudentHomeStats(DashboardStatsSetUp, TestCase):
+    def test_student_home_stats_values(self):
+        """Presenças e faltas por matéria e percentuais do aluno."""
+        Subjects.objects.create(subject_name="Álgebra", course_id=self.course, staff_id=self.staff_user)
+        self.take_attendance([True, False, False])
+        self.take_attendance([False, False, False])
+        self.take_attendance([True, False, False])
+        DashboardCounters.rebuild_counters()
+        DashboardCounters.rebuild_rollups()
+
+        stats = dict(DashboardStats.student_home_summary(self.students[0].admin_id), **DashboardStats.student_home_charts(self.students[0].admin_id))
+
+        self.assertEqual(stats["total_attendance"], 3)
+        self.assertEqual(stats["attendance_present"], 2)
+        self.assertEqual(stats["attendance_absent"], 1)
+        self.assertEqual(stats["attendance_percentage"], 66.67)
+        self.assertEqual(stats["total_subjects"], 2)
+        self.assertEqual(stats["subject_name"], ["Matemática", "Álgebra"])
+        self.assertEqual(stats["data_present"], [2, 0])
+        self.assertEqual(stats["data_absent"], [1, 0])
+        self.assertEqual(stats["data_percentage"], [66.67, 0])
+
+    def test_student_home_stats_query_count_is_constant(self):
+        """O número de consultas não cresce com o número de matérias."""
+        self.take_attendance([True, False, True])
+        with self.assertNumQueries(2):
+            DashboardStats.student_home_summary(self.students[0].admin_id)
+        with self.assertNumQueries(3):
+            DashboardStats.student_home_charts(self.students[0].admin_id)
+
+        for i in range(5):
+            Subjects.objects.create(subject_name="Extra %d" % i, course_id=self.course, staff_id=self.staff_user)
+        with self.assertNumQueries(2):
+            DashboardStats.student_home_summary(self.students[0].admin_id)
+        with self.assertNumQueries(3):
+            DashboardStats.student_home_charts(self.students[0].admin_id)
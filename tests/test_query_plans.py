@@ -0,0 +1,47 @@
+import datetime
+import unittest
+
+from django.db import connection
+from django.test import TestCase
+from django.utils import timezone
+
+from student_management_app import AttendanceStorage
+from student_management_app.models import Attendance, AttendanceReport, AttendanceChangeLog, MonthlyAttendanceRollup
+
+
+def query_plan(queryset):
+    sql, params = queryset.query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute("EXPLAIN QUERY PLAN " + sql, params)
+        return [row[-1] for row in cursor.fetchall()]
+
+
+@unittest.skipUnless(connection.vendor == "sqlite", "EXPLAIN QUERY PLAN is SQLite syntax")
+class TestAttendanceQueryPlans(TestCase):
+    # The queries run for every register or Student page (StaffViews, HodViews, StudentViews)
+    def hot_queries(self):
+        start, end = datetime.date(2025, 3, 1), datetime.date(2025, 3, 31)
+        return {
+            "register statuses": AttendanceReport.objects.filter(attendance_id=1).values_list('student_id', 'status'),
+            "changed statuses": AttendanceReport.objects.filter(attendance_id=1, student_id__in=[1, 2]).values_list('id'),
+            "register upsert": Attendance.objects.filter(subject_id=1, session_year_id=1, attendance_date=start),
+            "register dates": Attendance.objects.filter(subject_id=1, session_year_id=1).values_list('id', 'attendance_date'),
+            "student attendance": AttendanceStorage.student_attendance_rows(1, 1, start, end),
+            "student rollups": MonthlyAttendanceRollup.objects.filter(student_id=1, subject_id=1, month__range=(start, end)),
+            "student calendar": MonthlyAttendanceRollup.objects.filter(student_id=1, month__range=(start, end)).values_list('subject_id__subject_name', 'present_days'),
+            "register history": AttendanceChangeLog.objects.filter(attendance_id=1, created_at__gt=timezone.now()).values_list('changes'),
+        }
+
+    def test_hot_queries_use_an_index(self):
+        """Cada consulta frequente usa um índice em vez de varrer a tabela."""
+        for name, queryset in self.hot_queries().items():
+            with self.subTest(name):
+                plan = query_plan(queryset)
+                scans = [step for step in plan if step.startswith("SCAN") and "INDEX" not in step]
+                self.assertEqual(scans, [], plan)
+                self.assertTrue(any("INDEX" in step for step in plan), plan)
+
+    def test_student_attendance_is_read_from_the_index_alone(self):
+        """Os status de um aluno são lidos só do índice (covering index)."""
+        plan = query_plan(AttendanceReport.objects.filter(student_id=1, attendance_id__in=[1, 2]).values_list('attendance_id', 'status'))
+        self.assertTrue(any("COVERING INDEX" in step for step in plan), plan)
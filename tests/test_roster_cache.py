@@ -0,0 +1,112 @@
+import json
+from unittest import mock
+
+from django.test import TransactionTestCase, Client
+from django.urls import reverse
+from django.core.cache import cache
+from django.contrib.auth import get_user_model
+
+from student_management_app import RosterCache
+from student_management_app.forms import AddStudentForm, EditStudentForm
+from student_management_app.models import Courses, SessionYearModel, Subjects, Students
+
+User = get_user_model()
+
+
+class TestRosterCache(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        self.course = Courses.objects.create(id=1, course_name="Curso Turma")
+        self.other_course = Courses.objects.create(course_name="Outro Curso")
+        self.session = SessionYearModel.objects.create(id=1, session_start_year="2025-01-01", session_end_year="2025-12-31")
+        self.staff_user = User.objects.create_user(username="staffturma", password="staffpass", user_type=2)
+        self.subject = Subjects.objects.create(subject_name="Física", course_id=self.course, staff_id=self.staff_user)
+        self.student_user = User.objects.create_user(username="alunoturma", password="studpass", first_name="Ana", last_name="Lima", user_type=3)
+
+        # As opções de curso e sessão dos forms são carregadas uma vez, na importação de forms.py
+        for form in (AddStudentForm, EditStudentForm):
+            for field, model in (("course_id", Courses), ("session_year_id", SessionYearModel)):
+                form_field = form.base_fields[field]
+                self.addCleanup(setattr, form_field, "choices", form_field.choices)
+                form_field.choices = [(value, value) for value in model.objects.values_list('id', flat=True)]
+
+        self.hod = Client()
+        self.hod.force_login(User.objects.create_user(username="hodturma", password="hodpass", user_type=1))
+
+    def roster_names(self, course=None):
+        return [name for admin_id, name in RosterCache.get_roster((course or self.course).id, self.session.id)]
+
+    def edit_student(self, course, first_name):
+        session = self.hod.session
+        session['student_id'] = str(self.student_user.id)
+        session.save()
+        self.hod.post(reverse('edit_student_save'), {
+            "email": "ana@test.com", "username": "alunoturma", "first_name": first_name, "last_name": "Lima",
+            "address": "Rua", "course_id": course.id, "gender": "Female", "session_year_id": self.session.id,
+        })
+
+    def test_repeated_fetches_are_served_from_memory(self):
+        """A lista da turma é lida do banco só na primeira vez."""
+        self.assertEqual(self.roster_names(), ["Ana Lima"])
+        with self.assertNumQueries(0):
+            self.assertEqual(self.roster_names(), ["Ana Lima"])
+
+        staff = Client()
+        staff.force_login(self.staff_user)
+        response = staff.post(reverse('get_students'), {"subject": self.subject.id, "session_year": self.session.id})
+        self.assertEqual([student["name"] for student in json.loads(response.json())], ["Ana Lima"])
+
+    def test_subject_course_is_served_from_memory(self):
+        """O curso da matéria também vem do cache e é atualizado ao editar ou excluir a matéria."""
+        self.roster_names()
+        self.assertEqual(RosterCache.get_subject_course(self.subject.id), self.course.id)
+        with self.assertNumQueries(0):
+            self.assertEqual(RosterCache.get_subject_course(self.subject.id), self.course.id)
+
+        self.hod.post(reverse('edit_subject_save'), {
+            "subject_id": self.subject.id, "subject": "Física", "course": self.other_course.id, "staff": self.staff_user.id,
+        })
+        self.assertEqual(RosterCache.get_subject_course(self.subject.id), self.other_course.id)
+
+        self.hod.get(reverse('delete_subject', args=[self.subject.id]))
+        with self.assertRaises(Subjects.DoesNotExist):
+            RosterCache.get_subject_course(self.subject.id)
+
+    def test_roster_read_before_a_commit_is_not_served(self):
+        """Uma lista lida antes do commit e gravada depois fica numa versão antiga."""
+        roster = (self.course.id, self.session.id)
+        self.roster_names()
+        # Leitor: lê a versão e a lista antiga; o escritor confirma antes de o leitor gravar
+        stale_key = RosterCache.ROSTER_KEY % (roster + (cache.get(RosterCache.ROSTER_VERSION_KEY % roster),))
+        Students.objects.all().delete()
+        RosterCache.invalidate(roster)
+        cache.set(stale_key, [(self.student_user.id, "Ana Lima")])
+        self.assertEqual(self.roster_names(), [])
+
+    def test_student_changes_invalidate_the_rosters(self):
+        """Editar, mover ou excluir um aluno atualiza as listas afetadas."""
+        self.roster_names()
+        self.roster_names(self.other_course)
+
+        self.edit_student(self.course, "Anna")
+        self.assertEqual(self.roster_names(), ["Anna Lima"])
+
+        self.edit_student(self.other_course, "Anna")
+        self.assertEqual(self.roster_names(), [])
+        self.assertEqual(self.roster_names(self.other_course), ["Anna Lima"])
+
+        self.hod.get(reverse('delete_student', args=[self.student_user.id]))
+        self.assertFalse(Students.objects.exists())
+        self.assertEqual(self.roster_names(self.other_course), [])
+
+    def test_added_student_joins_the_roster(self):
+        """Um aluno novo aparece na lista da turma já em cache."""
+        self.roster_names(self.other_course)
+        with mock.patch.object(RosterCache, 'invalidate', wraps=RosterCache.invalidate) as invalidate:
+            self.hod.post(reverse('add_student_save'), {
+                "email": "bia@test.com", "password": "studpass", "first_name": "Bia", "last_name": "Souza", "username": "alunabia",
+                "address": "Rua", "course_id": self.other_course.id, "gender": "Female", "session_year_id": self.session.id,
+            })
+        self.assertEqual(self.roster_names(self.other_course), ["Bia Souza"])
+        # A lista provisória (curso 1, ano letivo 1) criada pelo sinal post_save também é invalidada
+        invalidate.assert_called_once_with((self.course.id, self.session.id), (self.other_course.id, self.session.id))
@@ -0,0 +1,129 @@
+import datetime
+
+from django.test import TestCase, Client, RequestFactory
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+from django.contrib.sessions.backends.db import SessionStore
+
+from student_management_app import DashboardStats, DashboardCounters, SessionYearScope
+from student_management_app.models import (
+    Courses, SessionYearModel, Subjects, Students, Staffs, Attendance,
+    AttendanceReport, LeaveReportStudent, LeaveReportStaff, StudentLeaveCounter
+)
+
+User = get_user_model()
+
+
+class TestSessionYearScope(TestCase):
+    def setUp(self):
+        self.course = Courses.objects.create(id=1, course_name="Curso Sessões")
+        self.old_session = SessionYearModel.objects.create(
+            id=1, session_start_year="2024-01-01", session_end_year="2024-12-31"
+        )
+        self.new_session = SessionYearModel.objects.create(
+            session_start_year="2025-01-01", session_end_year="2025-12-31"
+        )
+        self.staff_user = User.objects.create_user(username="staffsessao", password="staffpass", first_name="Prof", user_type=2)
+        self.staff = Staffs.objects.get(admin=self.staff_user)
+        self.subject = Subjects.objects.create(subject_name="História", course_id=self.course, staff_id=self.staff_user)
+
+        # Um aluno matriculado em cada sessão
+        self.old_student = self.create_student("alunoantigo", self.old_session)
+        self.new_student = self.create_student("alunonovo", self.new_session)
+
+    def create_student(self, username, session):
+        user = User.objects.create_user(username=username, password="studpass", first_name=username, user_type=3)
+        Students.objects.filter(admin=user).update(session_year_id=session)
+        return Students.objects.get(admin=user)
+
+    def take_attendance(self, session, student, status, attendance_date):
+        attendance = Attendance.objects.create(subject_id=self.subject, attendance_date=attendance_date, session_year_id=session)
+        AttendanceReport.objects.create(student_id=student, attendance_id=attendance, status=status)
+
+    def make_request(self, user, query=""):
+        request = RequestFactory().get("/" + query)
+        request.user = user
+        request.session = SessionStore()
+        return request
+
+    def test_dashboards_only_count_the_selected_session_year(self):
+        """Contagens de presença, licença e alunos ficam restritas à sessão escolhida."""
+        self.take_attendance(self.old_session, self.old_student, True, "2024-05-02")
+        self.take_attendance(self.new_session, self.new_student, False, "2025-05-02")
+        LeaveReportStudent.objects.create(student_id=self.new_student, leave_date="2025-05-03", leave_message="x", leave_status=1)
+        LeaveReportStaff.objects.create(staff_id=self.staff, leave_date="2024-05-03", leave_message="x", leave_status=1)
+        DashboardCounters.rebuild_counters()
+        DashboardCounters.rebuild_rollups()
+
+        old = {
+            **DashboardStats.admin_home_summary(self.old_session.id),
+            **DashboardStats.student_attendance_chart(self.old_session.id),
+            **DashboardStats.staff_attendance_chart(self.old_session.id),
+        }
+        self.assertEqual(old["all_student_count"], 1)
+        self.assertEqual(old["student_name_list"], ["alunoantigo"])
+        self.assertEqual(old["student_attendance_present_list"], [1])
+        self.assertEqual(old["staff_attendance_present_list"], [1])
+        self.assertEqual(old["staff_attendance_leave_list"], [1])
+
+        new = {**DashboardStats.student_attendance_chart(self.new_session.id), **DashboardStats.staff_attendance_chart(self.new_session.id)}
+        self.assertEqual(new["student_name_list"], ["alunonovo"])
+        # Falta + licença aprovada em 2025
+        self.assertEqual(new["student_attendance_leave_list"], [2])
+        self.assertEqual(new["staff_attendance_leave_list"], [0])
+        self.assertEqual(DashboardStats.admin_home_charts(self.new_session.id)["student_count_list_in_course"], [1])
+
+        everything = DashboardStats.staff_attendance_chart()
+        self.assertEqual(everything["staff_attendance_present_list"], [2])
+
+        staff = DashboardStats.staff_home_summary(self.staff_user.id, self.new_session.id)
+        self.assertEqual((staff["students_count"], staff["attendance_count"], staff["leave_count"]), (1, 1, 0))
+        student = DashboardStats.student_home_charts(self.new_student.admin_id, self.old_session.id)
+        self.assertEqual(student["data_absent"], [0])
+
+    def test_leave_counter_follows_leave_date(self):
+        """A licença aprovada é contada na sessão em que a data da licença cai."""
+        hod_user = User.objects.create_user(username="hodsessao", password="hodpass", user_type=1)
+        client = Client()
+        client.force_login(hod_user)
+        leave = LeaveReportStudent.objects.create(student_id=self.new_student, leave_date="2024-11-20", leave_message="x", leave_status=0)
+
+        client.get(reverse('student_leave_approve', args=[leave.id]))
+        counter = StudentLeaveCounter.objects.get(student_id=self.new_student)
+        self.assertEqual((counter.session_year_id_id, counter.approved_count), (self.old_session.id, 1))
+
+    def test_resolves_current_selected_and_enrolled_session_year(self):
+        """Resolve a sessão atual, a escolhida na URL (lembrada na sessão) e a do aluno."""
+        hod_user = User.objects.create_user(username="hodresolve", password="hodpass", user_type=1)
+        self.assertEqual(SessionYearScope.current_session_year(datetime.date(2024, 6, 1)), self.old_session)
+        # Fora de qualquer sessão: a mais recente
+        self.assertEqual(SessionYearScope.current_session_year(datetime.date(2030, 1, 1)), self.new_session)
+
+        request = self.make_request(hod_user, "?session_year=all")
+        self.assertIsNone(SessionYearScope.get_session_year(request))
+        self.assertEqual(request.session[SessionYearScope.PARAM], "all")
+
+        request = self.make_request(hod_user, "?session_year=%d" % self.old_session.id)
+        self.assertEqual(SessionYearScope.get_session_year(request), self.old_session)
+        # Resolvida uma única vez por requisição
+        with self.assertNumQueries(0):
+            SessionYearScope.get_session_year(request)
+
+        request = self.make_request(self.old_student.admin)
+        self.assertEqual(SessionYearScope.get_session_year(request), self.old_session)
+
+    def test_home_pages_use_the_selected_session_year(self):
+        """A página inicial e o JSON dos gráficos usam a sessão escolhida."""
+        self.take_attendance(self.old_session, self.old_student, True, "2024-05-02")
+        DashboardCounters.rebuild_counters()
+        client = Client()
+        client.force_login(self.staff_user)
+
+        response = client.get(reverse('staff_home'), {"session_year": self.old_session.id})
+        self.assertEqual(response.context["attendance_count"], 1)
+        self.assertContains(response, "?session_year=%d" % self.old_session.id)
+
+        response = client.get(reverse('staff_home_chart_data'), {"session_year": self.new_session.id})
+        self.assertEqual(response.json()["attendance_list"], [0])
+        # A escolha fica guardada na sessão do usuário
+        self.assertEqual(client.get(reverse('staff_home')).context["attendance_count"], 0)